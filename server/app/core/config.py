@@ -35,11 +35,52 @@ class Settings(BaseSettings):
     OLLAMA_EMBED_MODEL: str = "qwen3-embedding:4b"
     OLLAMA_MODEL: str
 
+    # Ingestion-Embedding: Batching, Parallelität, Retry
+    EMBED_BATCH_SIZE: int = 32
+    EMBED_BATCH_MAX_CHARS: int = 48000
+    EMBED_CONCURRENCY: int = 4
+    EMBED_MAX_RETRIES: int = 3
+    EMBED_RETRY_BACKOFF: float = 1.0  # Sekunden, verdoppelt sich pro Versuch
+    EMBED_TIMEOUT: float = 120.0
+    IMPORT_BATCH_SIZE: int = 512  # Chunks pro Flush beim NDJSON-Import
+
     # === vLLM Backend ===
     VLLM_BASE: str = "http://vllm:8001"
     VLLM_MODEL: str = "Qwen/Qwen3-8B-AWQ"
     LLM_BACKEND: str = "ollama"  # options: 'ollama', 'vllm'
 
+    # Thread-Pools der async QA-Endpoints (blockierende Clients bzw. Reranking/HF-Embeddings)
+    QA_IO_WORKERS: int = 32
+    QA_CPU_WORKERS: int = 2
+    # Retrieval der Roh-Query startet parallel zur Guardrail (verworfen bei Non-RAG/Reformulation)
+    QA_SPECULATIVE_RETRIEVAL: bool = True
+
+    # HTTP-Transport zu Ollama/vLLM (gepoolte Keep-Alive-Verbindungen pro Backend)
+    LLM_HTTP_POOL_SIZE: int = 32  # max. gleichzeitige Verbindungen
+    LLM_HTTP_KEEPALIVE_CONNECTIONS: int = 16  # davon offen gehalten
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0  # Sekunden
+    LLM_HTTP_CONNECT_TIMEOUT: float = 5.0
+    LLM_HTTP_READ_TIMEOUT: float = 180.0
+    LLM_HTTP_WRITE_TIMEOUT: float = 30.0
+    LLM_HTTP_POOL_TIMEOUT: float = 30.0  # Warten auf freie Verbindung
+
+    # Endpoint-Pools: kommagetrennte URLs, optional mit Modellen ("http://gpu1:11434|qwen3:8b,...");
+    # leer = nur OLLAMA_BASE bzw. VLLM_BASE. Routing: wenigste laufende Requests
+    OLLAMA_ENDPOINTS: str = ""
+    VLLM_ENDPOINTS: str = ""
+    LLM_EJECT_AFTER_FAILURES: int = 3  # Fehler in Folge bis zum Auswerfen
+    LLM_EJECT_SECONDS: float = 30.0  # Wartezeit bis zum Health-Probe
+    LLM_PROBE_TIMEOUT: float = 2.0
+    LLM_LATENCY_WINDOW: int = 200  # Letzte Latenzen pro Endpoint (p50/p95)
+    LLM_CIRCUIT_FAIL_FAST: bool = True  # Alle Endpoints ausgeworfen → sofort 503 statt Timeout
+
+    # Hedging kurzer, idempotenter Aufrufe (Klassifikation, Reformulation, HyDE, Query-Embedding)
+    LLM_HEDGING: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.95  # Verzögerung = dieses Latenz-Quantil der Route
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # darunter gilt LLM_HEDGE_DEFAULT_DELAY
+    LLM_HEDGE_DEFAULT_DELAY: float = 1.0  # Sekunden
+    LLM_HEDGE_MIN_DELAY: float = 0.05
+
     # === Retrieval ===
     TOP_K: int
     RRF_K: int
@@ -63,6 +104,54 @@ class Settings(BaseSettings):
     OCR_LANGUAGES: str
     MAX_SEMANTIC_CHARACTERS: int
 
+    # Seitenbereichs-parallele Partitionierung großer PDFs
+    PDF_PARALLEL_MIN_PAGES: int = 40  # Ab dieser Seitenzahl wird parallel partitioniert
+    PDF_PAGES_PER_RANGE: int = 20
+    PDF_PARTITION_WORKERS: int = 0  # 0 = min(4, os.cpu_count()), 1 = deaktiviert
+
+    # Semantic Chunking (bge-m3): Batching & fensterweise Verarbeitung
+    SEMANTIC_EMBED_BATCH_SIZE: int = 64
+    SEMANTIC_EMBED_CONCURRENCY: int = 4
+    SEMANTIC_WINDOW_SIZE: int = 2048  # Elemente pro Fenster
+
+    # Entfernung wiederkehrender Kopf-/Fußzeilen vor dem Chunking
+    BOILERPLATE_STRIPPING: bool = True
+    BOILERPLATE_MIN_PAGES: int = 3  # Mindestanzahl Seiten mit identischer Zeile
+    BOILERPLATE_MIN_PAGE_RATIO: float = 0.5  # Anteil der Seiten des Dokuments
+    BOILERPLATE_EDGE_ELEMENTS: int = 2  # Elemente am Seitenanfang/-ende mit Ziffern-Normalisierung
+
+    # Near-Duplicate-Erkennung (MinHash/LSH) beim Indexieren
+    DEDUP_MODE: str = "mark"  # options: 'off', 'mark', 'collapse' (collapse nur innerhalb eines Dokuments)
+    DEDUP_THRESHOLD: float = 0.85  # Geschätzte Jaccard-Ähnlichkeit
+    DEDUP_MAX_CANDIDATES: int = 500  # Max. Treffer der Kandidaten-Query pro Dokument
+
+    # Qdrant-Collections: HNSW, Quantisierung, Platzierung (ensure_indices migriert bestehende)
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF: int = 128  # Suchzeit-ef
+    QDRANT_QUANTIZATION: str = "none"  # options: 'none', 'int8'
+    QDRANT_QUANTIZATION_QUANTILE: float = 0.99
+    QDRANT_RESCORE_OVERSAMPLING: float = 2.0  # Kandidaten-Faktor beim Rescoring (int8)
+    QDRANT_VECTORS_ON_DISK: bool = False  # Originalvektoren + HNSW-Graph auf Disk (mmap)
+    QDRANT_PAYLOAD_ON_DISK: bool = False
+
+    # Matryoshka: HNSW auf den ersten N Dimensionen (renormalisiert), Rescoring mit vollem Vektor (0 = aus)
+    EMBED_TRUNCATE_DIM: int = 0
+    MATRYOSHKA_RESCORE_FACTOR: float = 4.0  # Kandidaten = limit * Faktor
+
+    # Sparse-Vektoren (BM25-artig) in Qdrant für Hybrid-Suche in einer Query
+    QDRANT_SPARSE_VECTORS: bool = False
+    SPARSE_BM25_K1: float = 1.2
+    SPARSE_BM25_B: float = 0.75
+    SPARSE_AVG_DOC_LEN: float = 256.0  # Tokens, für die Längennormalisierung
+    HYBRID_ENGINE: str = "opensearch"  # "opensearch" (BM25 + Qdrant, RRF in Python) | "qdrant" (Sparse + Dense, RRF im Server)
+
+    # Prozess-Sharding: eigener Index/Collection pro process_name mit Routing-Tabelle
+    PROCESS_SHARDING: bool = False
+    SHARD_ROUTING_INDEX: str = "shard_routing"
+    SHARD_ROUTING_TTL: float = 30.0  # Sekunden, Cache der Routing-Tabelle
+    SHARD_FANOUT_WORKERS: int = 8  # Parallele Qdrant-Suchen bei Fan-out
+
     # === CORS ===
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
 
@@ -0,0 +1,45 @@
+"""
+Thread-Pools für blockierende Arbeit in async Endpoints.
+
+Die QA-Endpoints laufen als Coroutinen; was nicht async ist, wird explizit
+ausgelagert statt einen AnyIO-Worker für den ganzen Request zu belegen:
+
+- `run_io`: blockierende Client-Aufrufe (OpenSearch, Qdrant, Neo4j)
+- `run_cpu`: rechenintensive Schritte (Reranking, lokale HF-Embeddings)
+
+Getrennte Pools, damit lange Rerank-Läufe keine kurzen DB-Abfragen
+blockieren; Größen über QA_IO_WORKERS / QA_CPU_WORKERS.
+"""
+
+from __future__ import annotations
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_io_pool = ThreadPoolExecutor(max_workers=settings.QA_IO_WORKERS, thread_name_prefix="qa-io")
+_cpu_pool = ThreadPoolExecutor(max_workers=settings.QA_CPU_WORKERS, thread_name_prefix="qa-cpu")
+
+
+async def _run(pool: ThreadPoolExecutor, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Blockierenden I/O-Aufruf im I/O-Pool ausführen."""
+    return await _run(_io_pool, fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Rechenintensiven Schritt im CPU-Pool ausführen."""
+    return await _run(_cpu_pool, fn, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    _io_pool.shutdown(wait=False, cancel_futures=True)
+    _cpu_pool.shutdown(wait=False, cancel_futures=True)
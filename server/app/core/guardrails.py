@@ -146,23 +146,8 @@ PROCESS_KEYWORDS = [
 ]
 
 
-def classify_query(query: str) -> Tuple[QueryIntent, float]:
-    """
-    Klassifiziert eine Benutzeranfrage.
-    
-    Hybrid-Ansatz:
-    1. Pattern-Matching für offensichtliche Fälle (0ms, 95%+ der Queries)
-    2. LLM-Klassifikation nur für ambige Fälle (100-200ms, 5% der Queries)
-    
-    WICHTIG: Process-Keywords werden ZUERST geprüft, um False Positives zu vermeiden.
-    Z.B. "Hallo, ich möchte über Elterngeld wissen" → PROCESS_RELATED (nicht GREETING)
-    
-    Args:
-        query: Die Benutzeranfrage
-        
-    Returns:
-        Tuple[QueryIntent, confidence]: Intent und Konfidenz (0.0-1.0)
-    """
+def _classify_by_pattern(query: str) -> Optional[Tuple[QueryIntent, float]]:
+    """Schritte 1-5 von classify_query; None bei ambigen Fällen (→ LLM)."""
     query_lower = query.lower().strip()
     query_len = len(query_lower)
     
@@ -207,11 +192,53 @@ def classify_query(query: str) -> Tuple[QueryIntent, float]:
         logger.debug(f"Query '{query}' classified as PROCESS_RELATED (question heuristic)")
         return QueryIntent.PROCESS_RELATED, 0.7
     
+    return None
+
+
+def classify_query(query: str) -> Tuple[QueryIntent, float]:
+    """
+    Klassifiziert eine Benutzeranfrage.
+    
+    Hybrid-Ansatz:
+    1. Pattern-Matching für offensichtliche Fälle (0ms, 95%+ der Queries)
+    2. LLM-Klassifikation nur für ambige Fälle (100-200ms, 5% der Queries)
+    
+    WICHTIG: Process-Keywords werden ZUERST geprüft, um False Positives zu vermeiden.
+    Z.B. "Hallo, ich möchte über Elterngeld wissen" → PROCESS_RELATED (nicht GREETING)
+    
+    Args:
+        query: Die Benutzeranfrage
+        
+    Returns:
+        Tuple[QueryIntent, confidence]: Intent und Konfidenz (0.0-1.0)
+    """
+    result = _classify_by_pattern(query)
+    if result is not None:
+        return result
+    
     # 6) Für ambige Fälle: LLM-Klassifikation mit schnellem Modell
     logger.debug(f"Query '{query}' ambiguous, using LLM classification")
     return classify_query_with_llm(query)
 
 
+async def aclassify_query(query: str) -> Tuple[QueryIntent, float]:
+    """Async-Variante von classify_query (LLM nur für ambige Fälle)."""
+    result = _classify_by_pattern(query)
+    if result is not None:
+        return result
+    logger.debug(f"Query '{query}' ambiguous, using LLM classification")
+    return await aclassify_query_with_llm(query)
+
+
+def _parse_intent(response: str) -> Optional[QueryIntent]:
+    """Erste Kategorie, deren Name in der LLM-Antwort vorkommt."""
+    response = response.strip().upper().replace(" ", "_")
+    for intent in QueryIntent:
+        if intent.name in response:
+            return intent
+    return None
+
+
 def classify_query_with_llm(query: str) -> Tuple[QueryIntent, float]:
     """
     Klassifiziert Query mittels LLM (für ambige Fälle).
@@ -224,13 +251,10 @@ def classify_query_with_llm(query: str) -> Tuple[QueryIntent, float]:
     
     try:
         prompt = INTENT_CLASSIFICATION_PROMPT.format(query=query)
-        response = generate(prompt, LLMPresets.fast_classification())
-        response = response.strip().upper().replace(" ", "_")
-        
-        for intent in QueryIntent:
-            if intent.name in response:
-                logger.debug(f"Query '{query}' classified as {intent.name} (LLM)")
-                return intent, 0.85
+        intent = _parse_intent(generate(prompt, LLMPresets.fast_classification()))
+        if intent is not None:
+            logger.debug(f"Query '{query}' classified as {intent.name} (LLM)")
+            return intent, 0.85
                 
     except Exception as e:
         logger.warning(f"LLM classification failed: {e}")
@@ -239,6 +263,23 @@ def classify_query_with_llm(query: str) -> Tuple[QueryIntent, float]:
     return QueryIntent.PROCESS_RELATED, 0.5
 
 
+async def aclassify_query_with_llm(query: str) -> Tuple[QueryIntent, float]:
+    """Async-Variante von classify_query_with_llm."""
+    from app.services.llm import agenerate
+    from app.core.llm_config import LLMPresets
+    
+    try:
+        prompt = INTENT_CLASSIFICATION_PROMPT.format(query=query)
+        intent = _parse_intent(await agenerate(prompt, LLMPresets.fast_classification(), hedge=True))
+        if intent is not None:
+            logger.debug(f"Query '{query}' classified as {intent.name} (LLM)")
+            return intent, 0.85
+    except Exception as e:
+        logger.warning(f"LLM classification failed: {e}")
+    
+    return QueryIntent.PROCESS_RELATED, 0.5
+
+
 # Beschreibungen für Intent-Typen (für Verification-Prompt)
 INTENT_DESCRIPTIONS = {
     QueryIntent.GREETING: "eine reine Begrüßung ohne Frage",
@@ -272,6 +313,40 @@ def classify_query_llm_only(query: str, chat_history: Optional[List[dict]] = Non
     
     logger.info(f"[LLM-Only] Classifying query with context: '{query[:50]}...'")
     
+    try:
+        intent = _parse_intent(generate(_llm_only_prompt(query, chat_history), LLMPresets.fast_classification()))
+        if intent is not None:
+            logger.info(f"[LLM-Only] Query classified as {intent.name}")
+            return intent, 0.85
+                
+    except Exception as e:
+        logger.warning(f"[LLM-Only] Classification failed: {e}")
+    
+    # Fallback: assume process-related (permissiv)
+    logger.info("[LLM-Only] Fallback to PROCESS_RELATED")
+    return QueryIntent.PROCESS_RELATED, 0.6
+
+
+async def aclassify_query_llm_only(query: str, chat_history: Optional[List[dict]] = None) -> Tuple[QueryIntent, float]:
+    """Async-Variante von classify_query_llm_only."""
+    from app.services.llm import agenerate
+    from app.core.llm_config import LLMPresets
+    
+    logger.info(f"[LLM-Only] Classifying query with context: '{query[:50]}...'")
+    
+    try:
+        intent = _parse_intent(await agenerate(_llm_only_prompt(query, chat_history), LLMPresets.fast_classification(), hedge=True))
+        if intent is not None:
+            logger.info(f"[LLM-Only] Query classified as {intent.name}")
+            return intent, 0.85
+    except Exception as e:
+        logger.warning(f"[LLM-Only] Classification failed: {e}")
+    
+    logger.info("[LLM-Only] Fallback to PROCESS_RELATED")
+    return QueryIntent.PROCESS_RELATED, 0.6
+
+
+def _llm_only_prompt(query: str, chat_history: Optional[List[dict]]) -> str:
     # Kontext aus letzter Assistant-Antwort extrahieren
     context_info = ""
     if chat_history and len(chat_history) >= 1:
@@ -284,8 +359,7 @@ def classify_query_llm_only(query: str, chat_history: Optional[List[dict]] = Non
                     context_info = f"\nVorherige Assistent-Antwort (Auszug): \"{content[:250]}...\""
                 break
     
-    try:
-        prompt = f"""Analysiere die Benutzeranfrage im Konversationskontext.
+    return f"""Analysiere die Benutzeranfrage im Konversationskontext.
 {context_info}
 
 Aktuelle Anfrage: "{query}"
@@ -306,21 +380,6 @@ WICHTIG:
 
 Antworte NUR mit dem Kategorie-Namen."""
 
-        response = generate(prompt, LLMPresets.fast_classification())
-        response = response.strip().upper().replace(" ", "_")
-        
-        for intent in QueryIntent:
-            if intent.name in response:
-                logger.info(f"[LLM-Only] Query classified as {intent.name}")
-                return intent, 0.85
-                
-    except Exception as e:
-        logger.warning(f"[LLM-Only] Classification failed: {e}")
-    
-    # Fallback: assume process-related (permissiv)
-    logger.info("[LLM-Only] Fallback to PROCESS_RELATED")
-    return QueryIntent.PROCESS_RELATED, 0.6
-
 
 def verify_with_llm(query: str, initial_intent: QueryIntent, confidence: float) -> Tuple[QueryIntent, float]:
     """
@@ -354,25 +413,8 @@ def verify_with_llm(query: str, initial_intent: QueryIntent, confidence: float)
     logger.info(f"LLM verification triggered for '{query[:50]}...' (intent={initial_intent.name}, conf={confidence})")
     
     try:
-        prompt = INTENT_VERIFICATION_PROMPT.format(
-            query=query,
-            initial_intent=initial_intent.name,
-            initial_intent_description=INTENT_DESCRIPTIONS.get(initial_intent, "unbekannt")
-        )
-        
-        response = generate(prompt, LLMPresets.fast_classification())
-        response = response.strip().upper()
-        
-        if "OVERRIDE" in response:
-            logger.info(f"LLM OVERRIDE: '{query[:50]}...' is PROCESS_RELATED (was {initial_intent.name})")
-            return QueryIntent.PROCESS_RELATED, 0.8
-        elif "CONFIRM" in response:
-            logger.debug(f"LLM CONFIRM: '{query[:50]}...' is {initial_intent.name}")
-            return initial_intent, min(confidence + 0.1, 0.95)  # Boost confidence after LLM confirmation
-        else:
-            logger.warning(f"LLM verification unclear response: {response}")
-            # Bei unklarer Antwort: Permissiv → PROCESS_RELATED
-            return QueryIntent.PROCESS_RELATED, 0.6
+        response = generate(_verification_prompt(query, initial_intent), LLMPresets.fast_classification())
+        return _parse_verification(query, response, initial_intent, confidence)
             
     except Exception as e:
         logger.warning(f"LLM verification failed: {e}")
@@ -380,6 +422,49 @@ def verify_with_llm(query: str, initial_intent: QueryIntent, confidence: float)
         return QueryIntent.PROCESS_RELATED, 0.5
 
 
+async def averify_with_llm(query: str, initial_intent: QueryIntent, confidence: float) -> Tuple[QueryIntent, float]:
+    """Async-Variante von verify_with_llm."""
+    from app.services.llm import agenerate
+    from app.core.llm_config import LLMPresets
+    
+    if initial_intent == QueryIntent.PROCESS_RELATED or confidence >= LLM_VERIFICATION_THRESHOLD:
+        return initial_intent, confidence
+    
+    logger.info(f"LLM verification triggered for '{query[:50]}...' (intent={initial_intent.name}, conf={confidence})")
+    
+    try:
+        response = await agenerate(_verification_prompt(query, initial_intent), LLMPresets.fast_classification(), hedge=True)
+        return _parse_verification(query, response, initial_intent, confidence)
+    except Exception as e:
+        logger.warning(f"LLM verification failed: {e}")
+        return QueryIntent.PROCESS_RELATED, 0.5
+
+
+def _verification_prompt(query: str, initial_intent: QueryIntent) -> str:
+    return INTENT_VERIFICATION_PROMPT.format(
+        query=query,
+        initial_intent=initial_intent.name,
+        initial_intent_description=INTENT_DESCRIPTIONS.get(initial_intent, "unbekannt")
+    )
+
+
+def _parse_verification(
+    query: str, response: str, initial_intent: QueryIntent, confidence: float
+) -> Tuple[QueryIntent, float]:
+    response = response.strip().upper()
+    
+    if "OVERRIDE" in response:
+        logger.info(f"LLM OVERRIDE: '{query[:50]}...' is PROCESS_RELATED (was {initial_intent.name})")
+        return QueryIntent.PROCESS_RELATED, 0.8
+    elif "CONFIRM" in response:
+        logger.debug(f"LLM CONFIRM: '{query[:50]}...' is {initial_intent.name}")
+        return initial_intent, min(confidence + 0.1, 0.95)  # Boost confidence after LLM confirmation
+    else:
+        logger.warning(f"LLM verification unclear response: {response}")
+        # Bei unklarer Antwort: Permissiv → PROCESS_RELATED
+        return QueryIntent.PROCESS_RELATED, 0.6
+
+
 def should_use_rag(intent: QueryIntent) -> bool:
     """
     Prüft ob Query durch RAG-Pipeline verarbeitet werden soll.
@@ -440,44 +525,102 @@ def classify_query_with_context(
     # ========================================
     # HYBRID MODE (Original Flow)
     # ========================================
-    query_lower = query.lower().strip()
+    logger.info(f"[Context Check] chat_history: {len(chat_history) if chat_history else 0} messages")
     
-    # Follow-up Patterns die auf Kontext-Bezug hindeuten
-    FOLLOWUP_PATTERNS = [
-        "nochmal", "noch mal", "nochmals", "erneut",
-        "kannst du", "könntest du", "können sie", "könnten sie",
-        "bitte prüfen", "bitte nochmal", "bitte noch mal",
-        "mehr dazu", "mehr informationen", "mehr details",
-        "genauer", "präziser", "ausführlicher",
-        "was meinst du", "wie meinst du",
-        "und was ist mit", "was ist mit",
-        "das verstehe ich nicht", "erkläre", "erklär",
-    ]
-
+    # SCHRITT 1: Follow-up Pattern Check (hohe Priorität)
+    followup = _followup_check(query, chat_history)
+    if followup is not None:
+        return followup
     
-    logger.info(f"[Context Check] chat_history: {len(chat_history) if chat_history else 0} messages")
+    # SCHRITT 2: Pattern-based Classification
+    intent, confidence = classify_query(query)
+    logger.info(f"[Pattern] Query classified as {intent.name} (conf={confidence})")
+    
+    # SCHRITT 3: Context-based Boost (nur für AMBIGE Fälle)
+    boosted = _context_boost(query, chat_history, intent, confidence)
+    if boosted is not None:
+        return boosted
     
     # ========================================
-    # SCHRITT 1: Follow-up Pattern Check (hohe Priorität)
+    # SCHRITT 4: LLM Verification (Hybrid Approach)
     # ========================================
+    # Nur Non-PROCESS Klassifikationen mit niedriger Confidence werden verifiziert
+    if intent != QueryIntent.PROCESS_RELATED and confidence < LLM_VERIFICATION_THRESHOLD:
+        logger.info(f"[Hybrid] Pattern classified as {intent.name} (conf={confidence}), triggering LLM verification")
+        final_intent, final_confidence = verify_with_llm(query, intent, confidence)
+        return final_intent, final_confidence
+    
+    return intent, confidence
+
+
+async def aclassify_query_with_context(
+    query: str,
+    chat_history: Optional[List[dict]] = None,
+    mode: GuardrailMode = GuardrailMode.HYBRID
+) -> Tuple[QueryIntent, float]:
+    """Async-Variante von classify_query_with_context (gleiche Modi und Schritte)."""
+    if mode == GuardrailMode.DISABLED:
+        logger.info(f"[Guardrails DISABLED] Bypassing classification for: '{query[:50]}...'")
+        return QueryIntent.PROCESS_RELATED, 1.0
+    
+    if mode == GuardrailMode.LLM_ONLY:
+        logger.info(f"[Guardrails LLM_ONLY] Using pure LLM classification with context")
+        return await aclassify_query_llm_only(query, chat_history)
+    
+    logger.info(f"[Context Check] chat_history: {len(chat_history) if chat_history else 0} messages")
+    
+    followup = _followup_check(query, chat_history)
+    if followup is not None:
+        return followup
+    
+    intent, confidence = await aclassify_query(query)
+    logger.info(f"[Pattern] Query classified as {intent.name} (conf={confidence})")
+    
+    boosted = _context_boost(query, chat_history, intent, confidence)
+    if boosted is not None:
+        return boosted
+    
+    if intent != QueryIntent.PROCESS_RELATED and confidence < LLM_VERIFICATION_THRESHOLD:
+        logger.info(f"[Hybrid] Pattern classified as {intent.name} (conf={confidence}), triggering LLM verification")
+        return await averify_with_llm(query, intent, confidence)
+    
+    return intent, confidence
+
+
+# Follow-up Patterns die auf Kontext-Bezug hindeuten
+FOLLOWUP_PATTERNS = [
+    "nochmal", "noch mal", "nochmals", "erneut",
+    "kannst du", "könntest du", "können sie", "könnten sie",
+    "bitte prüfen", "bitte nochmal", "bitte noch mal",
+    "mehr dazu", "mehr informationen", "mehr details",
+    "genauer", "präziser", "ausführlicher",
+    "was meinst du", "wie meinst du",
+    "und was ist mit", "was ist mit",
+    "das verstehe ich nicht", "erkläre", "erklär",
+]
+
+
+def _followup_check(query: str, chat_history: Optional[List[dict]]) -> Optional[Tuple[QueryIntent, float]]:
+    """Schritt 1 von classify_query_with_context: kurze Follow-ups mit Kontext."""
+    query_lower = query.lower().strip()
     if chat_history and len(chat_history) >= 2:
         if len(query_lower) < 60:
             for pattern in FOLLOWUP_PATTERNS:
                 if pattern in query_lower:
                     logger.info(f"Query '{query[:50]}...' classified as PROCESS_RELATED (follow-up pattern: '{pattern}')")
                     return QueryIntent.PROCESS_RELATED, 0.8
-    
-    # ========================================
-    # SCHRITT 2: Pattern-based Classification
-    # ========================================
-    intent, confidence = classify_query(query)
-    logger.info(f"[Pattern] Query classified as {intent.name} (conf={confidence})")
-    
-    # ========================================
-    # SCHRITT 3: Context-based Boost (nur für AMBIGE Fälle)
-    # ========================================
-    # WICHTIG: Klare Chitchat/Greeting Queries werden NICHT durch Context überschrieben
-    # Nur bei niedriger Confidence hilft der Context
+    return None
+
+
+def _context_boost(
+    query: str, chat_history: Optional[List[dict]], intent: QueryIntent, confidence: float
+) -> Optional[Tuple[QueryIntent, float]]:
+    """
+    Schritt 3 von classify_query_with_context.
+
+    WICHTIG: Klare Chitchat/Greeting Queries werden NICHT durch Context überschrieben.
+    Nur bei niedriger Confidence hilft der Context.
+    """
     if chat_history and len(chat_history) >= 2:
         if intent != QueryIntent.PROCESS_RELATED and confidence < 0.85:
             # Prüfe ob vorherige Antwort substantiell war
@@ -496,15 +639,4 @@ def classify_query_with_context(
                         f"(was {intent.name}, conf={confidence}, prev_response={len(content)} chars)"
                     )
                     return QueryIntent.PROCESS_RELATED, 0.7
-    
-    # ========================================
-    # SCHRITT 4: LLM Verification (Hybrid Approach)
-    # ========================================
-    # Nur Non-PROCESS Klassifikationen mit niedriger Confidence werden verifiziert
-    if intent != QueryIntent.PROCESS_RELATED and confidence < LLM_VERIFICATION_THRESHOLD:
-        logger.info(f"[Hybrid] Pattern classified as {intent.name} (conf={confidence}), triggering LLM verification")
-        final_intent, final_confidence = verify_with_llm(query, intent, confidence)
-        return final_intent, final_confidence
-    
-    return intent, confidence
-
+    return None
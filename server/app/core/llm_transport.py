@@ -0,0 +1,470 @@
+"""
+Gemeinsamer HTTP-Transport für alle Modell-Aufrufe (Ollama, vLLM).
+
+Pro Backend ein Pool von Endpoints (OLLAMA_ENDPOINTS / VLLM_ENDPOINTS,
+Default: OLLAMA_BASE / VLLM_BASE), pro Endpoint ein gepoolter httpx-Client
+mit Keep-Alive:
+
+- `llm_client(backend)`: synchroner Client (thread-safe, für Threads/Executor)
+- `allm_client(backend)`: asynchroner Client (Verbindungen pro Event-Loop)
+- Pool-Größe, Keep-Alive und Timeouts aus den Settings (LLM_HTTP_*);
+  Aufrufer können pro Request einen abweichenden Read-Timeout setzen
+  (`llm_timeout(...)`), z.B. für lange Generierungen.
+
+Die Clients haben dieselbe Schnittstelle wie httpx (`post`, `stream`), Aufrufer
+geben nur den Pfad an (`/api/generate`, `/v1/completions`, ...). Jeder
+Request wird an den Endpoint mit den wenigsten laufenden Requests geroutet,
+der das Modell aus `json["model"]` bedient:
+
+    OLLAMA_ENDPOINTS="http://gpu1:11434|qwen3:8b,http://gpu2:11434|qwen3:8b,http://cpu1:11434|qwen2.5:1.5b-instruct"
+
+Endpoints ohne Modell-Liste bedienen alle Modelle.
+
+Circuit Breaker pro Endpoint: nach LLM_EJECT_AFTER_FAILURES
+aufeinanderfolgenden Fehlern (Verbindungsfehler, Timeout, HTTP 5xx) ist der
+Endpoint offen (ausgeworfen) und wird nach LLM_EJECT_SECONDS per Health-Probe
+geprüft (halb offen), bevor er wieder Traffic bekommt. Sind alle Endpoints
+für ein Modell offen, schlagen Requests sofort fehl (ServiceUnavailableError,
+HTTP 503) statt hinter Timeouts zu warten (LLM_CIRCUIT_FAIL_FAST).
+
+Hedging (LLM_HEDGING, nur async `post(..., hedge=True)`): für kurze,
+idempotente Aufrufe (Klassifikation, Reformulation, HyDE, Query-Embedding)
+geht nach einer Verzögerung in Höhe des p95 (LLM_HEDGE_QUANTILE) der Route
+(Backend, Pfad, Modell) ein Duplikat an einen zweiten Endpoint; die erste
+erfolgreiche Antwort gewinnt, der andere Request wird abgebrochen.
+
+Latenzen pro Endpoint liefert `endpoint_stats`, Hedging-Zähler
+`hedge_stats`. `close_clients` schließt alle Pools beim Shutdown.
+"""
+
+from __future__ import annotations
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+import httpx
+
+from app.core.clients import get_logger
+from app.core.config import settings
+from app.core.error_handlers import ServiceUnavailableError
+
+logger = get_logger(__name__)
+
+BACKENDS = ("ollama", "vllm")
+
+# Pfade für den Health-Probe ausgeworfener Endpoints
+_PROBE_PATHS = {"ollama": "/api/tags", "vllm": "/v1/models"}
+
+_lock = threading.Lock()
+
+
+@dataclass
+class Endpoint:
+    """Ein Modell-Server mit Lastzustand und Latenz-Statistik."""
+
+    backend: str
+    url: str
+    models: FrozenSet[str] = frozenset()  # leer = alle Modelle
+    inflight: int = 0
+    requests: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0  # time.monotonic(); 0 = im Pool
+    probing: bool = False
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=settings.LLM_LATENCY_WINDOW))
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until == 0.0
+
+    def serves(self, model: Optional[str]) -> bool:
+        return not self.models or model in self.models
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Latenz-Quantil in Sekunden über das Fenster (None ohne Messwerte)."""
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(v: Optional[float]) -> Optional[float]:
+            return round(v * 1000, 1) if v is not None else None
+
+        return {
+            "backend": self.backend,
+            "url": self.url,
+            "models": sorted(self.models),
+            "healthy": self.healthy,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.consecutive_failures,
+            "p50_ms": ms(self.latency_quantile(0.5)),
+            "p95_ms": ms(self.latency_quantile(0.95)),
+            "mean_ms": ms(sum(self.latencies) / len(self.latencies)) if self.latencies else None,
+        }
+
+
+def _parse_endpoints(backend: str, spec: str, default_url: str) -> List[Endpoint]:
+    """"url[|modell|...],url2..." → Endpoints (leer = nur default_url)."""
+    entries = [e.strip() for e in spec.split(",") if e.strip()] or [default_url]
+    endpoints = []
+    for entry in entries:
+        url, *models = [p.strip() for p in entry.split("|")]
+        endpoints.append(Endpoint(backend=backend, url=url.rstrip("/"), models=frozenset(m for m in models if m)))
+    return endpoints
+
+
+_pools: Dict[str, List[Endpoint]] = {}
+
+
+def endpoints(backend: str) -> List[Endpoint]:
+    """Endpoints eines Backends (beim ersten Zugriff aus den Settings gebaut)."""
+    pool = _pools.get(backend)
+    if pool is None:
+        if backend == "ollama":
+            spec, default_url = settings.OLLAMA_ENDPOINTS, settings.OLLAMA_BASE
+        elif backend == "vllm":
+            spec, default_url = settings.VLLM_ENDPOINTS, settings.VLLM_BASE
+        else:
+            raise ValueError(f"Unbekanntes LLM-Backend: {backend} (erlaubt: {', '.join(BACKENDS)})")
+        with _lock:
+            pool = _pools.setdefault(backend, _parse_endpoints(backend, spec, default_url))
+    return pool
+
+
+def endpoint_stats() -> List[Dict[str, Any]]:
+    """Zustand und Latenzen aller Endpoints (für Monitoring)."""
+    with _lock:
+        return [ep.stats() for backend in BACKENDS for ep in _pools.get(backend, [])]
+
+
+# ============================================================
+# Routing, Auswerfen, Health-Probe
+# ============================================================
+
+
+def _healthy_candidates(pool: List[Endpoint], model: Optional[str]) -> Tuple[List[Endpoint], List[Endpoint]]:
+    # Aufruf unter _lock; startet fällige Probes offener Endpoints
+    candidates = [ep for ep in pool if ep.serves(model)] or pool
+    now = time.monotonic()
+    for ep in candidates:
+        if not ep.healthy and not ep.probing and now >= ep.ejected_until:
+            _start_probe(ep)
+    return candidates, [ep for ep in candidates if ep.healthy]
+
+
+def _acquire(healthy: List[Endpoint]) -> Endpoint:
+    least = min(ep.inflight for ep in healthy)
+    ep = random.choice([e for e in healthy if e.inflight == least])
+    ep.inflight += 1
+    return ep
+
+
+def _pick(backend: str, model: Optional[str]) -> Endpoint:
+    """Least-outstanding-requests unter den gesunden Endpoints für das Modell."""
+    pool = endpoints(backend)
+    with _lock:
+        candidates, healthy = _healthy_candidates(pool, model)
+        if not healthy:
+            if settings.LLM_CIRCUIT_FAIL_FAST:
+                raise ServiceUnavailableError(
+                    backend, f"Alle {backend}-Endpoints für {model} sind ausgeworfen (Circuit offen)"
+                )
+            logger.warning(f"Keine gesunden {backend}-Endpoints für {model}, nutze ausgeworfene")
+            healthy = candidates
+        return _acquire(healthy)
+
+
+def _pick_alternative(backend: str, model: Optional[str], exclude: Endpoint) -> Optional[Endpoint]:
+    """Zweiter gesunder Endpoint für einen Hedge-Request (None, falls keiner)."""
+    pool = endpoints(backend)
+    with _lock:
+        _, healthy = _healthy_candidates(pool, model)
+        others = [ep for ep in healthy if ep is not exclude]
+        return _acquire(others) if others else None
+
+
+def _release(ep: Endpoint, seconds: float, ok: Optional[bool], route: Optional[tuple] = None) -> None:
+    """
+    Request beendet. ok=True: Erfolg (Latenz zählt), ok=False: Endpoint-Fehler,
+    ok=None: abgebrochen/neutral (z.B. Cancel) – zählt weder noch.
+    """
+    with _lock:
+        ep.inflight -= 1
+        if ok is None:
+            return
+        ep.requests += 1
+        if ok:
+            ep.latencies.append(seconds)
+            ep.consecutive_failures = 0
+            if route is not None:
+                window = _route_latencies.get(route)
+                if window is None:
+                    window = _route_latencies[route] = deque(maxlen=settings.LLM_LATENCY_WINDOW)
+                window.append(seconds)
+            return
+        ep.errors += 1
+        ep.consecutive_failures += 1
+        if ep.healthy and ep.consecutive_failures >= settings.LLM_EJECT_AFTER_FAILURES:
+            ep.ejected_until = time.monotonic() + settings.LLM_EJECT_SECONDS
+            logger.warning(
+                f"LLM-Endpoint {ep.url} ausgeworfen ({ep.consecutive_failures} Fehler in Folge), "
+                f"Probe in {settings.LLM_EJECT_SECONDS:.0f}s"
+            )
+
+
+def _start_probe(ep: Endpoint) -> None:
+    # Aufruf unter _lock; der Probe selbst läuft im Hintergrund-Thread
+    ep.probing = True
+    threading.Thread(target=_probe, args=(ep,), name=f"llm-probe:{ep.url}", daemon=True).start()
+
+
+def _probe(ep: Endpoint) -> None:
+    try:
+        resp = httpx.get(ep.url + _PROBE_PATHS[ep.backend], timeout=settings.LLM_PROBE_TIMEOUT)
+        ok = resp.status_code < 500
+    except httpx.HTTPError:
+        ok = False
+    with _lock:
+        ep.probing = False
+        if ok:
+            ep.ejected_until = 0.0
+            ep.consecutive_failures = 0
+            logger.info(f"LLM-Endpoint {ep.url} wieder aufgenommen")
+        else:
+            ep.ejected_until = time.monotonic() + settings.LLM_EJECT_SECONDS
+
+
+# ============================================================
+# Hedging
+# ============================================================
+
+
+# (Backend, Pfad, Modell) → letzte Latenzen; Grundlage der Hedge-Verzögerung
+_route_latencies: Dict[tuple, Deque[float]] = {}
+_hedge_counts = {"requests": 0, "hedged": 0, "hedge_won": 0}
+
+
+def _hedge_delay(route: tuple) -> float:
+    """p95 (LLM_HEDGE_QUANTILE) der Route, Default bis genug Messwerte vorliegen."""
+    with _lock:
+        window = list(_route_latencies.get(route, ()))
+    if len(window) < settings.LLM_HEDGE_MIN_SAMPLES:
+        return settings.LLM_HEDGE_DEFAULT_DELAY
+    window.sort()
+    q = window[min(len(window) - 1, int(settings.LLM_HEDGE_QUANTILE * len(window)))]
+    return max(q, settings.LLM_HEDGE_MIN_DELAY)
+
+
+def hedge_stats() -> Dict[str, Any]:
+    """Hedging-Zähler und aktuelle Verzögerungen pro Route."""
+    with _lock:
+        counts = dict(_hedge_counts)
+        routes = list(_route_latencies)
+    counts["delays_ms"] = {"|".join(str(p) for p in r): round(_hedge_delay(r) * 1000, 1) for r in routes}
+    return counts
+
+
+# ============================================================
+# httpx-Clients pro Endpoint
+# ============================================================
+
+
+_sync_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[Tuple[str, int], httpx.AsyncClient] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_HTTP_POOL_SIZE,
+        max_keepalive_connections=settings.LLM_HTTP_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def llm_timeout(read: Optional[float] = None) -> httpx.Timeout:
+    """Timeouts aus den Settings, optional mit abweichendem Read-Timeout."""
+    return httpx.Timeout(
+        connect=settings.LLM_HTTP_CONNECT_TIMEOUT,
+        read=read if read is not None else settings.LLM_HTTP_READ_TIMEOUT,
+        write=settings.LLM_HTTP_WRITE_TIMEOUT,
+        # Wartezeit auf eine freie Verbindung im Pool
+        pool=settings.LLM_HTTP_POOL_TIMEOUT,
+    )
+
+
+def _sync_client(ep: Endpoint) -> httpx.Client:
+    client = _sync_clients.get(ep.url)
+    if client is None:
+        with _lock:
+            client = _sync_clients.get(ep.url)
+            if client is None:
+                client = httpx.Client(base_url=ep.url, limits=_limits(), timeout=llm_timeout())
+                _sync_clients[ep.url] = client
+    return client
+
+
+def _async_client(ep: Endpoint) -> httpx.AsyncClient:
+    key = (ep.url, id(asyncio.get_running_loop()))
+    client = _async_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _async_clients.get(key)
+            if client is None:
+                client = httpx.AsyncClient(base_url=ep.url, limits=_limits(), timeout=llm_timeout())
+                _async_clients[key] = client
+    return client
+
+
+def _model_of(kwargs: Dict[str, Any]) -> Optional[str]:
+    body = kwargs.get("json")
+    return body.get("model") if isinstance(body, dict) else None
+
+
+class PooledClient:
+    """Synchroner Client über den Endpoint-Pool eines Backends."""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+
+    def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        ep = _pick(self.backend, _model_of(kwargs))
+        t0 = time.perf_counter()
+        ok: Optional[bool] = None
+        try:
+            resp = _sync_client(ep).post(path, **kwargs)
+            ok = resp.status_code < 500
+            return resp
+        except httpx.TransportError:
+            ok = False
+            raise
+        finally:
+            _release(ep, time.perf_counter() - t0, ok)
+
+    @contextlib.contextmanager
+    def stream(self, method: str, path: str, **kwargs: Any) -> Iterator[httpx.Response]:
+        # Der Endpoint bleibt für die gesamte Stream-Dauer belegt
+        ep = _pick(self.backend, _model_of(kwargs))
+        t0 = time.perf_counter()
+        ok: Optional[bool] = None
+        try:
+            with _sync_client(ep).stream(method, path, **kwargs) as resp:
+                ok = resp.status_code < 500
+                yield resp
+        except httpx.TransportError:
+            ok = False
+            raise
+        finally:
+            _release(ep, time.perf_counter() - t0, ok)
+
+
+class AsyncPooledClient:
+    """Asynchroner Client über den Endpoint-Pool eines Backends."""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+
+    async def _post_on(self, ep: Endpoint, route: tuple, path: str, **kwargs: Any) -> httpx.Response:
+        t0 = time.perf_counter()
+        ok: Optional[bool] = None
+        try:
+            resp = await _async_client(ep).post(path, **kwargs)
+            ok = resp.status_code < 500
+            return resp
+        except httpx.TransportError:
+            ok = False
+            raise
+        finally:
+            _release(ep, time.perf_counter() - t0, ok, route)
+
+    async def post(self, path: str, *, hedge: bool = False, **kwargs: Any) -> httpx.Response:
+        """
+        POST über den Pool. Mit `hedge=True` (nur für idempotente Aufrufe)
+        und LLM_HEDGING geht nach der Hedge-Verzögerung ein Duplikat an einen
+        zweiten Endpoint; die erste erfolgreiche Antwort gewinnt.
+        """
+        model = _model_of(kwargs)
+        route = (self.backend, path, model)
+        ep = _pick(self.backend, model)
+        if not (hedge and settings.LLM_HEDGING):
+            return await self._post_on(ep, route, path, **kwargs)
+
+        with _lock:
+            _hedge_counts["requests"] += 1
+        primary = asyncio.create_task(self._post_on(ep, route, path, **kwargs))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=_hedge_delay(route))
+            if not done:
+                backup_ep = _pick_alternative(self.backend, model, exclude=ep)
+                if backup_ep is not None:
+                    logger.debug(f"Hedge: {path} ({model}) zusätzlich an {backup_ep.url}")
+                    with _lock:
+                        _hedge_counts["hedged"] += 1
+                    tasks.add(asyncio.create_task(self._post_on(backup_ep, route, path, **kwargs)))
+
+            # Erste erfolgreiche Antwort gewinnt; scheitern alle, zählt das letzte Ergebnis
+            last: Optional[asyncio.Task] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last = task
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is not primary:
+                            with _lock:
+                                _hedge_counts["hedge_won"] += 1
+                        return task.result()
+            return last.result()
+        finally:
+            # Verlierer abbrechen (zählt am Endpoint weder als Erfolg noch als Fehler)
+            for task in tasks:
+                task.cancel()
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        ep = _pick(self.backend, _model_of(kwargs))
+        t0 = time.perf_counter()
+        ok: Optional[bool] = None
+        try:
+            async with _async_client(ep).stream(method, path, **kwargs) as resp:
+                ok = resp.status_code < 500
+                yield resp
+        except httpx.TransportError:
+            ok = False
+            raise
+        finally:
+            _release(ep, time.perf_counter() - t0, ok)
+
+
+def llm_client(backend: str = "ollama") -> PooledClient:
+    """Gepoolter synchroner Client für ein Backend."""
+    endpoints(backend)  # validiert das Backend
+    return PooledClient(backend)
+
+
+def allm_client(backend: str = "ollama") -> AsyncPooledClient:
+    """Gepoolter asynchroner Client für ein Backend (Verbindungen pro Event-Loop)."""
+    endpoints(backend)
+    return AsyncPooledClient(backend)
+
+
+async def close_clients() -> None:
+    """Schließt alle Pools (Shutdown)."""
+    with _lock:
+        sync_clients = list(_sync_clients.values())
+        _sync_clients.clear()
+        loop_id = id(asyncio.get_running_loop())
+        async_clients = [c for (_, lid), c in _async_clients.items() if lid == loop_id]
+        for key in [k for k in _async_clients if k[1] == loop_id]:
+            del _async_clients[key]
+    for c in sync_clients:
+        c.close()
+    for c in async_clients:
+        await c.aclose()
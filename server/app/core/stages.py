@@ -0,0 +1,103 @@
+"""
+Stage-Graph für QA-Requests.
+
+Ein Request besteht aus Stages (Guardrail, Gating, Reformulation, HyDE,
+Retrieval), die voneinander abhängen. `StageRunner` startet jede Stage als
+asyncio-Task, sobald ihre Abhängigkeiten fertig sind – unabhängige Stages
+laufen damit parallel und die Latenz nähert sich dem kritischen Pfad.
+
+    runner = StageRunner()
+    runner.start("guardrail", classify)
+    runner.start("gating", gating)
+    runner.start("search_query", reformulate, "guardrail")
+    runner.start("retrieval", retrieve, "search_query")
+    chunks = await runner.result("retrieval")
+
+Spekulative Stages (z.B. Retrieval der Roh-Query, bevor die Guardrail
+entschieden hat) werden mit `cancel` verworfen; Arbeit, die bereits in
+einem Thread-Pool läuft, läuft dort zu Ende, ihr Ergebnis wird ignoriert.
+`aclose` bricht alle offenen Stages ab (Fallback-Antwort, Client-Abbruch).
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.clients import get_logger
+
+logger = get_logger(__name__)
+
+
+class StageRunner:
+    """Führt Stages als Tasks aus, sobald ihre Abhängigkeiten fertig sind."""
+
+    def __init__(self, t0: Optional[float] = None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Stage → (Start, Ende) in Sekunden relativ zu t0
+        self.timings: Dict[str, tuple] = {}
+
+    def start(self, name: str, fn: Callable[..., Awaitable[Any]], *deps: str) -> asyncio.Task:
+        """
+        Startet eine Stage. `fn` bekommt die Ergebnisse der Abhängigkeiten
+        als Positionsargumente (in der angegebenen Reihenfolge).
+        """
+        if name in self._tasks:
+            raise ValueError(f"Stage bereits gestartet: {name}")
+        missing = [d for d in deps if d not in self._tasks]
+        if missing:
+            raise ValueError(f"Stage {name}: unbekannte Abhängigkeiten {missing}")
+
+        async def _run():
+            args = [await self._tasks[d] for d in deps]
+            started = time.perf_counter() - self.t0
+            try:
+                return await fn(*args)
+            finally:
+                self.timings[name] = (started, time.perf_counter() - self.t0)
+
+        task = asyncio.create_task(_run(), name=f"stage:{name}")
+        self._tasks[name] = task
+        return task
+
+    def has(self, name: str) -> bool:
+        return name in self._tasks
+
+    def task(self, name: str) -> asyncio.Task:
+        """Task einer Stage (z.B. für asyncio.wait über mehrere Stages)."""
+        return self._tasks[name]
+
+    async def result(self, name: str) -> Any:
+        return await self._tasks[name]
+
+    def cancel(self, *names: str) -> None:
+        """Verwirft Stages (z.B. überholte Spekulation)."""
+        for name in names:
+            task = self._tasks.get(name)
+            if task is not None and not task.done():
+                logger.info(f"Stage '{name}' verworfen")
+                task.cancel()
+
+    async def aclose(self) -> None:
+        """Bricht alle offenen Stages ab und wartet, bis sie beendet sind."""
+        pending = [t for t in self._tasks.values() if not t.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        # Ausnahmen verworfener/abgeschlossener Tasks abholen (sonst Warnung im Log)
+        for t in self._tasks.values():
+            if t.done() and not t.cancelled():
+                t.exception()
+
+    def timings_ms(self) -> Dict[str, List[int]]:
+        """Stage-Zeiten als [Start, Ende] in Millisekunden (für Clients)."""
+        return {name: [int(start * 1000), int(end * 1000)] for name, (start, end) in self.timings.items()}
+
+    def summary(self) -> str:
+        """Stage-Zeiten für das Log, z.B. 'gating=0.00-0.12s, retrieval=0.01-0.85s'."""
+        return ", ".join(
+            f"{name}={start:.2f}-{end:.2f}s"
+            for name, (start, end) in sorted(self.timings.items(), key=lambda kv: kv[1][0])
+        )
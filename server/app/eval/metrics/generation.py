@@ -247,16 +247,15 @@ def semantic_similarity(
         return 0.0
 
     try:
-        import requests
-        from app.core.config import settings
+        from app.core.llm_transport import llm_client, llm_timeout
 
-        resp = requests.post(
-            f"{settings.OLLAMA_BASE}/api/embed",
+        resp = llm_client("ollama").post(
+            "/api/embed",
             json={
                 "model": model,
                 "input": [pred, gold],
             },
-            timeout=60,
+            timeout=llm_timeout(60),
         )
         resp.raise_for_status()
         embeddings = resp.json()["embeddings"]
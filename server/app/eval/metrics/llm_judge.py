@@ -2,9 +2,8 @@ from __future__ import annotations
 from typing import Dict, List, Any, Optional
 import json
 import re
-import requests
-from app.core.config import settings
 from app.core.clients import get_logger
+from app.core.llm_transport import llm_client, llm_timeout
 from app.services.gating import _get_process_tasks_from_neo4j
 from app.core.llm_config import LLMPresets
 
@@ -30,8 +29,8 @@ def _ollama_generate_judge(
     config = LLMPresets.evaluation(model=model)
 
     try:
-        resp = requests.post(
-            f"{settings.OLLAMA_BASE}/api/generate",
+        resp = llm_client("ollama").post(
+            "/api/generate",
             json={
                 "model": config.model,
                 "prompt": prompt,
@@ -42,7 +41,7 @@ def _ollama_generate_judge(
                     "num_predict": config.max_tokens,
                 },
             },
-            timeout=120,
+            timeout=llm_timeout(120),
         )
         resp.raise_for_status()
         return resp.json().get("response", "")
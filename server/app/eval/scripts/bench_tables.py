@@ -0,0 +1,155 @@
+"""
+Micro-Benchmark: Tabellen-Extraktion (lxml, ein Parse) vs. bisherige
+BeautifulSoup-Implementierung (zwei Parses pro Tabelle).
+
+Prüft zusätzlich, dass beide Implementierungen identische Ausgaben liefern.
+
+Usage:
+    python -m app.eval.scripts.bench_tables --iterations 200
+    python -m app.eval.scripts.bench_tables --html-file tables.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from bs4 import BeautifulSoup
+
+from app.services.table_extraction import table_html_to_text
+
+# Repräsentative Tabellen: Datentabelle, Formular mit Checkboxen,
+# Label-Formular, große Datentabelle
+SAMPLE_TABLES = [
+    "<table><tr><th>Frist</th><th>Stelle</th></tr>"
+    "<tr><td>2 Wochen</td><td>Prüfungsamt</td></tr>"
+    "<tr><td>4 Wochen</td><td>Dekanat</td></tr></table>",
+    "<table><tr><td>☐ Elternzeit</td><td>☐ Mutterschutz</td></tr>"
+    "<tr><td>Name</td><td></td></tr></table>",
+    "<table><tr><td>Name:</td><td>Max</td></tr><tr><td>Datum*</td><td>01.01.</td></tr>"
+    "<tr><td>Ort:</td><td>Karlsruhe</td></tr></table>",
+    "<table>"
+    + "".join(
+        f"<tr><td>Zeile {i}</td><td>Wert <b>{i}</b></td><td>{i * 3} €</td></tr>"
+        for i in range(60)
+    )
+    + "</table>",
+]
+
+
+# ============================================================
+# Referenz: bisherige Implementierung aus pipeline.py
+# ============================================================
+
+
+def _legacy_is_form_table(html: str) -> bool:
+    soup = BeautifulSoup(html, "html.parser")
+
+    cells = soup.find_all(["td", "th"])
+    if not cells:
+        return False
+
+    total = len(cells)
+    empty = sum(1 for c in cells if not c.get_text(strip=True))
+    if total > 0 and empty / total > 0.4:
+        return True
+
+    text = soup.get_text()
+    checkbox_symbols = ["☐", "□", "○", "☑", "☒", "◯", "◻"]
+    if any(sym in text for sym in checkbox_symbols):
+        return True
+
+    rows = soup.find_all("tr")
+    if rows:
+        first_col_cells = [row.find(["td", "th"]) for row in rows]
+        first_col_cells = [c for c in first_col_cells if c]
+        if first_col_cells:
+            labels = sum(
+                1 for c in first_col_cells
+                if c.get_text(strip=True).rstrip().endswith((":", "*"))
+            )
+            if labels / len(first_col_cells) > 0.5:
+                return True
+
+    return False
+
+
+def _legacy_table_html_to_text(html: str) -> str:
+    if _legacy_is_form_table(html):
+        return ""
+
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for tr in soup.find_all("tr"):
+        cells = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
+        if any(cell.strip() for cell in cells):
+            rows.append(" | ".join(cells))
+
+    if not rows:
+        return ""
+
+    num_cols = len(rows[0].split(" | "))
+    separator = " | ".join(["---"] * num_cols)
+    result = [rows[0], separator] + rows[1:] if len(rows) > 1 else [rows[0]]
+    return "\n".join(result)
+
+
+# ============================================================
+# Benchmark
+# ============================================================
+
+
+def _time(fn: Callable[[str], str], tables: List[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in tables:
+            fn(html)
+    return time.perf_counter() - start
+
+
+def load_tables(path: str) -> List[str]:
+    """Lädt Tabellen aus JSONL ({"html": ...} pro Zeile) oder einer einzelnen HTML-Datei."""
+    p = Path(path)
+    if p.suffix == ".jsonl":
+        with p.open(encoding="utf-8") as f:
+            return [json.loads(line)["html"] for line in f if line.strip()]
+    return [p.read_text(encoding="utf-8")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Tabellen-Extraktion")
+    parser.add_argument("--iterations", type=int, default=200, help="Wiederholungen (default: 200)")
+    parser.add_argument("--html-file", default=None, help="JSONL mit {'html': ...} oder HTML-Datei")
+    args = parser.parse_args()
+
+    tables = load_tables(args.html_file) if args.html_file else SAMPLE_TABLES
+
+    mismatches = [
+        i for i, html in enumerate(tables)
+        if table_html_to_text(html) != _legacy_table_html_to_text(html)
+    ]
+
+    legacy = _time(_legacy_table_html_to_text, tables, args.iterations)
+    current = _time(table_html_to_text, tables, args.iterations)
+    n = len(tables) * args.iterations
+
+    print("=" * 60)
+    print("TABELLEN-EXTRAKTION BENCHMARK")
+    print("=" * 60)
+    print(f"Tabellen:        {len(tables)} x {args.iterations} Iterationen")
+    print(f"BeautifulSoup:   {legacy:.3f}s ({legacy / n * 1e6:.1f} µs/Tabelle)")
+    print(f"lxml (1 Parse):  {current:.3f}s ({current / n * 1e6:.1f} µs/Tabelle)")
+    print(f"Speedup:         {legacy / current:.2f}x")
+    print(f"Abweichungen:    {len(mismatches)} {mismatches[:10] if mismatches else ''}")
+    print("=" * 60)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
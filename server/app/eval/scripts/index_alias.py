@@ -0,0 +1,81 @@
+"""
+Verwaltung versionierter Indizes hinter Aliasen (OpenSearch + Qdrant).
+
+Neue Versionen baut `app.eval.scripts.reindex --alias <name>`; dieses Script
+zeigt den Zustand und schaltet Versionen um.
+
+Usage:
+    python -m app.eval.scripts.index_alias status --alias chunks_semantic_qwen3
+    python -m app.eval.scripts.index_alias swap --alias chunks_semantic_qwen3 --version 3
+    python -m app.eval.scripts.index_alias rollback --alias chunks_semantic_qwen3
+    python -m app.eval.scripts.index_alias cleanup --alias chunks_semantic_qwen3 --keep 2
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from app.core.clients import get_logger, setup_logging
+from app.services.index_aliases import (
+    AliasState,
+    alias_state,
+    drop_old_versions,
+    rollback_alias,
+    swap_alias,
+    versioned_name,
+    warm_up,
+)
+
+logger = get_logger(__name__)
+
+
+def print_state(state: AliasState) -> None:
+    print("=" * 60)
+    print(f"OpenSearch-Alias {state.os_alias}: {state.os_target or ('(konkreter Index)' if state.os_legacy else '-')}")
+    print(f"  Versionen: {state.os_versions or '-'}")
+    print(f"Qdrant-Alias {state.qdrant_alias}: {state.qdrant_target or ('(konkrete Collection)' if state.qdrant_legacy else '-')}")
+    print(f"  Versionen: {state.qdrant_versions or '-'}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versionierte Indizes / Alias-Swap")
+    parser.add_argument("command", choices=["status", "swap", "rollback", "cleanup"])
+    parser.add_argument("--alias", required=True, help="OpenSearch-Alias (= Qdrant-Alias, falls nicht angegeben)")
+    parser.add_argument("--qdrant-alias", default=None, help="Abweichender Qdrant-Alias")
+    parser.add_argument("--version", type=int, default=None, help="Zielversion für swap")
+    parser.add_argument("--keep", type=int, default=2, help="cleanup: neueste Versionen behalten (default: 2)")
+    parser.add_argument("--no-warmup", action="store_true", help="swap: ohne Warm-up umschalten")
+    parser.add_argument(
+        "--drop-legacy",
+        action="store_true",
+        help="swap: konkreten Index/Collection unter dem Alias-Namen ersetzen",
+    )
+    args = parser.parse_args()
+
+    if args.command == "status":
+        state = alias_state(args.alias, args.qdrant_alias)
+    elif args.command == "swap":
+        if args.version is None:
+            parser.error("swap benötigt --version")
+        if not args.no_warmup:
+            warm_up(
+                versioned_name(args.alias, args.version),
+                versioned_name(args.qdrant_alias or args.alias, args.version),
+            )
+        state = swap_alias(args.alias, args.version, args.qdrant_alias, drop_legacy=args.drop_legacy)
+    elif args.command == "rollback":
+        state = rollback_alias(args.alias, args.qdrant_alias)
+    else:
+        dropped = drop_old_versions(args.alias, args.qdrant_alias, keep=args.keep)
+        logger.info(f"Gelöschte Versionen: {dropped or '-'}")
+        state = alias_state(args.alias, args.qdrant_alias)
+
+    print_state(state)
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    main()
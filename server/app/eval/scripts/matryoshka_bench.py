@@ -0,0 +1,219 @@
+"""
+Benchmark: Recall@k gekürzter (Matryoshka-)Embeddings gegen die volle Dimension.
+
+Lädt die vollen Vektoren einer bestehenden Collection und vergleicht für
+jede Dimension in --dims per exakter Suche (numpy, ohne HNSW):
+
+- recall_truncated: Top-k nur auf dem gekürzten, renormalisierten Vektor
+- recall_rescored:  Top-(k * Faktor) gekürzt, dann Rescoring mit vollem Vektor
+                    (= Suchpfad bei EMBED_TRUNCATE_DIM)
+
+Ground Truth ist die exakte Top-k-Suche mit voller Dimension. Queries sind
+entweder Fragen aus einer JSONL-Datei (Feld "text", wird embedded) oder
+zufällige Chunks der Collection (der Chunk selbst zählt nicht als Treffer).
+
+Mit --live wird zusätzlich eine Matryoshka-Collection über den echten
+Suchpfad (HNSW + Rescoring in Qdrant) abgefragt.
+
+Verwendung:
+    python -m app.eval.scripts.matryoshka_bench --collection chunks_semantic_qwen3 --dims 128 256 512 1024
+    python -m app.eval.scripts.matryoshka_bench --collection chunks_semantic_qwen3 --queries data/queries.jsonl --k 10 --factor 4
+    python -m app.eval.scripts.matryoshka_bench --collection chunks_semantic_qwen3 --live chunks_semantic_qwen3_mrl256
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from app.core.clients import get_logger, get_qdrant, setup_logging
+from app.services.pipeline import embed_texts
+from app.services.qdrant_schema import dense_query_kwargs
+from app.eval.scripts.reindex import dense_vector
+
+logger = get_logger(__name__)
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return m / np.where(norms > 0, norms, 1.0)
+
+
+def load_vectors(collection: str, limit: Optional[int] = None, batch_size: int = 1000) -> Tuple[List[str], np.ndarray]:
+    """Volle Dense-Vektoren (normalisiert) und chunk_ids einer Collection."""
+    qd = get_qdrant()
+    ids: List[str] = []
+    rows: List[List[float]] = []
+    offset = None
+    while True:
+        points, offset = qd.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["chunk_id"],
+            with_vectors=True,
+        )
+        for p in points:
+            ids.append((p.payload or {}).get("chunk_id") or str(p.id))
+            rows.append(dense_vector(p.vector))
+        if offset is None or (limit and len(ids) >= limit):
+            break
+    if limit:
+        ids, rows = ids[:limit], rows[:limit]
+    return ids, _normalize(np.asarray(rows, dtype=np.float32))
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indizes der k besten Scores pro Zeile, absteigend sortiert."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _mask_self(scores: np.ndarray, self_idx: Optional[np.ndarray]) -> np.ndarray:
+    if self_idx is not None:
+        scores[np.arange(len(self_idx)), self_idx] = -np.inf
+    return scores
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = [len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]
+    return float(np.mean(hits))
+
+
+def evaluate_dims(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    dims: List[int],
+    k: int,
+    factor: float,
+    self_idx: Optional[np.ndarray] = None,
+) -> List[Dict[str, Any]]:
+    """Recall@k gekürzt / gekürzt + Rescoring je Dimension gegen exakte volle Suche."""
+    full = _mask_self(queries @ corpus.T, self_idx)
+    truth = _top_k(full, k)
+    n_candidates = max(k, int(k * factor))
+
+    results = []
+    for d in dims:
+        t0 = time.perf_counter()
+        short = _mask_self(_normalize(queries[:, :d]) @ _normalize(corpus[:, :d]).T, self_idx)
+        candidates = _top_k(short, n_candidates)
+        search_s = time.perf_counter() - t0
+
+        # Rescoring: volle Scores nur für die Kandidaten
+        cand_scores = np.take_along_axis(full, candidates, axis=1)
+        rescored = np.take_along_axis(candidates, _top_k(cand_scores, k), axis=1)
+
+        results.append(
+            {
+                "dim": d,
+                "recall_truncated": round(_recall(candidates[:, :k], truth), 4),
+                "recall_rescored": round(_recall(rescored, truth), 4),
+                "candidates": n_candidates,
+                "index_mb": round(corpus.shape[0] * d * 4 / 1e6, 1),
+                "ms_per_query": round(search_s / len(queries) * 1000, 3),
+            }
+        )
+    return results
+
+
+def evaluate_live(
+    collection: str, ids: List[str], corpus: np.ndarray, queries: np.ndarray, k: int,
+    self_idx: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """Recall@k einer Matryoshka-Collection über den echten Suchpfad (HNSW + Rescoring)."""
+    qd = get_qdrant()
+    truth = _top_k(_mask_self(queries @ corpus.T, self_idx), k)
+    hits, latencies = [], []
+    for i, q in enumerate(queries):
+        t0 = time.perf_counter()
+        # Ein Treffer mehr, falls der Query-Chunk selbst zurückkommt
+        points = qd.query_points(
+            collection_name=collection,
+            with_payload=["chunk_id"],
+            **dense_query_kwargs(qd, collection, q.tolist(), k + 1),
+        ).points
+        latencies.append(time.perf_counter() - t0)
+        found = [(p.payload or {}).get("chunk_id") or str(p.id) for p in points]
+        if self_idx is not None:
+            found = [cid for cid in found if cid != ids[self_idx[i]]]
+        expected = {ids[j] for j in truth[i]}
+        hits.append(len(set(found[:k]) & expected) / len(expected))
+    return {
+        "collection": collection,
+        "recall": round(float(np.mean(hits)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k gekürzter Embeddings (Matryoshka)")
+    parser.add_argument("--collection", required=True, help="Collection mit vollen Vektoren (Ground Truth)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[128, 256, 512, 1024])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--factor", type=float, default=4.0, help="Kandidaten = k * Faktor (MATRYOSHKA_RESCORE_FACTOR)")
+    parser.add_argument("--queries", default=None, help="JSONL mit Feld 'text' (sonst zufällige Chunks)")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=None, help="Max. Anzahl Corpus-Vektoren")
+    parser.add_argument("--live", default=None, help="Matryoshka-Collection über Qdrant mitmessen")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="Ergebnis als JSON speichern")
+    args = parser.parse_args()
+
+    ids, corpus = load_vectors(args.collection, args.limit)
+    logger.info(f"Corpus: {corpus.shape[0]} Vektoren, dim={corpus.shape[1]}")
+
+    self_idx = None
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            texts = [json.loads(line)["text"] for line in f if line.strip()][: args.num_queries]
+        queries = _normalize(np.asarray(embed_texts(texts), dtype=np.float32))
+    else:
+        rng = np.random.default_rng(args.seed)
+        self_idx = rng.choice(corpus.shape[0], size=min(args.num_queries, corpus.shape[0]), replace=False)
+        queries = corpus[self_idx]
+
+    dims = [d for d in args.dims if d < corpus.shape[1]]
+    report: Dict[str, Any] = {
+        "collection": args.collection,
+        "corpus": corpus.shape[0],
+        "full_dim": corpus.shape[1],
+        "queries": len(queries),
+        "k": args.k,
+        "full_index_mb": round(corpus.shape[0] * corpus.shape[1] * 4 / 1e6, 1),
+        "dims": evaluate_dims(corpus, queries, dims, args.k, args.factor, self_idx),
+    }
+    if args.live:
+        report["live"] = evaluate_live(args.live, ids, corpus, queries, args.k, self_idx)
+
+    print("=" * 72)
+    print(f"Recall@{args.k} vs. volle Dimension ({corpus.shape[1]}), {len(queries)} Queries, Kandidaten k*{args.factor}")
+    print(f"{'dim':>6} {'gekürzt':>10} {'+Rescoring':>11} {'Index MB':>10} {'ms/Query':>10}")
+    for r in report["dims"]:
+        print(
+            f"{r['dim']:>6} {r['recall_truncated']:>10.4f} {r['recall_rescored']:>11.4f} "
+            f"{r['index_mb']:>10.1f} {r['ms_per_query']:>10.3f}"
+        )
+    print(f"{corpus.shape[1]:>6} {1.0:>10.4f} {1.0:>11.4f} {report['full_index_mb']:>10.1f}")
+    if "live" in report:
+        live = report["live"]
+        print(f"Live {live['collection']}: recall={live['recall']:.4f} p50={live['p50_ms']}ms p95={live['p95_ms']}ms")
+    print("=" * 72)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info(f"Ergebnis gespeichert: {args.out}")
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    main()
@@ -4,27 +4,70 @@ Script zum Neu-Indexieren aller Dokumente mit einem anderen Embedding-Modell.
 Struktur-Mapping:
   OpenSearch: process_name, tags, file_name in meta
   Qdrant: process_name, tags, file_name auf Top-Level
+  Dedup-Felder (minhash_bands, minhash_sig, duplicate_of) werden übernommen
+
+Ablauf: Sliced Scroll über mehrere Reader, Embedding und Bulk-Writes laufen
+als Pipeline parallel. Ein Checkpoint (JSONL) hält fest, welche Chunks
+bereits geschrieben sind; ein abgebrochener Lauf wird mit demselben Befehl
+fortgesetzt.
+
+Mit --alias (und --source-index = Alias) zieht ein Catch-up vor und nach dem
+Swap Chunks nach, die während des Builds im Live-Index hinzukamen, geändert
+oder gelöscht wurden (Vergleich _seq_no der Quelle ↔ _version des Ziels).
+Indizes mit Prozess-Shards (PROCESS_SHARDING) werden mit --alias abgelehnt.
 
 Verwendung:
     python -m app.eval.scripts.reindex --model qwen3-embedding --suffix qwen3
     python -m app.eval.scripts.reindex --model bge-m3 --suffix semantic --source-index chunks_semantic
+    python -m app.eval.scripts.reindex --model qwen3-embedding --suffix qwen3 --workers 8 --restart
+    python -m app.eval.scripts.reindex --model qwen3-embedding:4b --suffix v2 --source-index chunks_qwen3 --copy-vectors
+    python -m app.eval.scripts.reindex --model qwen3-embedding:4b --source-index chunks_qwen3 --alias chunks_qwen3
 """
 
 import argparse
+import json
 import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
 from uuid import uuid5, NAMESPACE_URL
 
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from app.core.config import settings
 from app.core.clients import get_opensearch, get_qdrant, get_logger, setup_logging
-from app.services.pipeline import embed_texts
+from app.services.dedup import DEDUP_MAPPING_PROPERTIES
+from app.services import pipeline
+from app.services.pipeline import embed_texts, embed_texts_bulk
+from app.services.qdrant_schema import (
+    DENSE_VECTOR_NAME,
+    FULL_VECTOR_NAME,
+    collection_create_kwargs,
+    ensure_payload_indexes,
+    full_vector_params,
+    point_vector,
+)
+from app.services.sharding import routes_for
+from app.services.index_aliases import (
+    alias_state,
+    next_version,
+    qdrant_alias_target,
+    qdrant_exists,
+    swap_alias,
+    versioned_name,
+    warm_up,
+)
 
 logger = get_logger(__name__)
 
+CHECKPOINT_DIR = Path("data/reindex_checkpoints")
+SCROLL_TTL = "10m"
+
 
 def normalize_tags(tags: Any) -> str | None:
     """Normalisiert tags zu einem String."""
@@ -93,6 +136,7 @@ def extract_from_os_hit(
     section_title = meta.get("section_title")
     element_type = meta.get("element_type")
     table_html = meta.get("table_html")
+    duplicate_sources = meta.get("duplicate_sources")
 
     return {
         "chunk_id": chunk_id,
@@ -108,6 +152,13 @@ def extract_from_os_hit(
         "section_title": section_title,
         "element_type": element_type,
         "table_html": table_html,
+        "duplicate_sources": duplicate_sources,
+        # Dedup-Signatur-Index (Top-Level in OS, duplicate_of auch in Qdrant)
+        "minhash_bands": source.get("minhash_bands"),
+        "minhash_sig": source.get("minhash_sig"),
+        "duplicate_of": source.get("duplicate_of"),
+        # Stand des Quell-Dokuments → _version im Ziel (Catch-up erkennt Änderungen)
+        "source_seq_no": hit.get("_seq_no"),
     }
 
 
@@ -163,6 +214,7 @@ def get_target_mapping(is_semantic_target: bool) -> Dict[str, Any]:
                             "table_html": {"type": "text", "index": False},
                         },
                     },
+                    **DEDUP_MAPPING_PROPERTIES,
                 }
             }
         }
@@ -174,28 +226,98 @@ def get_target_mapping(is_semantic_target: bool) -> Dict[str, Any]:
                     "document_id": {"type": "keyword"},
                     "text": {"type": "text"},
                     "meta": {"type": "object", "enabled": True},
+                    **DEDUP_MAPPING_PROPERTIES,
                 }
             }
         }
 
 
-def reindex_all_chunks(
+def build_os_body(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenSearch-Dokument (document_id, text, meta) für einen extrahierten Chunk."""
+    os_meta = {}
+
+    if doc["process_name"]:
+        os_meta["process_name"] = doc["process_name"]
+    if doc["tags"]:
+        os_meta["tags"] = doc["tags"]
+    if doc["file_name"]:
+        os_meta["file_name"] = doc["file_name"]
+    if doc["roles"]:
+        os_meta["roles"] = doc["roles"]
+    if doc["page_number"] is not None:
+        # page_number beibehalten (String bei semantic, int bei by_title)
+        os_meta["page_number"] = doc["page_number"]
+    if doc["section_title"]:
+        os_meta["section_title"] = doc["section_title"]
+    if doc["element_type"]:
+        os_meta["element_type"] = doc["element_type"]
+    if doc["table_html"]:
+        os_meta["table_html"] = doc["table_html"]
+    if doc["duplicate_sources"]:
+        os_meta["duplicate_sources"] = doc["duplicate_sources"]
+
+    body = {
+        "document_id": doc["document_id"],
+        "text": doc["text"],
+        "meta": os_meta,
+    }
+    for field in DEDUP_MAPPING_PROPERTIES:
+        if doc[field]:
+            body[field] = doc[field]
+    return body
+
+
+def build_qdrant_payload(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Qdrant-Payload (Filterfelder auf Top-Level) für einen extrahierten Chunk."""
+    payload = {
+        "document_id": doc["document_id"],
+        "text": doc["text"],
+        "chunk_id": doc["chunk_id"],
+        "process_name": doc["process_name"],
+        "tags": doc["tags"],
+        "file_name": doc["file_name"],
+    }
+
+    if doc["roles"]:
+        payload["roles"] = doc["roles"]
+    if doc["page_number"] is not None:
+        payload["page_number"] = doc["page_number"]
+    if doc["section_title"]:
+        payload["section_title"] = doc["section_title"]
+    if doc["element_type"]:
+        payload["element_type"] = doc["element_type"]
+    if doc["table_html"]:
+        payload["table_html"] = doc["table_html"]
+    if doc["duplicate_sources"]:
+        payload["duplicate_sources"] = doc["duplicate_sources"]
+    if doc["duplicate_of"]:
+        # Retrieval blendet Duplikate über dieses Payload-Feld aus
+        payload["duplicate_of"] = doc["duplicate_of"]
+    return payload
+
+
+def point_id_for(chunk_id: str) -> str:
+    """Qdrant-ID aus der chunk_id ("{doc_id}:{i}"), identisch zu pipeline._uuid_for."""
+    parts = chunk_id.rsplit(":", 1)
+    idx = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    return _uuid_for(parts[0], idx)
+
+
+def prepare_targets(
     source_os_index: str,
     target_os_index: str,
     target_qdrant_collection: str,
-    batch_size: int = 50,
     preserve_semantic_structure: bool = False,
-) -> int:
+    dim: Optional[int] = None,
+) -> bool:
     """
-    Liest alle Chunks aus source_os_index und indexiert sie
-    mit neuem Embedding in target_os_index + target_qdrant_collection.
+    Legt Ziel-Index und Ziel-Collection an (falls nicht vorhanden).
 
     Args:
-        source_os_index: Quell-Index
-        target_os_index: Ziel-Index
-        target_qdrant_collection: Ziel-Collection
-        batch_size: Batch-Größe
-        preserve_semantic_structure: True um semantic-Struktur zu erhalten (page_number als String)
+        dim: Vektordimension der Collection (None = per Probe-Embedding ermitteln)
+
+    Returns:
+        True wenn der Quell-Index semantic ist
     """
     os_client = get_opensearch()
     qd = get_qdrant()
@@ -216,159 +338,748 @@ def reindex_all_chunks(
     else:
         logger.info(f"Ziel-Index {target_os_index} existiert bereits!")
 
-    # 2. Ziel-Qdrant-Collection erstellen
-    from qdrant_client.http.models import VectorParams, Distance, PointStruct
-
-    cols = [c.name for c in qd.get_collections().collections]
-    if target_qdrant_collection not in cols:
-        probe_vec = embed_texts(["probe"])[0]
-        dim = len(probe_vec)
+    # 2. Ziel-Qdrant-Collection erstellen (HNSW/Quantisierung/Payload-Indizes gemäß Settings)
+    if not qdrant_exists(qd, target_qdrant_collection):
+        if dim is None:
+            dim = len(embed_texts(["probe"])[0])
         logger.info(
             f"Erstelle Qdrant Collection: {target_qdrant_collection} (dim={dim})"
         )
-        qd.create_collection(
-            target_qdrant_collection,
-            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
-        )
+        qd.create_collection(target_qdrant_collection, **collection_create_kwargs(dim))
+        ensure_payload_indexes(qd, target_qdrant_collection)
     else:
         logger.info(f"Qdrant Collection {target_qdrant_collection} existiert bereits!")
 
-    # 3. Alle Chunks aus Source lesen
-    logger.info(f"Lese Chunks aus {source_os_index}...")
+    return is_semantic_source
 
-    scroll_response = os_client.search(
-        index=source_os_index,
-        body={"query": {"match_all": {}}, "size": batch_size},
-        scroll="5m",
-    )
 
-    scroll_id = scroll_response["_scroll_id"]
-    hits = scroll_response["hits"]["hits"]
-    total = scroll_response["hits"]["total"]["value"]
+# ============================================================
+# Checkpoint & Fortschritt
+# ============================================================
+
+
+def default_checkpoint_path(source_os_index: str, target_os_index: str) -> Path:
+    return CHECKPOINT_DIR / f"{source_os_index}__{target_os_index}.jsonl"
+
+
+class ReindexCheckpoint:
+    """
+    Append-only Checkpoint eines Reindex-Laufs (JSONL).
+
+    Erste Zeile: Konfiguration (Quelle/Ziel). Danach eine Zeile mit den
+    chunk_ids jedes vollständig geschriebenen Batches (OpenSearch + Qdrant).
+    Beim Fortsetzen werden diese Chunks übersprungen; da Ziel-IDs
+    deterministisch sind, ist ein doppelt geschriebener Batch unschädlich.
+    """
+
+    def __init__(self, path: Path, config: Dict[str, Any], resume: bool = True):
+        self.path = path
+        self.done: Set[str] = set()
+        self.completed = False
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and path.exists():
+            with path.open(encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("config") != config:
+                    raise ValueError(
+                        f"Checkpoint {path} gehört zu einem anderen Lauf: {header.get('config')} "
+                        f"(mit --restart neu beginnen)"
+                    )
+                for line in f:
+                    # Letzte Zeile kann bei Abbruch unvollständig sein
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.done.update(entry.get("ids", []))
+                    self.completed |= bool(entry.get("completed"))
+            self._fh = path.open("a", encoding="utf-8")
+            if path.read_bytes()[-1:] not in (b"", b"\n"):
+                self._fh.write("\n")
+        else:
+            self._fh = path.open("w", encoding="utf-8")
+            self._write({"config": config, "created_at": time.time()})
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(entry) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def mark(self, chunk_ids: List[str]) -> None:
+        with self._lock:
+            self.done.update(chunk_ids)
+            self._write({"ids": chunk_ids})
+
+    def finish(self) -> None:
+        with self._lock:
+            self._write({"completed": True, "finished_at": time.time()})
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class ReindexProgress:
+    """Zähler mit Durchsatz (Chunks/s) und ETA; loggt höchstens alle `interval` Sekunden."""
+
+    def __init__(self, total: int, already_done: int = 0, interval: float = 5.0):
+        self.total = total
+        self.already_done = already_done
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.interval = interval
+        self._start = time.perf_counter()
+        self._last_log = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, processed: int = 0, skipped: int = 0, failed: int = 0) -> None:
+        with self._lock:
+            self.processed += processed
+            self.skipped += skipped
+            self.failed += failed
+            now = time.perf_counter()
+            if now - self._last_log >= self.interval:
+                self._last_log = now
+                logger.info(self.summary())
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self._start
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        done = self.already_done + self.processed + self.skipped + self.failed
+        remaining = max(0, self.total - done)
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+        pct = 100.0 * done / self.total if self.total else 100.0
+        return (
+            f"Verarbeitet: {done}/{self.total} ({pct:.1f}%) | {rate:.1f} Chunks/s | "
+            f"ETA {eta} | übersprungen: {self.skipped}, fehlgeschlagen: {self.failed}"
+        )
 
-    logger.info(f"Gefunden: {total} Chunks")
 
-    processed = 0
+# ============================================================
+# Reindex-Pipeline: Sliced Scroll → Embedding → Bulk-Write
+# ============================================================
+
+
+def _read_slice(
+    source_os_index: str,
+    slice_id: int,
+    slices: int,
+    batch_size: int,
+    out_q: "queue.Queue",
+    stop: threading.Event,
+) -> None:
+    """Liest einen Slice des Quell-Index per Scroll und legt Hit-Batches in out_q."""
+    os_client = get_opensearch()
+    body: Dict[str, Any] = {
+        "query": {"match_all": {}},
+        "size": batch_size,
+        "sort": ["_doc"],
+        "seq_no_primary_term": True,
+    }
+    if slices > 1:
+        body["slice"] = {"id": slice_id, "max": slices}
+
+    resp = os_client.search(index=source_os_index, body=body, scroll=SCROLL_TTL)
+    scroll_id = resp.get("_scroll_id")
+    try:
+        while resp["hits"]["hits"] and not stop.is_set():
+            out_q.put(resp["hits"]["hits"])
+            resp = os_client.scroll(scroll_id=scroll_id, scroll=SCROLL_TTL)
+            scroll_id = resp.get("_scroll_id", scroll_id)
+    finally:
+        try:
+            os_client.clear_scroll(scroll_id=scroll_id)
+        except Exception:
+            pass
+
+
+def _prepare_batch(
+    hits: List[Dict[str, Any]],
+    is_semantic_source: bool,
+    checkpoint: ReindexCheckpoint,
+    progress: ReindexProgress,
+) -> List[Dict[str, Any]]:
+    docs = []
     skipped = 0
+    for hit in hits:
+        if hit["_id"] in checkpoint.done:
+            continue
+        try:
+            doc = extract_from_os_hit(hit, is_semantic_source=is_semantic_source)
+        except Exception as e:
+            logger.info(f"Fehler bei Chunk {hit.get('_id')}: {e}")
+            skipped += 1
+            continue
+        if not doc["text"].strip():
+            logger.debug(f"Überspringe leeren Chunk: {doc['chunk_id']}")
+            skipped += 1
+            continue
+        docs.append(doc)
+    if skipped:
+        progress.add(skipped=skipped)
+    return docs
+
+
+def _embed_stage(
+    in_q: "queue.Queue",
+    out_q: "queue.Queue",
+    is_semantic_source: bool,
+    checkpoint: ReindexCheckpoint,
+    progress: ReindexProgress,
+) -> None:
+    """Embeddet Batches, während der Writer den vorherigen Batch schreibt."""
+    while True:
+        hits = in_q.get()
+        if hits is None:
+            out_q.put(None)
+            return
+        docs = _prepare_batch(hits, is_semantic_source, checkpoint, progress)
+        if not docs:
+            continue
+        try:
+            vectors = embed_texts_bulk([d["text"] for d in docs], label="reindex")
+        except Exception as e:
+            # Nicht im Checkpoint → wird beim nächsten Lauf erneut versucht
+            logger.error(f"Embedding-Fehler für Batch ({len(docs)} Chunks): {e}")
+            progress.add(failed=len(docs))
+            continue
+        out_q.put((docs, vectors))
+
+
+def _write_batch(
+    docs: List[Dict[str, Any]],
+    vectors: List[Any],
+    target_os_index: str,
+    target_qdrant_collection: str,
+) -> None:
+    """
+    Schreibt einen Batch per Bulk-API nach OpenSearch und per Upsert nach Qdrant.
 
-    while hits:
-        texts = []
-        docs = []
+    Die _seq_no des Quell-Dokuments wird als externe _version geschrieben;
+    catch_up vergleicht beide, um geänderte Chunks zu erkennen.
+    """
+    from opensearchpy.helpers import bulk
+    from qdrant_client.http.models import PointStruct
+
+    def _action(d: Dict[str, Any]) -> Dict[str, Any]:
+        action = {"_index": target_os_index, "_id": d["chunk_id"], "_source": build_os_body(d)}
+        if d.get("source_seq_no") is not None:
+            action.update(version=d["source_seq_no"], version_type="external_gte")
+        return action
+
+    _, errors = bulk(get_opensearch(), (_action(d) for d in docs), raise_on_error=False)
+    if errors:
+        raise RuntimeError(f"{len(errors)} Bulk-Fehler, erster: {errors[0]}")
+    get_qdrant().upsert(
+        collection_name=target_qdrant_collection,
+        points=[
+            PointStruct(
+                id=point_id_for(d["chunk_id"]),
+                vector=point_vector(v, d["text"]),
+                payload=build_qdrant_payload(d),
+            )
+            for d, v in zip(docs, vectors)
+        ],
+        wait=True,
+    )
 
-        for hit in hits:
-            try:
-                doc = extract_from_os_hit(hit, is_semantic_source=is_semantic_source)
 
-                if not doc["text"].strip():
-                    logger.debug(f"Überspringe leeren Chunk: {doc['chunk_id']}")
-                    skipped += 1
-                    continue
+def _write_stage(
+    in_q: "queue.Queue",
+    target_os_index: str,
+    target_qdrant_collection: str,
+    checkpoint: ReindexCheckpoint,
+    progress: ReindexProgress,
+) -> None:
+    """Schreibt Batches nach OpenSearch und Qdrant und setzt den Checkpoint."""
+    while True:
+        item = in_q.get()
+        if item is None:
+            return
+        docs, vectors = item
+        try:
+            _write_batch(docs, vectors, target_os_index, target_qdrant_collection)
+        except Exception as e:
+            logger.error(f"Schreibfehler für Batch ({len(docs)} Chunks): {e}")
+            progress.add(failed=len(docs))
+            continue
+        checkpoint.mark([d["chunk_id"] for d in docs])
+        progress.add(processed=len(docs))
 
-                texts.append(doc["text"])
-                docs.append(doc)
 
-            except Exception as e:
-                logger.info(f"Fehler bei Chunk {hit.get('_id')}: {e}")
-                skipped += 1
-
-        if texts:
-            # Neue Embeddings erstellen
-            try:
-                vectors = embed_texts(texts)
-            except Exception as e:
-                logger.error(f"Embedding-Fehler für Batch: {e}")
-                scroll_response = os_client.scroll(scroll_id=scroll_id, scroll="5m")
-                scroll_id = scroll_response["_scroll_id"]
-                hits = scroll_response["hits"]["hits"]
-                continue
-
-            # In OpenSearch indexieren
-            for doc in docs:
-                os_meta = {}
-
-                if doc["process_name"]:
-                    os_meta["process_name"] = doc["process_name"]
-                if doc["tags"]:
-                    os_meta["tags"] = doc["tags"]
-                if doc["file_name"]:
-                    os_meta["file_name"] = doc["file_name"]
-                if doc["roles"]:
-                    os_meta["roles"] = doc["roles"]
-                if doc["page_number"] is not None:
-                    # page_number beibehalten (String bei semantic, int bei by_title)
-                    os_meta["page_number"] = doc["page_number"]
-                if doc["section_title"]:
-                    os_meta["section_title"] = doc["section_title"]
-                if doc["element_type"]:
-                    os_meta["element_type"] = doc["element_type"]
-                if doc["table_html"]:
-                    os_meta["table_html"] = doc["table_html"]
-
-                os_client.index(
-                    index=target_os_index,
-                    id=doc["chunk_id"],
-                    body={
-                        "document_id": doc["document_id"],
-                        "text": doc["text"],
-                        "meta": os_meta,
-                    },
-                )
+def reindex_all_chunks(
+    source_os_index: str,
+    target_os_index: str,
+    target_qdrant_collection: str,
+    batch_size: int = 200,
+    preserve_semantic_structure: bool = False,
+    workers: int = 4,
+    checkpoint_path: Optional[Path] = None,
+    resume: bool = True,
+) -> int:
+    """
+    Liest alle Chunks aus source_os_index und indexiert sie
+    mit neuem Embedding in target_os_index + target_qdrant_collection.
 
-            # In Qdrant indexieren
-            points = []
-            for doc, vec in zip(docs, vectors):
-                parts = doc["chunk_id"].rsplit(":", 1)
-                doc_id = parts[0]
-                idx = int(parts[1]) if len(parts) > 1 else 0
-
-                payload = {
-                    "document_id": doc["document_id"],
-                    "text": doc["text"],
-                    "chunk_id": doc["chunk_id"],
-                    "process_name": doc["process_name"],
-                    "tags": doc["tags"],
-                    "file_name": doc["file_name"],
-                }
+    Pipeline (je Stufe eigene Threads, gekoppelt über begrenzte Queues):
+    1. `workers` Reader lesen den Quell-Index per Sliced Scroll
+    2. Embedding (embed_texts_bulk, batched + parallel)
+    3. Bulk-Write nach OpenSearch + Qdrant, danach Checkpoint-Eintrag
 
-                if doc["roles"]:
-                    payload["roles"] = doc["roles"]
-                if doc["page_number"] is not None:
-                    payload["page_number"] = doc["page_number"]
-                if doc["section_title"]:
-                    payload["section_title"] = doc["section_title"]
-                if doc["element_type"]:
-                    payload["element_type"] = doc["element_type"]
-                if doc["table_html"]:
-                    payload["table_html"] = doc["table_html"]
-
-                points.append(
-                    PointStruct(
-                        id=_uuid_for(doc_id, idx),
-                        vector=vec,
-                        payload=payload,
-                    )
-                )
+    Args:
+        source_os_index: Quell-Index
+        target_os_index: Ziel-Index
+        target_qdrant_collection: Ziel-Collection
+        batch_size: Chunks pro Scroll-Seite / Write-Batch
+        preserve_semantic_structure: True um semantic-Struktur zu erhalten (page_number als String)
+        workers: Anzahl Scroll-Slices (parallele Reader)
+        checkpoint_path: Checkpoint-Datei (default: data/reindex_checkpoints/<source>__<target>.jsonl)
+        resume: Vorhandenen Checkpoint fortsetzen (False = neu beginnen)
 
-            qd.upsert(collection_name=target_qdrant_collection, points=points)
-            processed += len(docs)
+    Returns:
+        Anzahl in diesem Lauf indexierter Chunks
+    """
+    os_client = get_opensearch()
+    is_semantic_source = prepare_targets(
+        source_os_index, target_os_index, target_qdrant_collection, preserve_semantic_structure
+    )
 
-        # Fortschritt loggen
-        if processed % 100 == 0 or not hits:
-            logger.info(f"Verarbeitet: {processed}/{total} (übersprungen: {skipped})")
+    # 3. Checkpoint laden
+    checkpoint = ReindexCheckpoint(
+        checkpoint_path or default_checkpoint_path(source_os_index, target_os_index),
+        config={
+            "source_os_index": source_os_index,
+            "target_os_index": target_os_index,
+            "target_qdrant_collection": target_qdrant_collection,
+        },
+        resume=resume,
+    )
+    if checkpoint.completed:
+        logger.info(f"Checkpoint {checkpoint.path}: Lauf bereits abgeschlossen (--restart für Neubeginn)")
+        checkpoint.close()
+        return 0
 
-        # Nächste Batch
-        scroll_response = os_client.scroll(scroll_id=scroll_id, scroll="5m")
-        scroll_id = scroll_response["_scroll_id"]
-        hits = scroll_response["hits"]["hits"]
+    total = os_client.count(index=source_os_index)["count"]
+    logger.info(
+        f"Gefunden: {total} Chunks, davon {len(checkpoint.done)} laut Checkpoint bereits indexiert"
+    )
+    progress = ReindexProgress(total, already_done=len(checkpoint.done))
+
+    # 4. Pipeline starten
+    slices = max(1, workers)
+    read_q: "queue.Queue" = queue.Queue(maxsize=2 * slices)
+    write_q: "queue.Queue" = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    reader_errors: List[BaseException] = []
+
+    def _reader(slice_id: int) -> None:
+        try:
+            _read_slice(source_os_index, slice_id, slices, batch_size, read_q, stop)
+        except BaseException as e:
+            reader_errors.append(e)
+            stop.set()
+
+    readers = [
+        threading.Thread(target=_reader, args=(i,), name=f"reindex-read-{i}", daemon=True)
+        for i in range(slices)
+    ]
+    embedder = threading.Thread(
+        target=_embed_stage,
+        args=(read_q, write_q, is_semantic_source, checkpoint, progress),
+        name="reindex-embed",
+        daemon=True,
+    )
+    writer = threading.Thread(
+        target=_write_stage,
+        args=(write_q, target_os_index, target_qdrant_collection, checkpoint, progress),
+        name="reindex-write",
+        daemon=True,
+    )
 
-    # Scroll-Kontext freigeben
     try:
-        os_client.clear_scroll(scroll_id=scroll_id)
-    except Exception:
-        pass
+        for t in (*readers, embedder, writer):
+            t.start()
+        for t in readers:
+            t.join()
+        read_q.put(None)
+        embedder.join()
+        writer.join()
+    except KeyboardInterrupt:
+        stop.set()
+        logger.warning(f"Abgebrochen – Fortsetzen mit demselben Befehl ({checkpoint.path})")
+        raise
+    finally:
+        if not reader_errors and not stop.is_set() and progress.failed == 0:
+            checkpoint.finish()
+        checkpoint.close()
+
+    if reader_errors:
+        raise reader_errors[0]
+
+    os_client.indices.refresh(index=target_os_index)
+    logger.info(progress.summary())
+    logger.info(
+        f"Fertig! {progress.processed} Chunks indexiert, {progress.skipped} übersprungen, "
+        f"{progress.failed} fehlgeschlagen (erneuter Lauf setzt fort)."
+    )
+    return progress.processed
+
+
+# ============================================================
+# Vector-Copy: vorhandene Embeddings wiederverwenden
+# ============================================================
+
+# Mindest-Cosinus zwischen gespeichertem und neu berechnetem Vektor,
+# damit das konfigurierte Embedding-Modell als "gleich" gilt
+SAME_MODEL_MIN_COSINE = 0.99
+
+
+def dense_vector(vector: Any) -> List[float]:
+    """Unbenannter Dense-Vektor eines Qdrant-Punkts (bzw. der einzige benannte)."""
+    if isinstance(vector, dict):
+        # Sparse- und gekürzte Vektoren werden beim Schreiben neu berechnet
+        dense = {k: v for k, v in vector.items() if isinstance(v, list)}
+        if FULL_VECTOR_NAME in dense:
+            return dense[FULL_VECTOR_NAME]
+        if DENSE_VECTOR_NAME in dense:
+            return dense[DENSE_VECTOR_NAME]
+        if len(dense) != 1:
+            raise ValueError(f"Mehrere benannte Vektoren ({list(dense)}) – Vector-Copy nicht möglich")
+        return next(iter(dense.values()))
+    return vector
+
+
+def collection_dim(collection: str) -> Optional[int]:
+    """Vektordimension einer Collection (None, falls sie nicht existiert)."""
+    qd = get_qdrant()
+    if not qdrant_exists(qd, collection):
+        return None
+    collection = qdrant_alias_target(qd, collection) or collection
+    return full_vector_params(qd, collection).size
+
+
+def needs_reembedding(source_qdrant_collection: str, target_qdrant_collection: str) -> Optional[str]:
+    """
+    Prüft, ob die Vektoren der Quelle für das Ziel wiederverwendbar sind.
+
+    Grund für Re-Embedding, wenn:
+    - die Ziel-Collection bereits mit anderer Dimension existiert, oder
+    - das konfigurierte Embedding-Modell für Stichproben der Quelle andere
+      Vektoren liefert (andere Dimension oder Cosinus < SAME_MODEL_MIN_COSINE).
+
+    Returns:
+        Grund als Text oder None (Vektoren können kopiert werden)
+    """
+    src_dim = collection_dim(source_qdrant_collection)
+    tgt_dim = collection_dim(target_qdrant_collection)
+    if tgt_dim is not None and tgt_dim != src_dim:
+        return f"Ziel-Collection hat dim={tgt_dim}, Quelle dim={src_dim}"
+
+    points, _ = get_qdrant().scroll(
+        collection_name=source_qdrant_collection, limit=3, with_payload=["text"], with_vectors=True
+    )
+    samples = [p for p in points if (p.payload or {}).get("text")]
+    if not samples:
+        return None
+
+    fresh = np.asarray(embed_texts([p.payload["text"] for p in samples]), dtype=np.float32)
+    stored = np.asarray([dense_vector(p.vector) for p in samples], dtype=np.float32)
+    if fresh.shape != stored.shape:
+        return f"Embedding-Modell liefert dim={fresh.shape[1]}, Quelle dim={stored.shape[1]}"
+
+    fresh /= np.linalg.norm(fresh, axis=1, keepdims=True)
+    stored /= np.linalg.norm(stored, axis=1, keepdims=True)
+    min_cos = float(np.min(np.sum(fresh * stored, axis=1)))
+    if min_cos < SAME_MODEL_MIN_COSINE:
+        return f"Embedding-Modell weicht von der Quelle ab (min. Cosinus {min_cos:.3f})"
+    return None
+
+
+def _copy_reader(
+    source_qdrant_collection: str,
+    source_os_index: str,
+    batch_size: int,
+    is_semantic_source: bool,
+    out_q: "queue.Queue",
+    checkpoint: ReindexCheckpoint,
+    progress: ReindexProgress,
+    stop: threading.Event,
+) -> None:
+    """Scrollt Qdrant mit Vektoren und joint die Punkte per chunk_id mit den OpenSearch-Dokumenten."""
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    offset = None
+    while not stop.is_set():
+        points, offset = qd.scroll(
+            collection_name=source_qdrant_collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["chunk_id"],
+            with_vectors=True,
+        )
+        with_id = [p for p in points if (p.payload or {}).get("chunk_id")]
+        vec_by_id = {
+            p.payload["chunk_id"]: dense_vector(p.vector)
+            for p in with_id
+            if p.payload["chunk_id"] not in checkpoint.done
+        }
+        orphans = len(points) - len(with_id)
+        if vec_by_id:
+            resp = os_client.mget(index=source_os_index, body={"ids": list(vec_by_id)})
+            hits = [d for d in resp["docs"] if d.get("found")]
+            orphans += len(vec_by_id) - len(hits)
+            docs = _prepare_batch(hits, is_semantic_source, checkpoint, progress)
+            if docs:
+                out_q.put((docs, [vec_by_id[d["chunk_id"]] for d in docs]))
+        if orphans:
+            # Punkte ohne chunk_id oder ohne OpenSearch-Dokument
+            progress.add(skipped=orphans)
+        if offset is None:
+            return
+
+
+def copy_vectors(
+    source_os_index: str,
+    source_qdrant_collection: str,
+    target_os_index: str,
+    target_qdrant_collection: str,
+    batch_size: int = 200,
+    preserve_semantic_structure: bool = False,
+    checkpoint_path: Optional[Path] = None,
+    resume: bool = True,
+) -> int:
+    """
+    Kopiert Chunks inkl. vorhandener Vektoren in Ziel-Index + Ziel-Collection.
+
+    Die Quell-Collection wird mit Vektoren gescrollt, jeder Punkt per
+    chunk_id mit seinem OpenSearch-Dokument verknüpft (Text/Meta kommen
+    aus OpenSearch) und mit dem bestehenden Vektor geschrieben. Es wird
+    nichts embeddet. Checkpoint/Fortschritt wie bei reindex_all_chunks.
+
+    Returns:
+        Anzahl in diesem Lauf kopierter Chunks
+    """
+    os_client = get_opensearch()
+    is_semantic_source = prepare_targets(
+        source_os_index,
+        target_os_index,
+        target_qdrant_collection,
+        preserve_semantic_structure,
+        dim=collection_dim(source_qdrant_collection),
+    )
+
+    checkpoint = ReindexCheckpoint(
+        checkpoint_path or default_checkpoint_path(source_os_index, target_os_index),
+        config={
+            "mode": "copy-vectors",
+            "source_os_index": source_os_index,
+            "source_qdrant_collection": source_qdrant_collection,
+            "target_os_index": target_os_index,
+            "target_qdrant_collection": target_qdrant_collection,
+        },
+        resume=resume,
+    )
+    if checkpoint.completed:
+        logger.info(f"Checkpoint {checkpoint.path}: Lauf bereits abgeschlossen (--restart für Neubeginn)")
+        checkpoint.close()
+        return 0
+
+    total = get_qdrant().count(collection_name=source_qdrant_collection, exact=True).count
+    logger.info(
+        f"Vector-Copy: {total} Punkte in {source_qdrant_collection}, "
+        f"davon {len(checkpoint.done)} laut Checkpoint bereits kopiert"
+    )
+    progress = ReindexProgress(total, already_done=len(checkpoint.done))
+
+    write_q: "queue.Queue" = queue.Queue(maxsize=4)
+    stop = threading.Event()
+    writer = threading.Thread(
+        target=_write_stage,
+        args=(write_q, target_os_index, target_qdrant_collection, checkpoint, progress),
+        name="copy-write",
+        daemon=True,
+    )
+    writer.start()
+    try:
+        _copy_reader(
+            source_qdrant_collection,
+            source_os_index,
+            batch_size,
+            is_semantic_source,
+            write_q,
+            checkpoint,
+            progress,
+            stop,
+        )
+        write_q.put(None)
+        writer.join()
+    except BaseException:
+        stop.set()
+        logger.warning(f"Abgebrochen – Fortsetzen mit demselben Befehl ({checkpoint.path})")
+        checkpoint.close()
+        raise
+
+    if progress.failed == 0:
+        checkpoint.finish()
+    checkpoint.close()
+
+    os_client.indices.refresh(index=target_os_index)
+    logger.info(progress.summary())
+    logger.info(
+        f"Fertig! {progress.processed} Chunks kopiert (ohne Embedding), "
+        f"{progress.skipped} übersprungen, {progress.failed} fehlgeschlagen."
+    )
+    return progress.processed
+
 
-    logger.info(f"Fertig! {processed} Chunks indexiert, {skipped} übersprungen.")
-    return processed
+# ============================================================
+# Catch-up: Änderungen am Live-Index während des Builds nachziehen
+# ============================================================
+
+# Maximale Catch-up-Runden vor dem Swap (jede Runde verkleinert das Delta)
+CATCH_UP_MAX_ROUNDS = 3
+ID_SCAN_PAGE_SIZE = 5000
+
+
+def _scan_versions(os_index: str, field: str) -> Dict[str, int]:
+    """
+    Alle Dokument-IDs eines Index mit ihrem Stand (Scroll ohne _source).
+
+    Args:
+        field: "_seq_no" (Quelle) oder "_version" (Ziel, = _seq_no der Quelle beim Kopieren)
+    """
+    os_client = get_opensearch()
+    os_client.indices.refresh(index=os_index)
+    body: Dict[str, Any] = {
+        "query": {"match_all": {}},
+        "_source": False,
+        "size": ID_SCAN_PAGE_SIZE,
+        "sort": ["_doc"],
+    }
+    body["seq_no_primary_term" if field == "_seq_no" else "version"] = True
+    resp = os_client.search(index=os_index, body=body, scroll=SCROLL_TTL)
+    scroll_id = resp.get("_scroll_id")
+    versions: Dict[str, int] = {}
+    try:
+        while resp["hits"]["hits"]:
+            versions.update((h["_id"], h.get(field, -1)) for h in resp["hits"]["hits"])
+            resp = os_client.scroll(scroll_id=scroll_id, scroll=SCROLL_TTL)
+            scroll_id = resp.get("_scroll_id", scroll_id)
+    finally:
+        try:
+            os_client.clear_scroll(scroll_id=scroll_id)
+        except Exception:
+            pass
+    return versions
+
+
+def _stored_vectors(qdrant_collection: str, chunk_ids: List[str]) -> Dict[str, List[float]]:
+    """Gespeicherte Dense-Vektoren der Quelle je chunk_id (für Vector-Copy)."""
+    points = get_qdrant().retrieve(
+        collection_name=qdrant_collection,
+        ids=[point_id_for(cid) for cid in chunk_ids],
+        with_payload=["chunk_id"],
+        with_vectors=True,
+    )
+    return {
+        p.payload["chunk_id"]: dense_vector(p.vector)
+        for p in points
+        if (p.payload or {}).get("chunk_id") and p.vector is not None
+    }
+
+
+def catch_up(
+    source_os_index: str,
+    target_os_index: str,
+    target_qdrant_collection: str,
+    source_qdrant_collection: Optional[str] = None,
+    batch_size: int = 200,
+    preserve_semantic_structure: bool = False,
+    baseline: Optional[Dict[str, int]] = None,
+) -> int:
+    """
+    Gleicht eine neu gebaute Version mit dem Live-Index ab, der während des
+    Builds weiter beschrieben wurde (Uploads, Löschungen und Updates wie
+    nachgerückte Duplikate laufen über den Alias).
+
+    Verglichen wird die _seq_no der Quelle mit der _version des Ziels
+    (_write_batch schreibt die _seq_no als externe Version):
+    - Chunk fehlt im Ziel oder Quelle ist neuer → schreiben (Vektor aus
+      source_qdrant_collection, falls angegeben und vorhanden, sonst Embedding)
+    - Chunk nur im Ziel → löschen
+
+    Nach dem Swap ist das Ziel live. Mit `baseline` (Ziel-Stände unmittelbar
+    vor dem Swap) werden nur Chunks angefasst, die seit dem Swap im Ziel
+    unverändert sind; neue Uploads und Löschungen im Ziel bleiben bestehen.
+
+    Returns:
+        Anzahl geschriebener + gelöschter Chunks
+    """
+    from qdrant_client.http.models import PointIdsList
+
+    os_client = get_opensearch()
+    is_semantic_source = is_semantic_index(source_os_index) or preserve_semantic_structure
+    source = _scan_versions(source_os_index, "_seq_no")
+    target = _scan_versions(target_os_index, "_version")
+
+    if baseline is None:
+        missing = sorted(cid for cid, seq in source.items() if target.get(cid, -1) < seq)
+        stale = sorted(set(target) - set(source))
+    else:
+        # Nur Chunks, die seit dem Swap im Ziel nicht neu geschrieben/gelöscht wurden
+        untouched = {cid for cid, v in baseline.items() if target.get(cid) == v}
+        missing = sorted(
+            cid
+            for cid, seq in source.items()
+            if (cid in untouched and baseline[cid] < seq) or (cid not in baseline and cid not in target)
+        )
+        stale = sorted(untouched - set(source))
+    logger.info(
+        f"Catch-up {source_os_index} → {target_os_index}: {len(missing)} neu/geändert, "
+        f"{len(stale)} gelöscht"
+    )
+
+    written = 0
+    for k in range(0, len(missing), batch_size):
+        batch = missing[k:k + batch_size]
+        resp = os_client.mget(index=source_os_index, body={"ids": batch})
+        docs = []
+        for hit in resp["docs"]:
+            if not hit.get("found"):
+                continue  # inzwischen wieder gelöscht
+            doc = extract_from_os_hit(hit, is_semantic_source=is_semantic_source)
+            if doc["text"].strip():
+                docs.append(doc)
+        if not docs:
+            continue
+        stored: Dict[str, List[float]] = {}
+        if source_qdrant_collection:
+            stored = _stored_vectors(source_qdrant_collection, [d["chunk_id"] for d in docs])
+        to_embed = [d for d in docs if d["chunk_id"] not in stored]
+        if to_embed:
+            embedded = embed_texts_bulk([d["text"] for d in to_embed], label="catch-up")
+            stored.update({d["chunk_id"]: v for d, v in zip(to_embed, embedded)})
+        _write_batch(docs, [stored[d["chunk_id"]] for d in docs], target_os_index, target_qdrant_collection)
+        written += len(docs)
+
+    if stale:
+        from opensearchpy.helpers import bulk
+
+        bulk(
+            os_client,
+            ({"_op_type": "delete", "_index": target_os_index, "_id": cid} for cid in stale),
+            raise_on_error=False,
+        )
+        get_qdrant().delete(
+            collection_name=target_qdrant_collection,
+            points_selector=PointIdsList(points=[point_id_for(cid) for cid in stale]),
+            wait=True,
+        )
+
+    os_client.indices.refresh(index=target_os_index)
+    return written + len(stale)
 
 
 def main():
@@ -379,7 +1090,7 @@ def main():
         "--model", required=True, help="Embedding model (e.g., qwen3-embedding, bge-m3)"
     )
     parser.add_argument(
-        "--suffix", required=True, help="Suffix for new index/collection (e.g., qwen3)"
+        "--suffix", default=None, help="Suffix for new index/collection (e.g., qwen3)"
     )
     parser.add_argument(
         "--source-index",
@@ -387,7 +1098,20 @@ def main():
         help="Source OpenSearch index (default: chunks)",
     )
     parser.add_argument(
-        "--batch-size", type=int, default=50, help="Batch size (default: 50)"
+        "--batch-size", type=int, default=200, help="Batch size (default: 200)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Parallel scroll slices (default: 4)"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Checkpoint file (default: data/reindex_checkpoints/<source>__<target>.jsonl)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore an existing checkpoint and start from scratch",
     )
     parser.add_argument(
         "--backend",
@@ -400,6 +1124,38 @@ def main():
         action="store_true",
         help="Force semantic structure in target (page_number as string)",
     )
+    parser.add_argument(
+        "--copy-vectors",
+        action="store_true",
+        help="Reuse vectors from the source Qdrant collection instead of re-embedding "
+        "(falls back to re-embedding if the target model/dimension differs)",
+    )
+    parser.add_argument(
+        "--source-collection",
+        default=None,
+        help="Source Qdrant collection for --copy-vectors (default: same as --source-index)",
+    )
+    parser.add_argument(
+        "--skip-model-check",
+        action="store_true",
+        help="With --copy-vectors: copy without probing the embedding model (e.g. no embedder reachable)",
+    )
+    parser.add_argument(
+        "--alias",
+        default=None,
+        help="Build a new version <alias>__v<N> off to the side and swap the alias "
+        "(OpenSearch + Qdrant) after warm-up instead of using --suffix",
+    )
+    parser.add_argument(
+        "--no-swap",
+        action="store_true",
+        help="With --alias: build and warm up the new version but leave the alias unchanged",
+    )
+    parser.add_argument(
+        "--drop-legacy",
+        action="store_true",
+        help="With --alias: replace a concrete index/collection named like the alias",
+    )
     parser.add_argument(
         "--dry-run", action="store_true", help="Only show stats, don't reindex"
     )
@@ -412,9 +1168,35 @@ def main():
         os.environ["OLLAMA_EMBED_MODEL"] = args.model
     else:
         os.environ["EMBEDDING_MODEL"] = args.model
-
-    target_os = f"{args.source_index}_{args.suffix}"
-    target_qd = f"{args.source_index}_{args.suffix}"
+    # settings ist bereits geladen → auch direkt setzen (embed_texts liest settings)
+    settings.EMBEDDING_BACKEND = args.backend
+    if args.backend == "ollama":
+        settings.OLLAMA_EMBED_MODEL = args.model
+    else:
+        settings.EMBEDDING_MODEL = args.model
+        # pipeline._model entsteht beim Import für das damalige Backend (bei Ollama: None)
+        from sentence_transformers import SentenceTransformer
+
+        pipeline._model = SentenceTransformer(args.model)
+
+    if args.alias:
+        # Prozess-Shards (<alias>__p_*) sind nicht versioniert und würden beim
+        # Swap auf das alte Modell zeigen
+        if routes_for(args.alias, refresh=True):
+            parser.error(
+                f"{args.alias} hat Prozess-Shards – --alias versioniert nur den Basis-Index; "
+                f"Shards einzeln mit --suffix re-indexieren"
+            )
+        state = alias_state(args.alias)
+        pending = [v for v in state.os_versions if v > (state.current_version or 0)]
+        # Unterbrochenen Build derselben Version fortsetzen, sonst neue Version
+        version = pending[-1] if pending and not args.restart else next_version(args.alias)
+        target_os = target_qd = versioned_name(args.alias, version)
+    elif args.suffix:
+        target_os = f"{args.source_index}_{args.suffix}"
+        target_qd = f"{args.source_index}_{args.suffix}"
+    else:
+        parser.error("--suffix oder --alias ist erforderlich")
 
     # Semantic-Status ermitteln
     is_semantic_source = is_semantic_index(args.source_index)
@@ -436,13 +1218,91 @@ def main():
         logger.info(f"DRY RUN: Würde {count} Chunks re-indexieren")
         return
 
+    copied_from = build(args, target_os, target_qd)
+
+    if args.alias:
+        # Uploads/Löschungen/Updates während des Builds landen im Live-Index hinter dem
+        # Alias. Nachziehen nur, wenn dieser die Build-Quelle ist – sonst wären
+        # Unterschiede zwischen Quelle und Live-Index gewollt.
+        live = args.source_index == args.alias
+        if not live:
+            logger.warning(
+                f"Quelle {args.source_index} ist nicht der Live-Index {args.alias} – "
+                f"Änderungen während des Builds werden nicht nachgezogen"
+            )
+        catch_up_kwargs = dict(
+            target_os_index=target_os,
+            target_qdrant_collection=target_qd,
+            batch_size=args.batch_size,
+            preserve_semantic_structure=args.preserve_semantic,
+        )
+        if live:
+            for _ in range(CATCH_UP_MAX_ROUNDS):
+                if catch_up(args.source_index, source_qdrant_collection=copied_from, **catch_up_kwargs) == 0:
+                    break
+
+        warm_up(target_os, target_qd)
+        if args.no_swap:
+            logger.info(f"Version v{version} bereit, Alias {args.alias} unverändert (--no-swap)")
+        else:
+            before = alias_state(args.alias)
+            baseline = _scan_versions(target_os, "_version") if live else None
+            swap_alias(args.alias, version, drop_legacy=args.drop_legacy)
+            # Schreibzugriffe zwischen letztem Catch-up und Swap gingen noch an die
+            # alte Version (inkl. Löschungen) → gegen den Stand vor dem Swap nachziehen
+            if live and before.os_target and before.qdrant_target:
+                catch_up(
+                    before.os_target,
+                    source_qdrant_collection=before.qdrant_target if copied_from else None,
+                    baseline=baseline,
+                    **catch_up_kwargs,
+                )
+            elif live:
+                logger.warning(
+                    f"{args.alias} war ein konkreter Index – Änderungen zwischen letztem "
+                    f"Catch-up und Swap sind nicht in v{version} enthalten"
+                )
+            logger.info(
+                f"Alias {args.alias} → v{version}. Rollback: "
+                f"python -m app.eval.scripts.index_alias rollback --alias {args.alias}"
+            )
+
+
+def build(args: argparse.Namespace, target_os: str, target_qd: str) -> Optional[str]:
+    """
+    Füllt Ziel-Index/Collection per Vector-Copy oder Re-Embedding.
+
+    Returns:
+        Quell-Collection, deren Vektoren kopiert wurden (None bei Re-Embedding)
+    """
+    if args.copy_vectors:
+        source_qd = args.source_collection or args.source_index
+        reason = None if args.skip_model_check else needs_reembedding(source_qd, target_qd)
+        if reason is None:
+            copy_vectors(
+                source_os_index=args.source_index,
+                source_qdrant_collection=source_qd,
+                target_os_index=target_os,
+                target_qdrant_collection=target_qd,
+                batch_size=args.batch_size,
+                preserve_semantic_structure=args.preserve_semantic,
+                checkpoint_path=Path(args.checkpoint) if args.checkpoint else None,
+                resume=not args.restart,
+            )
+            return source_qd
+        logger.info(f"Vector-Copy nicht möglich: {reason} → Re-Embedding")
+
     reindex_all_chunks(
         source_os_index=args.source_index,
         target_os_index=target_os,
         target_qdrant_collection=target_qd,
         batch_size=args.batch_size,
         preserve_semantic_structure=args.preserve_semantic,
+        workers=args.workers,
+        checkpoint_path=Path(args.checkpoint) if args.checkpoint else None,
+        resume=not args.restart,
     )
+    return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+"""
+Verschiebt Altbestand aus dem Basis-Index in die Prozess-Shards.
+
+Bei PROCESS_SHARDING=True landen neue Chunks direkt im Shard ihres
+Prozesses; bereits indexierte Chunks liegen weiter im Basis-Index, weshalb
+Suchen mit process_name dort mitsuchen müssen. Dieses Script kopiert sie
+(gleiche IDs, Vektoren und Payloads – kein Embedding) in den Shard, löscht
+sie im Basis-Index und markiert die Route danach als `exclusive`.
+
+Batches werden erst nach erfolgreichem Schreiben im Basis-Index gelöscht;
+ein abgebrochener Lauf wird mit demselben Befehl fortgesetzt.
+
+Verwendung:
+    PROCESS_SHARDING=true python -m app.eval.scripts.reshard --os-index chunks_semantic_qwen3 --qdrant-collection chunks_semantic_qwen3
+    PROCESS_SHARDING=true python -m app.eval.scripts.reshard --os-index chunks_semantic_qwen3 --qdrant-collection chunks_semantic_qwen3 --process "Urlaubsantrag"
+"""
+
+import argparse
+import sys
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from opensearchpy.helpers import bulk
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointIdsList,
+    PointStruct,
+)
+
+from app.core.config import settings
+from app.core.clients import get_logger, get_opensearch, get_qdrant, setup_logging
+from app.services.qdrant_schema import point_vector
+from app.services.sharding import process_query, routes_for, save_route, write_target
+
+logger = get_logger(__name__)
+
+
+def base_processes(os_index: str) -> List[str]:
+    """Alle process_names, die im Basis-Index noch vorkommen."""
+    os_client = get_opensearch()
+    names = set()
+    for field in ("meta.process_name", "meta.process_name.keyword"):
+        try:
+            resp = os_client.search(
+                index=os_index,
+                body={"size": 0, "aggs": {"p": {"terms": {"field": field, "size": 10000}}}},
+            )
+        except Exception:
+            # text-Feld ohne fielddata → nicht aggregierbar
+            continue
+        names.update(b["key"] for b in resp["aggregations"]["p"]["buckets"])
+    return sorted(names)
+
+
+def _move_os_docs(os_client, base_os: str, shard_os: str, docs: List[Dict]) -> None:
+    """Schreibt Dokumente in den Shard und löscht sie danach im Basis-Index."""
+    bulk(
+        os_client,
+        ({"_op_type": "index", "_index": shard_os, "_id": d["_id"], "_source": d["_source"]} for d in docs),
+        refresh="wait_for",
+    )
+    bulk(
+        os_client,
+        ({"_op_type": "delete", "_index": base_os, "_id": d["_id"]} for d in docs),
+        refresh="wait_for",
+        raise_on_error=False,
+    )
+
+
+def reshard_process(
+    base_os: str, base_qd: str, process_name: str, batch_size: int = 256
+) -> Dict[str, int]:
+    """Verschiebt alle Chunks eines Prozesses aus dem Basis-Index in seinen Shard."""
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    shard_os, shard_qd = write_target(base_os, base_qd, process_name)
+    stats = {"points": 0, "os_docs": 0}
+
+    # 1) Qdrant-Punkte (mit Vektor) + zugehörige OpenSearch-Dokumente
+    qfilter = Filter(must=[FieldCondition(key="process_name", match=MatchValue(value=process_name))])
+    while True:
+        # Kein Offset: verschobene Punkte sind gelöscht, jeder Scroll beginnt vorn
+        points, _ = qd.scroll(
+            collection_name=base_qd,
+            scroll_filter=qfilter,
+            limit=batch_size,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if not points:
+            break
+
+        chunk_ids = [p.payload["chunk_id"] for p in points if (p.payload or {}).get("chunk_id")]
+        if chunk_ids:
+            resp = os_client.mget(index=base_os, body={"ids": chunk_ids})
+            docs = [d for d in resp["docs"] if d.get("found")]
+            if docs:
+                _move_os_docs(os_client, base_os, shard_os, docs)
+                stats["os_docs"] += len(docs)
+
+        qd.upsert(
+            collection_name=shard_qd,
+            points=[
+                PointStruct(
+                    id=p.id,
+                    # Dense-only-Punkte bekommen im Shard ggf. den Sparse-Vektor
+                    vector=p.vector if isinstance(p.vector, dict) else point_vector(p.vector, p.payload.get("text", "")),
+                    payload=p.payload,
+                )
+                for p in points
+            ],
+            wait=True,
+        )
+        qd.delete(
+            collection_name=base_qd,
+            points_selector=PointIdsList(points=[p.id for p in points]),
+            wait=True,
+        )
+        stats["points"] += len(points)
+        logger.info(f"{process_name}: {stats['points']} Punkte verschoben")
+
+    # 2) Restliche OpenSearch-Dokumente ohne Qdrant-Punkt (z.B. nur BM25)
+    while True:
+        resp = os_client.search(
+            index=base_os,
+            body={"size": batch_size, "query": process_query(process_name)},
+        )
+        docs = resp["hits"]["hits"]
+        if not docs:
+            break
+        _move_os_docs(os_client, base_os, shard_os, docs)
+        stats["os_docs"] += len(docs)
+
+    # 3) Basis-Index leer für den Prozess → Route exklusiv
+    remaining = os_client.count(index=base_os, body={"query": process_query(process_name)})["count"]
+    remaining += qd.count(collection_name=base_qd, count_filter=qfilter, exact=True).count
+    if remaining == 0:
+        route = routes_for(base_os, refresh=True)[process_name]
+        if not route.exclusive:
+            save_route(replace(route, exclusive=True))
+    else:
+        logger.warning(f"{process_name}: {remaining} Einträge noch im Basis-Index, Route bleibt nicht-exklusiv")
+    stats["remaining"] = remaining
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Altbestand in Prozess-Shards verschieben")
+    parser.add_argument("--os-index", default=settings.OS_INDEX, help="Basis-Index (OpenSearch)")
+    parser.add_argument("--qdrant-collection", default=settings.QDRANT_COLLECTION, help="Basis-Collection (Qdrant)")
+    parser.add_argument("--process", action="append", default=None, help="Nur diese Prozesse (mehrfach möglich)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    if not settings.PROCESS_SHARDING:
+        parser.error("PROCESS_SHARDING ist deaktiviert")
+
+    processes = args.process or base_processes(args.os_index)
+    logger.info(f"Prozesse im Basis-Index: {len(processes)}")
+    for name in processes:
+        stats = reshard_process(args.os_index, args.qdrant_collection, name, args.batch_size)
+        print(f"{name}: {stats}")
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    main()
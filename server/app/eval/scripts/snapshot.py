@@ -0,0 +1,402 @@
+"""
+Snapshot-Export/-Import eines Index (OpenSearch + Qdrant) ohne Modellaufrufe.
+
+Ein Snapshot ist ein Verzeichnis mit:
+  manifest.json     Quelle, Anzahl, Dimension, Distanz, OpenSearch-Mapping, SHA-256 der Dateien
+  vectors.npy       float32-Matrix (rows x dim), per np.load(mmap_mode="r") lesbar
+  chunks.parquet    Chunk-Tabelle (oder chunks.jsonl), Zeile i gehört zu vectors[i]:
+                    point_id, chunk_id, document_id, source (OpenSearch _source als JSON),
+                    payload (Qdrant-Payload als JSON)
+
+Damit lassen sich neue Umgebungen / die Eval-Maschine ohne erneutes OCR,
+Chunking und Embedding befüllen.
+
+Usage:
+    python -m app.eval.scripts.snapshot export --index chunks_semantic_qwen3 --out snapshots/semantic
+    python -m app.eval.scripts.snapshot export --index chunks_qwen3 --out snapshots/qwen3 --format jsonl
+    python -m app.eval.scripts.snapshot import --src snapshots/semantic --index chunks_semantic_qwen3
+    python -m app.eval.scripts.snapshot import --src snapshots/semantic --alias chunks_semantic_qwen3
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from app.core.config import settings
+from app.core.clients import get_logger, get_opensearch, get_qdrant, setup_logging
+from app.services.index_aliases import (
+    next_version,
+    qdrant_alias_target,
+    qdrant_exists,
+    swap_alias,
+    versioned_name,
+    warm_up,
+)
+from app.services.qdrant_schema import (
+    collection_create_kwargs,
+    ensure_payload_indexes,
+    full_vector_params,
+    point_vector,
+    truncate_dim,
+)
+from app.eval.scripts.reindex import ReindexProgress, dense_vector
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+CHUNK_COLUMNS = ["point_id", "chunk_id", "document_id", "source", "payload"]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ============================================================
+# Chunk-Tabelle (Parquet oder JSONL)
+# ============================================================
+
+
+class ChunkTableWriter:
+    """Schreibt die Chunk-Tabelle batchweise als Parquet oder JSONL."""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self._writer = None
+        if fmt == "jsonl":
+            self._fh = path.open("w", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self.fmt == "jsonl":
+            for row in rows:
+                self._fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(
+            rows, schema=pa.schema([(c, pa.string()) for c in CHUNK_COLUMNS])
+        )
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self.fmt == "jsonl":
+            self._fh.close()
+            return
+        if self._writer is None:
+            # Leere Tabelle, damit Manifest/Prüfsumme konsistent bleiben
+            self.write([])
+        self._writer.close()
+
+
+def iter_chunk_rows(path: Path, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Liest die Chunk-Tabelle in Batches (Reihenfolge = Zeilen von vectors.npy)."""
+    if path.suffix == ".jsonl":
+        batch: List[Dict[str, Any]] = []
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+        return
+
+    import pyarrow.parquet as pq
+
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=CHUNK_COLUMNS):
+        yield record_batch.to_pylist()
+
+
+# ============================================================
+# Export
+# ============================================================
+
+
+def export_snapshot(
+    os_index: str,
+    qdrant_collection: str,
+    out_dir: Path,
+    fmt: str = "parquet",
+    batch_size: int = 500,
+) -> Dict[str, Any]:
+    """
+    Exportiert alle Punkte der Collection inkl. Vektor, Qdrant-Payload und
+    zugehörigem OpenSearch-Dokument (Join per chunk_id).
+
+    Returns:
+        Manifest
+    """
+    os_client = get_opensearch()
+    qd = get_qdrant()
+
+    physical_col = qdrant_alias_target(qd, qdrant_collection) or qdrant_collection
+    params = full_vector_params(qd, physical_col)
+    dim, distance = params.size, str(params.distance.value if hasattr(params.distance, "value") else params.distance)
+
+    mappings = os_client.indices.get_mapping(index=os_index)
+    mapping = next(iter(mappings.values()))["mappings"]
+
+    total = qd.count(collection_name=qdrant_collection, exact=True).count
+    out_dir.mkdir(parents=True, exist_ok=True)
+    table_path = out_dir / f"chunks.{fmt}"
+    vectors = np.lib.format.open_memmap(out_dir / VECTORS, mode="w+", dtype=np.float32, shape=(total, dim))
+    writer = ChunkTableWriter(table_path, fmt)
+    progress = ReindexProgress(total)
+
+    logger.info(f"Export {os_index} / {qdrant_collection}: {total} Punkte, dim={dim} → {out_dir}")
+    rows_written = 0
+    offset = None
+    try:
+        while True:
+            points, offset = qd.scroll(
+                collection_name=qdrant_collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            by_chunk = {p.payload.get("chunk_id"): p for p in points if (p.payload or {}).get("chunk_id")}
+            sources: Dict[str, Dict[str, Any]] = {}
+            if by_chunk:
+                resp = os_client.mget(index=os_index, body={"ids": list(by_chunk)})
+                sources = {d["_id"]: d["_source"] for d in resp["docs"] if d.get("found")}
+
+            rows = []
+            for chunk_id, p in by_chunk.items():
+                if chunk_id not in sources or rows_written + len(rows) >= total:
+                    continue
+                vectors[rows_written + len(rows)] = dense_vector(p.vector)
+                rows.append(
+                    {
+                        "point_id": str(p.id),
+                        "chunk_id": chunk_id,
+                        "document_id": sources[chunk_id].get("document_id", ""),
+                        "source": json.dumps(sources[chunk_id], ensure_ascii=False),
+                        "payload": json.dumps(p.payload, ensure_ascii=False),
+                    }
+                )
+            if rows:
+                writer.write(rows)
+                rows_written += len(rows)
+            progress.add(processed=len(rows), skipped=len(points) - len(rows))
+            if offset is None:
+                break
+    finally:
+        writer.close()
+        vectors.flush()
+        del vectors
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "source": {"os_index": os_index, "qdrant_collection": qdrant_collection},
+        # vectors.npy kann mehr Zeilen haben (Punkte ohne OpenSearch-Dokument) → nur rows gültig
+        "rows": rows_written,
+        "dim": dim,
+        "dtype": "float32",
+        "distance": distance,
+        "os_mapping": mapping,
+        "files": {
+            "vectors": VECTORS,
+            "chunks": table_path.name,
+        },
+        "sha256": {
+            VECTORS: _sha256(out_dir / VECTORS),
+            table_path.name: _sha256(table_path),
+        },
+    }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.info(progress.summary())
+    logger.info(f"Export fertig: {rows_written} Chunks ({total - rows_written} ohne OpenSearch-Dokument übersprungen)")
+    return manifest
+
+
+# ============================================================
+# Import
+# ============================================================
+
+
+def load_manifest(src_dir: Path, verify: bool = True) -> Dict[str, Any]:
+    manifest = json.loads((src_dir / MANIFEST).read_text(encoding="utf-8"))
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Nicht unterstütztes Snapshot-Format: {manifest.get('format_version')}")
+    if verify:
+        for name, expected in manifest["sha256"].items():
+            if _sha256(src_dir / name) != expected:
+                raise ValueError(f"Prüfsumme von {name} stimmt nicht")
+    return manifest
+
+
+def import_snapshot(
+    src_dir: Path,
+    os_index: str,
+    qdrant_collection: str,
+    batch_size: int = 1000,
+    parallel: int = 4,
+    verify: bool = True,
+) -> int:
+    """
+    Lädt einen Snapshot per Bulk in OpenSearch und Qdrant (keine Embeddings).
+
+    Ziel-Index/Collection werden mit Mapping bzw. Dimension/Distanz aus dem
+    Manifest angelegt, falls sie fehlen. Punkt-IDs und Dokument-IDs bleiben
+    erhalten, ein erneuter Import überschreibt also nur.
+
+    Returns:
+        Anzahl importierter Chunks
+    """
+    from opensearchpy.helpers import parallel_bulk
+    from qdrant_client.http.models import Distance
+
+    manifest = load_manifest(src_dir, verify=verify)
+    rows = manifest["rows"]
+    table_path = src_dir / manifest["files"]["chunks"]
+    vectors = np.load(src_dir / manifest["files"]["vectors"], mmap_mode="r")[:rows]
+
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    if not os_client.indices.exists(index=os_index):
+        os_client.indices.create(index=os_index, body={"mappings": manifest["os_mapping"]})
+    if not qdrant_exists(qd, qdrant_collection):
+        qd.create_collection(
+            qdrant_collection,
+            **collection_create_kwargs(manifest["dim"], Distance(manifest["distance"])),
+        )
+        ensure_payload_indexes(qd, qdrant_collection)
+
+    logger.info(f"Import {src_dir} → {os_index} / {qdrant_collection}: {rows} Chunks, dim={manifest['dim']}")
+
+    # 1. OpenSearch (parallel_bulk, Refresh erst am Ende)
+    progress = ReindexProgress(rows)
+    actions = (
+        {"_index": os_index, "_id": row["chunk_id"], "_source": json.loads(row["source"])}
+        for batch in iter_chunk_rows(table_path, batch_size)
+        for row in batch
+    )
+    failed = 0
+    for ok, info in parallel_bulk(
+        os_client, actions, chunk_size=batch_size, thread_count=parallel, raise_on_error=False
+    ):
+        if ok:
+            progress.add(processed=1)
+        else:
+            failed += 1
+            progress.add(failed=1)
+            if failed <= 5:
+                logger.error(f"Bulk-Fehler: {info}")
+    os_client.indices.refresh(index=os_index)
+    logger.info(f"OpenSearch: {progress.summary()}")
+
+    # 2. Qdrant (Vektoren direkt aus der Memmap; IDs/Payloads in gleicher Zeilenreihenfolge)
+    def _rows():
+        return (row for batch in iter_chunk_rows(table_path, batch_size) for row in batch)
+
+    qd_vectors = vectors
+    if settings.QDRANT_SPARSE_VECTORS or truncate_dim(manifest["dim"]) is not None:
+        # Snapshot enthält nur den vollen Dense-Vektor; gekürzter und Sparse-Vektor
+        # werden daraus bzw. aus dem Payload-Text berechnet
+        qd_vectors = (
+            point_vector(vec.tolist(), json.loads(row["payload"]).get("text", ""))
+            for vec, row in zip(vectors, _rows())
+        )
+
+    t0 = time.perf_counter()
+    qd.upload_collection(
+        collection_name=qdrant_collection,
+        vectors=qd_vectors,
+        payload=(json.loads(row["payload"]) for row in _rows()),
+        ids=(row["point_id"] for row in _rows()),
+        batch_size=batch_size,
+        parallel=parallel,
+        wait=True,
+    )
+    elapsed = time.perf_counter() - t0
+    logger.info(f"Qdrant: {rows} Punkte in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} Punkte/s)")
+
+    if failed:
+        logger.warning(f"{failed} OpenSearch-Dokumente fehlgeschlagen")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index-Snapshot exportieren/importieren")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Index + Collection in ein Snapshot-Verzeichnis schreiben")
+    exp.add_argument("--index", required=True, help="OpenSearch-Index (oder Alias)")
+    exp.add_argument("--collection", default=None, help="Qdrant-Collection (default: wie --index)")
+    exp.add_argument("--out", required=True, help="Zielverzeichnis")
+    exp.add_argument("--format", choices=["parquet", "jsonl"], default="parquet")
+    exp.add_argument("--batch-size", type=int, default=500)
+
+    imp = sub.add_parser("import", help="Snapshot per Bulk in OpenSearch + Qdrant laden")
+    imp.add_argument("--src", required=True, help="Snapshot-Verzeichnis")
+    imp.add_argument("--index", default=None, help="Ziel-Index (default: Quelle aus dem Manifest)")
+    imp.add_argument("--collection", default=None, help="Ziel-Collection (default: wie --index)")
+    imp.add_argument(
+        "--alias",
+        default=None,
+        help="In neue Version <alias>__v<N> importieren, aufwärmen und Alias umschalten",
+    )
+    imp.add_argument("--drop-legacy", action="store_true", help="Mit --alias: konkreten Index ersetzen")
+    imp.add_argument("--batch-size", type=int, default=1000)
+    imp.add_argument("--parallel", type=int, default=4)
+    imp.add_argument("--no-verify", action="store_true", help="SHA-256-Prüfung überspringen")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(
+            args.index,
+            args.collection or args.index,
+            Path(args.out),
+            fmt=args.format,
+            batch_size=args.batch_size,
+        )
+        return
+
+    src = Path(args.src)
+    if args.alias:
+        version = next_version(args.alias)
+        os_index = qdrant_collection = versioned_name(args.alias, version)
+    else:
+        manifest = load_manifest(src, verify=False)
+        os_index = args.index or manifest["source"]["os_index"]
+        qdrant_collection = args.collection or args.index or manifest["source"]["qdrant_collection"]
+
+    import_snapshot(
+        src,
+        os_index,
+        qdrant_collection,
+        batch_size=args.batch_size,
+        parallel=args.parallel,
+        verify=not args.no_verify,
+    )
+
+    if args.alias:
+        warm_up(os_index, qdrant_collection)
+        swap_alias(args.alias, version, drop_legacy=args.drop_legacy)
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    main()
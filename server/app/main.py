@@ -8,6 +8,8 @@ from slowapi.util import get_remote_address
 
 from app.core.config import settings
 from app.core.clients import get_redis, setup_logging
+from app.core.executors import shutdown_executors
+from app.core.llm_transport import close_clients
 from app.core.auth import verify_api_key
 from app.core.error_handlers import register_error_handlers, RequestIdMiddleware
 from app.services.pipeline import consume_uploads
@@ -42,6 +44,11 @@ async def lifespan(app: FastAPI):
         t.cancel()
         with contextlib.suppress(asyncio.CancelledError):
             await t
+    # Gepoolte HTTP-Verbindungen zu Ollama/vLLM schließen
+    with contextlib.suppress(Exception):
+        await close_clients()
+    # Thread-Pools der async QA-Endpoints
+    shutdown_executors()
     # Close Redis connection gracefully
     try:
         # get_redis() returns the shared client
@@ -69,6 +76,9 @@ register_error_handlers(app)
 # Add request ID middleware for correlation
 app.add_middleware(RequestIdMiddleware)
 
+# Upload-Limit vor dem Multipart-Parsing (413 ohne den Body zu spoolen)
+app.add_middleware(ingestion.UploadSizeLimitMiddleware)
+
 # Parse CORS origins from settings (comma-separated string)
 cors_origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()]
 
@@ -1,18 +1,27 @@
 from pathlib import Path
-from typing import List, Literal
-import os, uuid, shutil, json
+from typing import Dict, List, Literal, Tuple
+import os, uuid, shutil, json, hashlib, contextlib, asyncio, time
 import aiofiles
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from app.core.clients import get_redis
+from app.core.error_handlers import build_error_response
+from app.services.ingestion_jobs import create_job, get_job, ingestion_summary, update_job
+from app.core.config import settings
+from app.services.deletion import (
+    all_strategy_targets,
+    delete_document_chunks,
+    delete_job_status,
+    load_delete_job,
+    save_delete_job,
+    submit_delete,
+)
 from app.services.pipeline import (
+    ChunkGroup,
     ChunkingStrategy,
-    delete_all_chunks_opensearch,
-    delete_all_chunks_qdrant,
-    delete_chunks_by_process_opensearch,
-    delete_chunks_by_process_qdrant,
-    delete_chunks_by_tag_opensearch,
-    delete_chunks_by_tag_qdrant,
-    ensure_indices,
+    ensure_indices_once,
+    index_chunk_groups,
     index_chunks,
 )
 from app.core.models.manualChunk import ManualChunk
@@ -24,6 +33,100 @@ UPLOAD_DIR = Path("/server/data/tmp_uploads")
 # Security: File upload constraints
 ALLOWED_EXTENSIONS = {".pdf"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_BLOCK_SIZE = 1024 * 1024  # 1MB pro Lese-/Schreibvorgang
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # Multipart-Boundaries + Formularfelder neben der Datei
+UPLOAD_PATH = "/upload"
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Begrenzt den Request-Body von POST /upload, bevor FastAPI das Multipart-
+    Formular parst (und die Datei vollständig in ein SpooledTemporaryFile liest).
+
+    - Content-Length über dem Limit → sofort 413, der Body wird nicht gelesen
+    - Ohne Content-Length (chunked) → 413, sobald die empfangenen Bytes das Limit überschreiten
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB",
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != UPLOAD_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            exc = self._too_large()
+            request_id = headers.get(b"x-request-id", b"").decode() or str(uuid.uuid4())
+            response = JSONResponse(
+                status_code=exc.status_code,
+                content=build_error_response(
+                    code="PAYLOAD_TOO_LARGE",
+                    message=exc.detail,
+                    request_id=request_id,
+                    user_message=exc.detail,
+                ),
+                headers={"Connection": "close"},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI reicht HTTPException aus dem Form-Parsing unverändert durch
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def _stream_to_disk(file: UploadFile, dst: str) -> Tuple[int, str]:
+    """
+    Schreibt den Upload blockweise nach `dst` und berechnet dabei SHA-256.
+
+    Übergroße Requests weist bereits UploadSizeLimitMiddleware ab; hier wird
+    nur noch die Dateigröße selbst geprüft (413 bei mehr als MAX_FILE_SIZE,
+    die Teildatei `.part` wird dann entfernt). Erst nach vollständigem Upload
+    wird sie atomar nach `dst` umbenannt.
+
+    Returns:
+        (Größe in Bytes, SHA-256 hex)
+    """
+    tmp = f"{dst}.part"
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(tmp, "wb") as out:
+            while block := await file.read(UPLOAD_BLOCK_SIZE):
+                size += len(block)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+                    )
+                digest.update(block)
+                await out.write(block)
+        os.replace(tmp, dst)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+    return size, digest.hexdigest()
 
 
 @router.post("/upload")
@@ -57,23 +160,22 @@ async def upload_document(
     else:
         raise HTTPException(status_code=400, detail="Filename is required")
 
-    # Security: Validate file size
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-    await file.seek(0)  # Reset for processing
-
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     doc_id = str(uuid.uuid4())
     dst = os.path.join(UPLOAD_DIR, f"{doc_id}-{file.filename}")
 
-    async with aiofiles.open(dst, "wb") as out:
-        await out.write(contents)
+    # Security: Request-Größe prüft UploadSizeLimitMiddleware, hier die exakte Dateigröße
+    size, sha256 = await _stream_to_disk(file, dst)
 
     r = get_redis()
+    await create_job(
+        r,
+        doc_id,
+        file_name=file.filename,
+        chunking_strategy=chunking_strategy,
+        bytes=size,
+        sha256=sha256,
+    )
     await r.xadd(
         "doc.uploaded",
         {
@@ -84,6 +186,7 @@ async def upload_document(
             "tags": tags,
             "process_name": process_name,
             "chunking_strategy": chunking_strategy,
+            "sha256": sha256,
         },
     )
 
@@ -91,6 +194,8 @@ async def upload_document(
         "document_id": doc_id,
         "file_name": file.filename,
         "chunking_strategy": chunking_strategy,
+        "bytes": size,
+        "sha256": sha256,
         "status": "queued",
     }
 
@@ -102,65 +207,82 @@ async def list_documents():
     return [{"file": p} for p in os.listdir(UPLOAD_DIR)]
 
 
-@router.delete("/all", summary="Alle Chunks in OS & Qdrant löschen")
-def delete_all_chunks():
-    deleted_os = delete_all_chunks_opensearch()
-    delete_all_chunks_qdrant()
-    return {
-        "ok": True,
-        "opensearch_deleted": deleted_os,
-        "qdrant": "collection dropped & recreated",
-    }
+@router.get("/documents/stats", summary="Ingestion-Durchsatz und Stage-Latenzen")
+async def ingestion_stats():
+    return await ingestion_summary(get_redis())
+
+
+@router.get("/documents/{document_id}/status", summary="Job-Status eines Uploads")
+async def document_status(document_id: str):
+    job = await get_job(get_redis(), document_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Kein Ingestion-Job für {document_id}")
+    return job
+
+
+def _targets(os_index: str | None, qdrant_collection: str | None):
+    return [(os_index or settings.OS_INDEX, qdrant_collection or settings.QDRANT_COLLECTION)]
+
+
+async def _submit_delete(targets, field: str | None = None, value: str | None = None) -> dict:
+    job = await asyncio.to_thread(submit_delete, targets, field, value)
+    job["status"] = "submitted"
+    await save_delete_job(get_redis(), job)
+    return job
+
+
+@router.delete("/all", summary="Alle Chunks in OS & Qdrant löschen (Hintergrund-Task)")
+async def delete_all_chunks():
+    return await _submit_delete(_targets(None, None))
 
 
 @router.delete(
     "/process/{process_name}",
-    summary="Alle Chunks zu einem process_name in OS & Qdrant löschen",
+    summary="Alle Chunks zu einem process_name in OS & Qdrant löschen (Hintergrund-Task)",
 )
-def delete_chunks_by_process(
+async def delete_chunks_by_process(
     process_name: str,
     os_index: str | None = Query(None, description="OpenSearch Index (default: aus .env)"),
     qdrant_collection: str | None = Query(None, description="Qdrant Collection (default: aus .env)"),
 ):
     if not process_name:
         raise HTTPException(status_code=400, detail="process_name darf nicht leer sein")
-
-    deleted_os = delete_chunks_by_process_opensearch(process_name, os_index=os_index)
-    delete_chunks_by_process_qdrant(process_name, qdrant_collection=qdrant_collection)
-
-    return {
-        "ok": True,
-        "process_name": process_name,
-        "os_index": os_index or "default",
-        "qdrant_collection": qdrant_collection or "default",
-        "opensearch_deleted": deleted_os,
-        "qdrant": "delete by filter(process_name) requested",
-    }
+    return await _submit_delete(
+        _targets(os_index, qdrant_collection), "process_name", process_name
+    )
 
 
 @router.delete(
     "/tag/{tag}",
-    summary="Alle Chunks zu einem Tag in OS & Qdrant löschen",
+    summary="Alle Chunks zu einem Tag in OS & Qdrant löschen (Hintergrund-Task)",
 )
-def delete_chunks_by_tag(
+async def delete_chunks_by_tag(
     tag: str,
     os_index: str | None = Query(None, description="OpenSearch Index (default: aus .env)"),
     qdrant_collection: str | None = Query(None, description="Qdrant Collection (default: aus .env)"),
 ):
     if not tag:
         raise HTTPException(status_code=400, detail="tag darf nicht leer sein")
+    return await _submit_delete(_targets(os_index, qdrant_collection), "tag", tag)
 
-    deleted_os = delete_chunks_by_tag_opensearch(tag, os_index=os_index)
-    delete_chunks_by_tag_qdrant(tag, qdrant_collection=qdrant_collection)
 
-    return {
-        "ok": True,
-        "tag": tag,
-        "os_index": os_index or "default",
-        "qdrant_collection": qdrant_collection or "default",
-        "opensearch_deleted": deleted_os,
-        "qdrant": "delete by filter(tag) requested",
-    }
+@router.delete(
+    "/documents/{document_id}",
+    summary="Alle Chunks eines Dokuments aus den Indizes aller Strategien löschen",
+)
+async def delete_document(document_id: str):
+    return await _submit_delete(all_strategy_targets(), "document_id", document_id)
+
+
+@router.get("/tasks/{task_id}", summary="Status eines Lösch-Tasks")
+async def delete_task_status(task_id: str):
+    r = get_redis()
+    job = await load_delete_job(r, task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unbekannter Task {task_id}")
+    job = await asyncio.to_thread(delete_job_status, job)
+    await save_delete_job(r, job)
+    return job
 
 
 @router.post("/chunks/manual")
@@ -176,9 +298,9 @@ def index_manual_chunks(chunks: List[ManualChunk]):
             status_code=400, detail="Payload 'chunks' darf nicht leer sein."
         )
 
-    ensure_indices(ChunkingStrategy.BY_TITLE)
-    ensure_indices(ChunkingStrategy.SEMANTIC)
-    ensure_indices(ChunkingStrategy.SENTENCE_SEMANTIC)
+    ensure_indices_once(ChunkingStrategy.BY_TITLE)
+    ensure_indices_once(ChunkingStrategy.SEMANTIC)
+    ensure_indices_once(ChunkingStrategy.SENTENCE_SEMANTIC)
 
     indexed = 0
     for c in chunks:
@@ -196,3 +318,137 @@ def index_manual_chunks(chunks: List[ManualChunk]):
         "ok": True,
         "indexed_chunks": indexed,
     }
+
+
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+
+def _flush_import(
+    pending: Dict[Tuple[str, ChunkingStrategy], ChunkGroup],
+    cleared: set,
+) -> int:
+    by_strategy: Dict[ChunkingStrategy, List[ChunkGroup]] = {}
+    for key, group in pending.items():
+        doc_id, strategy = key
+        if key not in cleared:
+            # chunk_ids beginnen bei document_id:0 → alte Chunks (auch ein längerer
+            # Rest oder ein geparstes Dokument) vor dem ersten Schreiben entfernen
+            delete_document_chunks(strategy, doc_id)
+            cleared.add(key)
+        by_strategy.setdefault(strategy, []).append(group)
+    indexed = 0
+    for strategy, groups in by_strategy.items():
+        ensure_indices_once(strategy)
+        indexed += index_chunk_groups(groups, strategy=strategy)
+    return indexed
+
+
+@router.post("/chunks/import", summary="Streaming-Import vorgechunkter Inhalte (NDJSON)")
+async def import_chunks_ndjson(
+    request: Request,
+    import_id: str | None = Query(None, description="ID für Fortschrittsabfrage via /documents/{id}/status"),
+):
+    """
+    Importiert vorgechunkte Inhalte als NDJSON-Stream (eine ManualChunk-JSON-Zeile pro Chunk).
+
+    - Body wird inkrementell gelesen und zeilenweise validiert
+    - Chunks werden nach (document_id, chunking_strategy) gruppiert und alle
+      IMPORT_BATCH_SIZE Chunks gemeinsam embeddet und per Bulk geschrieben
+    - chunk_id = document_id:n in Reihenfolge der Zeilen je Dokument/Strategie;
+      vorhandene Chunks der document_id werden vor dem ersten Batch gelöscht,
+      ein erneuter Import ersetzt das Dokument also vollständig
+    - process_name, tags und meta.file_name müssen für alle Zeilen eines
+      Dokuments gleich sein, abweichende Zeilen zählen als ungültig
+    - Fortschritt unter import_id abrufbar (GET /documents/{import_id}/status)
+    """
+    import_id = import_id or str(uuid.uuid4())
+    r = get_redis()
+    await create_job(r, import_id, file_name="ndjson-import")
+    await update_job(r, import_id, status="importing", started_at=time.time())
+
+    pending: Dict[Tuple[str, ChunkingStrategy], ChunkGroup] = {}
+    next_index: Dict[Tuple[str, ChunkingStrategy], int] = {}
+    # (process_name, tags, file_name) der ersten Zeile je Dokument/Strategie
+    scopes: Dict[Tuple[str, ChunkingStrategy], Tuple[object, object, object]] = {}
+    cleared: set = set()
+    counts = {"lines": 0, "invalid": 0, "chunks": 0, "indexed_chunks": 0, "batches": 0}
+    errors: List[Dict[str, object]] = []
+    buffered = 0
+
+    def _invalid(error: str) -> None:
+        counts["invalid"] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": counts["lines"], "error": error[:300]})
+
+    def _add_line(raw: bytes) -> None:
+        nonlocal buffered
+        if not raw.strip():
+            return
+        counts["lines"] += 1
+        try:
+            c = ManualChunk.model_validate_json(raw)
+            strategy = ChunkingStrategy(c.chunking_strategy or ChunkingStrategy.BY_TITLE.value)
+        except (ValidationError, ValueError) as e:
+            _invalid(str(e))
+            return
+        key = (c.document_id, strategy)
+        scope = (c.process_name, c.tags, c.meta.get("file_name"))
+        expected = scopes.setdefault(key, scope)
+        if scope != expected:
+            _invalid(
+                f"process_name/tags/file_name {scope} weichen von der ersten Zeile "
+                f"für {c.document_id} ab {expected}"
+            )
+            return
+        group = pending.get(key)
+        if group is None:
+            group = pending[key] = ChunkGroup(
+                c.document_id,
+                [],
+                process_name=c.process_name,
+                tags=c.tags,
+                file_name=c.meta.get("file_name"),
+                start_index=next_index.get(key, 0),
+            )
+        group.chunks.append((c.text, c.meta))
+        next_index[key] = next_index.get(key, 0) + 1
+        counts["chunks"] += 1
+        buffered += 1
+
+    async def _flush() -> None:
+        nonlocal pending, buffered
+        if not pending:
+            return
+        counts["indexed_chunks"] += await asyncio.to_thread(_flush_import, pending, cleared)
+        counts["batches"] += 1
+        pending, buffered = {}, 0
+        await update_job(r, import_id, documents=len(next_index), **counts)
+
+    try:
+        tail = b""
+        async for block in request.stream():
+            lines = (tail + block).split(b"\n")
+            tail = lines.pop()
+            if len(tail) > MAX_IMPORT_LINE_BYTES:
+                raise HTTPException(status_code=413, detail=f"NDJSON-Zeile {counts['lines'] + 1} zu lang")
+            for raw in lines:
+                _add_line(raw)
+            if buffered >= settings.IMPORT_BATCH_SIZE:
+                await _flush()
+        _add_line(tail)
+        await _flush()
+    except Exception as e:
+        await update_job(r, import_id, status="failed", error=str(e), finished_at=time.time(), **counts)
+        raise
+
+    await update_job(
+        r, import_id, status="done", finished_at=time.time(), documents=len(next_index), **counts
+    )
+    return {
+        "ok": counts["invalid"] == 0,
+        "import_id": import_id,
+        "documents": len(next_index),
+        **counts,
+        "errors": errors,
+    }
@@ -1,21 +1,24 @@
 import time as time_module
 import json
-from typing import Optional, Generator
-from fastapi import APIRouter, Query, Request
+from typing import AsyncGenerator, Optional, Generator
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from app.core.models.askModel import AskBody
 from app.core.prompt_builder import build_prompt
-from app.services.retrieval import hybrid_search
-from app.services.llm import generate, hyde_rewrite, ollama_generate_stream
+from app.services.retrieval import ahybrid_search
+from app.services.llm import agenerate, agenerate_stream, ahyde_rewrite
 from app.services.gating import compute_gating, GatingMode
-from app.services.query_reformulation import reformulate_query, should_reformulate
+from app.services.query_reformulation import areformulate_query, should_reformulate
+from app.core.executors import run_io
+from app.core.llm_transport import BACKENDS, endpoint_stats, hedge_stats
+from app.core.stages import StageRunner
 from app.core.clients import get_logger
 from app.core.config import settings
 from app.core.llm_config import LLMPresets
-from app.core.guardrails import classify_query, classify_query_with_context, should_use_rag, get_fallback_response, GuardrailMode, QueryIntent
+from app.core.guardrails import aclassify_query_with_context, should_use_rag, get_fallback_response, GuardrailMode, QueryIntent
 
 router = APIRouter(prefix="/api/qa")
 
@@ -25,9 +28,60 @@ logger = get_logger(__name__)
 limiter = Limiter(key_func=get_remote_address)
 
 
+async def _gating_stage(body: AskBody):
+    """Gating (Neo4j) im I/O-Pool."""
+    return await run_io(
+        compute_gating,
+        process_name=body.process_name,
+        process_id=body.process_id,
+        definition_id=body.definition_id,
+        current_node_id=body.current_node_id,
+        roles=body.roles or [],
+        force_process_context=body.force_process_context,
+    )
+
+
+def _elapsed_ms(t0: float) -> int:
+    return int((time_module.perf_counter() - t0) * 1000)
+
+
+def _sse(event: str, data: dict, t0: float) -> str:
+    """SSE-Event mit `t_ms` (Millisekunden seit Request-Beginn)."""
+    data["t_ms"] = _elapsed_ms(t0)
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _fallback_events(intent: QueryIntent, confidence: float, t0: float) -> Generator[str, None, None]:
+    """Fallback-Response für Non-RAG Queries (Greetings, Chitchat, etc.)."""
+    fallback_response = get_fallback_response(intent)
+    logger.info(f"Guardrail triggered: {intent.value} -> returning fallback")
+
+    # Sende Metadata
+    metadata = {
+        "context": [],
+        "gating_mode": "guardrail",
+        "gating_hint": f"Query classified as {intent.value}",
+        "gating_metadata": {"intent": intent.value, "confidence": confidence},
+        "used_model": None,
+        "used_hyde": False,
+        "used_rerank": False,
+    }
+    yield _sse("metadata", metadata, t0)
+    
+    # Sende Fallback-Antwort als einzelnes Token (für sofortige Anzeige)
+    yield f"event: token\ndata: {json.dumps(fallback_response)}\n\n"
+    yield _sse("done", {}, t0)
+
+
+@router.get("/llm/endpoints")
+def llm_endpoints():
+    """Zustand, Last und Latenzen (p50/p95) der LLM-Endpoints, Hedging-Zähler."""
+    return {"endpoints": endpoint_stats(), "hedging": hedge_stats()}
+
+
 @router.post("/ask")
 @limiter.limit("20/minute")
-def ask(
+async def ask(
     request: Request,  # Required for rate limiter
     body: AskBody,
     # Optionale Overrides für Evaluation
@@ -75,65 +129,56 @@ def ask(
     )
 
     t0 = time_module.perf_counter()
+    stages = StageRunner(t0)
 
-    # 1) Gating berechnen
-    gating = compute_gating(
-        process_name=body.process_name,
-        process_id=body.process_id,
-        definition_id=body.definition_id,
-        current_node_id=body.current_node_id,
-        roles=body.roles or [],
-        force_process_context=body.force_process_context,
-    )
-
-    t1 = time_module.perf_counter()
-    logger.info("Gating computation took %.3f seconds", t1 - t0)
-
-    # logger.info(
-    #     "Gating mode: %s, context_type: %s",
-    #     gating.mode.value,
-    #     gating.metadata.get("context_type"),
-    # )
+    # 1) Gating (Neo4j) läuft parallel zu HyDE + Retrieval
+    stages.start("gating", lambda: _gating_stage(body))
 
     # 2) Optional HyDE Query Transformation
-    retrieval_query = body.query
-    hyde_doc = None
-    if body.use_hyde:
-        t_hyde_start = time_module.perf_counter()
-        hyde_doc = hyde_rewrite(body.query, model=body.model)
-        retrieval_query = hyde_doc  # Use hypothetical document for embedding
-        t_hyde_end = time_module.perf_counter()
-        logger.info(
-            "HyDE transformation took %.3f seconds (len=%d)",
-            t_hyde_end - t_hyde_start,
-            len(hyde_doc),
-        )
+    async def hyde_stage():
+        if not body.use_hyde:
+            return None
+        return await ahyde_rewrite(body.query, model=body.model)
 
     # 3) Retrieval mit optionalem Reranking
-    ctx = hybrid_search(
-        retrieval_query,  # Use HyDE-transformed query or original
-        body.top_k,
-        retrieval_mode=retrieval_mode or "hybrid",  # H1 Hypothesentest
-        process_name=body.process_name,
-        tags=body.tags or None,
-        use_rerank=body.use_rerank,
-        rerank_top_n=body.rerank_top_n,
-        # Dynamische Config
-        os_index=os_index,
-        qdrant_collection=qdrant_collection,
-        embedding_backend=embedding_backend or settings.EMBEDDING_BACKEND,
-        embedding_model=embedding_model or settings.OLLAMA_EMBED_MODEL,
-    )
+    async def retrieval_stage(hyde_doc):
+        return await ahybrid_search(
+            hyde_doc or body.query,  # Use HyDE-transformed query or original
+            body.top_k,
+            retrieval_mode=retrieval_mode or "hybrid",  # H1 Hypothesentest
+            process_name=body.process_name,
+            tags=body.tags or None,
+            use_rerank=body.use_rerank,
+            rerank_top_n=body.rerank_top_n,
+            # Dynamische Config
+            os_index=os_index,
+            qdrant_collection=qdrant_collection,
+            embedding_backend=embedding_backend or settings.EMBEDDING_BACKEND,
+            embedding_model=embedding_model or settings.OLLAMA_EMBED_MODEL,
+        )
+
+    stages.start("hyde", hyde_stage)
+    stages.start("retrieval", retrieval_stage, "hyde")
+    try:
+        gating = await stages.result("gating")
+        hyde_doc = await stages.result("hyde")
+        ctx = await stages.result("retrieval")
+    finally:
+        await stages.aclose()
+
+    if hyde_doc:
+        logger.info("HyDE transformation done (len=%d)", len(hyde_doc))
     
     # DEBUG: Log retrieval mode and context for BM25 investigation
     logger.info(f"DEBUG: retrieval_mode={retrieval_mode}, ctx_count={len(ctx)}")
 
     t2 = time_module.perf_counter()
     logger.info(
-        "Retrieval took %.3f seconds (rerank=%s, candidates=%d)",
-        t2 - t1,
+        "Gating + Retrieval took %.3f seconds (rerank=%s, candidates=%d; %s)",
+        t2 - t0,
         body.use_rerank,
         body.rerank_top_n if body.use_rerank else body.top_k * 5,
+        stages.summary(),
     )
 
     # logger.info(f"ctx and das LLM: {ctx}")
@@ -168,14 +213,13 @@ def ask(
     if temperature is not None:
         llm_config.temperature = temperature
 
-    answer = generate(prompt, config=llm_config, backend=llm_backend)
+    answer = await agenerate(prompt, config=llm_config, backend=llm_backend)
 
     t4 = time_module.perf_counter()
     logger.info(
-        "⏱️ Total: %.2fs (gating=%.2f, retrieval=%.2f, prompt=%.2f, llm=%.2f)",
+        "⏱️ Total: %.2fs (gating+retrieval=%.2f, prompt=%.2f, llm=%.2f)",
         t4 - t0,
-        t1 - t0,
-        t2 - t1,
+        t2 - t0,
         t3 - t2,
         t4 - t3,
     )
@@ -232,7 +276,7 @@ def ask(
 
 @router.post("/ask/stream")
 @limiter.limit("20/minute")
-def ask_stream(
+async def ask_stream(
     request: Request,  # Required for rate limiter
     body: AskBody,
     os_index: Optional[str] = Query("chunks_semantic_qwen3"),
@@ -241,20 +285,40 @@ def ask_stream(
     embedding_model: Optional[str] = Query("qwen3-embedding:4b"),
     retrieval_mode: Optional[str] = Query("hybrid"),
     temperature: Optional[float] = Query(None, ge=0.0, le=2.0),
+    llm_backend: Optional[str] = Query(
+        None, description="'ollama' oder 'vllm' (default: settings.LLM_BACKEND)"
+    ),
 ):
     """
     Streaming QA Endpoint mit Server-Sent Events.
 
-    Sendet zuerst Metadata (context, gating_mode, etc.) als JSON,
-    dann die komplette LLM-Antwort als ein Event.
+    Der Stream startet sofort; Events kommen, sobald die jeweilige Stage
+    fertig ist. Gating läuft parallel zur Guardrail, das gating-Event folgt
+    aber erst nach dem intent-Event und nur bei RAG-Intents.
 
     Event-Format:
-    - event: metadata, data: {...}
-    - event: answer, data: "..."
-    - event: done, data: {}
+    - event: intent, data: {intent, confidence, use_rag, t_ms}
+    - event: gating, data: {gating_mode, gating_hint, gating_metadata, t_ms}
+    - event: retrieval, data: {sources, search_query, used_hyde, used_rerank, t_ms}
+    - event: metadata, data: {..., t_ms}  (Gesamtübersicht wie bisher)
+    - event: token, data: "..."  (reiner String, ohne t_ms)
+    - event: done, data: {ttft_ms, llm_start_ms, stages_ms, t_ms}
+    - event: error, data: {message, t_ms}  (Fehler nach Stream-Beginn)
+
+    `t_ms` sind Millisekunden seit Request-Beginn (TTFB/TTFT-Messung); alle
+    Events außer token tragen es, für Tokens liefert done `ttft_ms`.
     """
     logger.info("QA /ask/stream: query=%s", body.query[:50] if body.query else "")
 
+    # LLM-Backend pro Request; ohne explizites Modell im Body das Default-Modell des Backends
+    backend = llm_backend or settings.LLM_BACKEND
+    if backend not in BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes LLM-Backend: {backend}")
+    if "model" in body.model_fields_set and body.model:
+        stream_model = body.model
+    else:
+        stream_model = settings.VLLM_MODEL if backend == "vllm" else settings.OLLAMA_MODEL
+
     # 0) Query Guardrail: Klassifiziere Query mit Chat-Kontext für Folgefragen
     # Konvertiere chat_history für Guardrail (falls vorhanden)
     guardrail_history = None
@@ -267,192 +331,250 @@ def ask_stream(
     # Parse guardrail mode from request
     guardrail_mode = GuardrailMode(body.guardrail_mode) if body.guardrail_mode in [m.value for m in GuardrailMode] else GuardrailMode.HYBRID
     
-    intent, confidence = classify_query_with_context(body.query, guardrail_history, mode=guardrail_mode)
-    logger.debug(f"Query intent: {intent.value} (confidence: {confidence})")
-    
-    if not should_use_rag(intent):
-        # Fallback-Response für Non-RAG Queries (Greetings, Chitchat, etc.)
-        fallback_response = get_fallback_response(intent)
-        logger.info(f"Guardrail triggered: {intent.value} -> returning fallback")
-        
-        def generate_fallback_events() -> Generator[str, None, None]:
-            # Sende Metadata
-            metadata = {
-                "context": [],
-                "gating_mode": "guardrail",
-                "gating_hint": f"Query classified as {intent.value}",
-                "gating_metadata": {"intent": intent.value, "confidence": confidence},
-                "used_model": None,
-                "used_hyde": False,
-                "used_rerank": False,
-            }
-            yield f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
-            
-            # Sende Fallback-Antwort als einzelnes Token (für sofortige Anzeige)
-            yield f"event: token\ndata: {json.dumps(fallback_response)}\n\n"
-            yield "event: done\ndata: {}\n\n"
-        
-        return StreamingResponse(
-            generate_fallback_events(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-            },
+    # Stage-Graph: Guardrail, Gating und (spekulativ) Retrieval der Roh-Query
+    # starten sofort; Reformulation → HyDE → Retrieval hängen an der Guardrail.
+    stages = StageRunner()
+
+    async def retrieve(search_input: str):
+        return await ahybrid_search(
+            search_input,  # positional: query
+            body.top_k,    # positional: top_k
+            retrieval_mode=retrieval_mode or "hybrid",
+            process_name=body.process_name,
+            tags=body.tags or None,
+            use_rerank=body.use_rerank,
+            rerank_top_n=body.rerank_top_n,
+            os_index=os_index,
+            qdrant_collection=qdrant_collection,
+            embedding_backend=embedding_backend or settings.EMBEDDING_BACKEND,
+            embedding_model=embedding_model or settings.OLLAMA_EMBED_MODEL,
         )
 
-    # 1) Gating berechnen
-    gating = compute_gating(
-        process_name=body.process_name,
-        process_id=body.process_id,
-        definition_id=body.definition_id,
-        current_node_id=body.current_node_id,
-        roles=body.roles or [],
-        force_process_context=body.force_process_context,
-    )
-
     # 2) Intent-basierte Query Reformulation
     #    FOLLOWUP → braucht Reformulation mit Chat-Context
     #    PROCESS_RELATED → eigenständige Frage, keine Reformulation nötig
-    search_input = body.query
-    
-    # DEBUG: Log incoming chat history
-    if body.chat_history:
-        logger.info(f"[DEBUG] Received chat_history with {len(body.chat_history)} messages")
-        for i, msg in enumerate(body.chat_history):
-            logger.info(f"[DEBUG]   [{i}] {msg.role}: {msg.content[:50]}...")
-    else:
-        logger.info("[DEBUG] No chat_history received")
-    
-    # Intent-basierte Reformulation (statt Heuristik)
-    if intent == QueryIntent.FOLLOWUP:
-        logger.info(f"[Intent-Based] FOLLOWUP detected, reformulating query")
-        search_input = reformulate_query(body.query, body.chat_history)
-        logger.info(f"Query reformulated: '{body.query}' -> '{search_input}'")
-    else:
+    async def reformulation_stage(guardrail_result):
+        intent, _ = guardrail_result
+        if not should_use_rag(intent):
+            return body.query
+        # Intent-basierte Reformulation (statt Heuristik)
+        if intent == QueryIntent.FOLLOWUP:
+            logger.info(f"[Intent-Based] FOLLOWUP detected, reformulating query")
+            reformulated = await areformulate_query(body.query, body.chat_history)
+            logger.info(f"Query reformulated: '{body.query}' -> '{reformulated}'")
+            return reformulated
         logger.info(f"[Intent-Based] {intent.name} - no reformulation needed")
-    
-    # 3) Optional HyDE (on reformulated query)
-    if body.use_hyde:
-        search_input = hyde_rewrite(search_input, model=body.model)
-
-    # 3) Retrieval (same pattern as regular /ask endpoint)
-    chunks = hybrid_search(
-        search_input,  # positional: query
-        body.top_k,    # positional: top_k
-        retrieval_mode=retrieval_mode or "hybrid",
-        process_name=body.process_name,
-        tags=body.tags or None,
-        use_rerank=body.use_rerank,
-        rerank_top_n=body.rerank_top_n,
-        os_index=os_index,
-        qdrant_collection=qdrant_collection,
-        embedding_backend=embedding_backend or settings.EMBEDDING_BACKEND,
-        embedding_model=embedding_model or settings.OLLAMA_EMBED_MODEL,
-    )
-
-    ctx = [
-        {
-            "chunk_id": c["chunk_id"],
-            "text": c["text"][:300],
-            "score": round(c.get("rrf_score", 0), 4) if c.get("rrf_score") else None,
-            "rerank_score": round(c.get("rerank_score", 0), 4) if c.get("rerank_score") else None,
-            "metadata": {
-                "process_name": c.get("process_name"),
-                "tags": c.get("tags"),
-                "page_number": c.get("page_number"),
-                "section_title": c.get("section_title"),
-                # Filename with fallback: file_name (from meta) > document_id > process fallback
-                "filename": c.get("file_name") or (
-                    f"Dokument zu {c.get('process_name')}" if c.get("process_name")
-                    else "Unbekanntes Dokument"
-                ),
-                "title": c.get("title") or c.get("section_title"),
-            },
-        }
-        for c in chunks
-    ]
-    
-    # Add BPMN process as source when gating provides actual BPMN process context
-    # (not for DOCS_ONLY which only uses process_name for filtering, no BPMN context)
-    if gating.mode in (GatingMode.PROCESS_CONTEXT, GatingMode.GATING_ENABLED) and body.process_name:
-        bpmn_source = {
-            "chunk_id": f"bpmn_{body.process_id or body.process_name}",
-            "text": gating.prompt_hint[:300] if gating.prompt_hint else "Prozesskontext",
-            "score": None,
-            "rerank_score": None,
-            "metadata": {
-                "source_type": "bpmn",
-                "process_name": body.process_name,
-                "filename": f"BPMN-Prozess: {body.process_name}",
-                "title": f"Prozessmodell: {body.process_name}",
-            },
-        }
-        ctx.insert(0, bpmn_source)
-    
-    # Number chunks by relevance order (from reranker) - [1] = most relevant
-    # Note: LLM numbers its own citations in the answer text independently
-    context_text = "\n\n---\n\n".join(
-        f"[Chunk {i+1}] Quelle: {c.get('metadata', {}).get('filename', 'Dokument')}\n{c['text']}"
-        for i, c in enumerate(chunks)
-    )
+        return body.query
 
-    # 4) Prompt - only include gating_hint for modes that use BPMN context
-    gating_hint_for_prompt = (
-        gating.prompt_hint 
-        if gating.mode in (GatingMode.PROCESS_CONTEXT, GatingMode.GATING_ENABLED) 
-        else None
-    )
-    
-    # Use reformulated query for prompt (includes context from chat history)
-    original_query = body.query
-    body.query = search_input
-    
-    prompt = build_prompt(
-        style=body.prompt_style,
-        body=body,
-        context_text=context_text,
-        gating_hint=gating_hint_for_prompt,
-    )
-    
-    # Restore original query for logging/response
-    body.query = original_query
-    
-    # DEBUG: Log full prompt
-    logger.info(f"[DEBUG PROMPT] Full prompt:\n{'='*80}\n{prompt}\n{'='*80}")
-
-    # 5) LLM Config (same pattern as regular /ask endpoint)
-    if body.prompt_style == "cot":
-        llm_config = LLMPresets.chain_of_thought(model=body.model or settings.OLLAMA_MODEL)
-    else:
-        llm_config = LLMPresets.rag_qa(model=body.model or settings.OLLAMA_MODEL)
-    
-    # Log the model being used
-    logger.info(f"Using LLM model: {llm_config.model}")
-
-    # Temperature Override falls angegeben
-    if temperature is not None:
-        llm_config.temperature = temperature
-
-    # Generator für SSE - Token-by-Token Streaming
-    def generate_events() -> Generator[str, None, None]:
-        # Sende Metadata zuerst
-        metadata = {
-            "context": ctx,
-            "gating_mode": gating.mode.value,
-            "gating_hint": gating.prompt_hint,
-            "gating_metadata": gating.metadata,
-            "used_model": body.model,
-            "used_hyde": body.use_hyde,
-            "used_rerank": body.use_rerank,
-        }
-        yield f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
-
-        # Streame LLM-Antwort Token für Token
-        for token in ollama_generate_stream(prompt, config=llm_config):
-            yield f"event: token\ndata: {json.dumps(token)}\n\n"
-
-        yield "event: done\ndata: {}\n\n"
+    # 3) Optional HyDE (on reformulated query)
+    async def hyde_stage(search_input: str):
+        if body.use_hyde:
+            return await ahyde_rewrite(search_input, model=body.model)
+        return search_input
+
+    # 4) Retrieval: Spekulation übernehmen, falls die Suchanfrage unverändert ist
+    async def retrieval_stage(search_input: str):
+        if stages.has("speculative_retrieval"):
+            if search_input == body.query:
+                logger.info("[Speculative] Retrieval der Roh-Query übernommen")
+                return await stages.result("speculative_retrieval")
+            stages.cancel("speculative_retrieval")
+        return await retrieve(search_input)
+
+    def start_stages() -> None:
+        # 0) Query Guardrail
+        stages.start(
+            "guardrail",
+            lambda: aclassify_query_with_context(body.query, guardrail_history, mode=guardrail_mode),
+        )
+        # 1) Gating (unabhängig von der Guardrail, Ergebnis nur bei RAG-Intents verwendet)
+        stages.start("gating", lambda: _gating_stage(body))
+        # Spekulatives Retrieval: in den meisten Fällen bleibt die Roh-Query die
+        # Suchanfrage; bei HyDE ist die Suchanfrage erst nach einem LLM-Call bekannt
+        if settings.QA_SPECULATIVE_RETRIEVAL and not body.use_hyde:
+            stages.start("speculative_retrieval", lambda: retrieve(body.query))
+        stages.start("reformulation", reformulation_stage, "guardrail")
+        stages.start("hyde", hyde_stage, "reformulation")
+        stages.start("retrieval", retrieval_stage, "hyde")
+
+    # Generator für SSE: startet sofort und sendet Events, sobald die
+    # jeweilige Stage fertig ist. Alle Events außer token enthalten `t_ms`
+    # (seit Request-Beginn), damit Clients TTFB/TTFT messen können.
+    async def generate_events() -> AsyncGenerator[str, None]:
+        def sse(event: str, data: dict) -> str:
+            return _sse(event, data, stages.t0)
+
+        def gating_event(gating) -> str:
+            return sse("gating", {
+                "gating_mode": gating.mode.value,
+                "gating_hint": gating.prompt_hint,
+                "gating_metadata": gating.metadata,
+            })
+
+        try:
+            # Stages erst hier starten: das finally unten räumt sie in jedem Fall ab
+            start_stages()
+
+            intent, confidence = await stages.result("guardrail")
+            logger.debug(f"Query intent: {intent.value} (confidence: {confidence})")
+            yield sse("intent", {
+                "intent": intent.value,
+                "confidence": confidence,
+                "use_rag": should_use_rag(intent),
+            })
+
+            if not should_use_rag(intent):
+                # Gating und spekulatives Retrieval werden nicht gebraucht –
+                # auch deren Fehler nicht (aclose holt sie nur ab)
+                await stages.aclose()
+                for event in _fallback_events(intent, confidence, stages.t0):
+                    yield event
+                return
+
+            # Gating läuft seit Request-Beginn, ist meist schon fertig
+            gating = await stages.result("gating")
+            yield gating_event(gating)
+
+            # DEBUG: Log incoming chat history
+            if body.chat_history:
+                logger.info(f"[DEBUG] Received chat_history with {len(body.chat_history)} messages")
+                for i, msg in enumerate(body.chat_history):
+                    logger.info(f"[DEBUG]   [{i}] {msg.role}: {msg.content[:50]}...")
+            else:
+                logger.info("[DEBUG] No chat_history received")
+
+            search_input = await stages.result("hyde")
+            chunks = await stages.result("retrieval")
+            await stages.aclose()
+            logger.info(f"Stages: {stages.summary()}")
+
+            ctx = [
+                {
+                    "chunk_id": c["chunk_id"],
+                    "text": c["text"][:300],
+                    "score": round(c.get("rrf_score", 0), 4) if c.get("rrf_score") else None,
+                    "rerank_score": round(c.get("rerank_score", 0), 4) if c.get("rerank_score") else None,
+                    "metadata": {
+                        "process_name": c.get("process_name"),
+                        "tags": c.get("tags"),
+                        "page_number": c.get("page_number"),
+                        "section_title": c.get("section_title"),
+                        # Filename with fallback: file_name (from meta) > document_id > process fallback
+                        "filename": c.get("file_name") or (
+                            f"Dokument zu {c.get('process_name')}" if c.get("process_name")
+                            else "Unbekanntes Dokument"
+                        ),
+                        "title": c.get("title") or c.get("section_title"),
+                    },
+                }
+                for c in chunks
+            ]
+
+            # Add BPMN process as source when gating provides actual BPMN process context
+            # (not for DOCS_ONLY which only uses process_name for filtering, no BPMN context)
+            if gating.mode in (GatingMode.PROCESS_CONTEXT, GatingMode.GATING_ENABLED) and body.process_name:
+                bpmn_source = {
+                    "chunk_id": f"bpmn_{body.process_id or body.process_name}",
+                    "text": gating.prompt_hint[:300] if gating.prompt_hint else "Prozesskontext",
+                    "score": None,
+                    "rerank_score": None,
+                    "metadata": {
+                        "source_type": "bpmn",
+                        "process_name": body.process_name,
+                        "filename": f"BPMN-Prozess: {body.process_name}",
+                        "title": f"Prozessmodell: {body.process_name}",
+                    },
+                }
+                ctx.insert(0, bpmn_source)
+
+
+            yield sse("retrieval", {
+                "sources": ctx,
+                "search_query": await stages.result("reformulation"),
+                "used_hyde": body.use_hyde,
+                "used_rerank": body.use_rerank,
+            })
+
+            # Number chunks by relevance order (from reranker) - [1] = most relevant
+            # Note: LLM numbers its own citations in the answer text independently
+            context_text = "\n\n---\n\n".join(
+                f"[Chunk {i+1}] Quelle: {c.get('metadata', {}).get('filename', 'Dokument')}\n{c['text']}"
+                for i, c in enumerate(chunks)
+            )
+
+            # 4) Prompt - only include gating_hint for modes that use BPMN context
+            gating_hint_for_prompt = (
+                gating.prompt_hint 
+                if gating.mode in (GatingMode.PROCESS_CONTEXT, GatingMode.GATING_ENABLED) 
+                else None
+            )
+
+            # Use reformulated query for prompt (includes context from chat history)
+            original_query = body.query
+            body.query = search_input
+
+            prompt = build_prompt(
+                style=body.prompt_style,
+                body=body,
+                context_text=context_text,
+                gating_hint=gating_hint_for_prompt,
+            )
+
+            # Restore original query for logging/response
+            body.query = original_query
+
+            # DEBUG: Log full prompt
+            logger.info(f"[DEBUG PROMPT] Full prompt:\n{'='*80}\n{prompt}\n{'='*80}")
+
+            # 5) LLM Config (same pattern as regular /ask endpoint)
+            if body.prompt_style == "cot":
+                llm_config = LLMPresets.chain_of_thought(model=stream_model)
+            else:
+                llm_config = LLMPresets.rag_qa(model=stream_model)
+
+            # Log the model being used
+            logger.info(f"Using LLM model: {llm_config.model} ({backend})")
+
+            # Temperature Override falls angegeben
+            if temperature is not None:
+                llm_config.temperature = temperature
+
+
+            # Gesamt-Metadata wie bisher (Kompatibilität mit bestehenden Clients)
+            metadata = {
+                "context": ctx,
+                "gating_mode": gating.mode.value,
+                "gating_hint": gating.prompt_hint,
+                "gating_metadata": gating.metadata,
+                "used_model": llm_config.model,
+                "used_hyde": body.use_hyde,
+                "used_rerank": body.use_rerank,
+                "used_llm_backend": backend,
+            }
+            yield sse("metadata", metadata)
+
+            # Streame LLM-Antwort Token für Token
+            t_llm = _elapsed_ms(stages.t0)
+            ttft_ms = None
+            async for token in agenerate_stream(prompt, config=llm_config, backend=backend):
+                if ttft_ms is None:
+                    ttft_ms = _elapsed_ms(stages.t0)
+                yield f"event: token\ndata: {json.dumps(token)}\n\n"
+
+            logger.info(f"Stream: TTFT={ttft_ms}ms (LLM-Start bei {t_llm}ms)")
+            yield sse("done", {
+                "ttft_ms": ttft_ms,
+                "llm_start_ms": t_llm,
+                "stages_ms": stages.timings_ms(),
+            })
+        except Exception as e:
+            # Header sind bereits gesendet: Fehler als Event statt HTTP-Status
+            logger.error(f"QA stream failed: {e}")
+            yield sse("error", {"message": "Bei der Verarbeitung ist ein Fehler aufgetreten."})
+            yield sse("done", {})
+        finally:
+            # Client-Abbruch oder Fehler: offene Stages nicht weiterlaufen lassen
+            await stages.aclose()
 
     return StreamingResponse(
         generate_events(),
@@ -462,4 +584,3 @@ def ask_stream(
             "Connection": "keep-alive",
         },
     )
-
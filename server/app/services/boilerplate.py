@@ -0,0 +1,161 @@
+"""
+Entfernung wiederkehrender Kopf-/Fußzeilen und Boilerplate bei der Ingestion.
+
+Hochschul-PDFs wiederholen Seitenköpfe, Fußzeilen, Disclaimer und
+Formular-Legenden auf jeder Seite. Vor dem Chunking werden alle Textzeilen
+normalisiert (Kleinschreibung, Whitespace) und gehasht. Zeilen, deren Hash
+auf genügend vielen Seiten des Dokuments vorkommt, werden entfernt.
+
+Ziffern werden nur am Seitenanfang/-ende (Kopf-/Fußzeilenband) zu "#"
+normalisiert, damit z.B. "Seite 3 von 12" auf allen Seiten gleich aussieht.
+Im Fließtext würden sonst nummerierte Überschriften wie "§ 5" oder
+"Anlage 2" als Wiederholung gelten. Titel-Elemente bleiben immer erhalten.
+"""
+
+from __future__ import annotations
+import re
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Set, Tuple
+
+import xxhash
+
+from app.core.config import settings
+
+
+# Tabellen behalten ihre Struktur (text_as_html), Überschriften ihren Text
+_SKIP_ELEMENT_TYPES = {"Table", "Title"}
+_MAX_LINE_CHARS = 300
+
+_WS_RE = re.compile(r"\s+")
+_DIGIT_RE = re.compile(r"\d+")
+
+
+@dataclass
+class BoilerplateReport:
+    """Pro-Dokument-Bericht über entfernte Boilerplate."""
+
+    pages: int = 0
+    total_chars: int = 0
+    dropped_chars: int = 0
+    dropped_lines: int = 0
+    removed_elements: int = 0
+    repeated_patterns: int = 0
+
+    @property
+    def dropped_ratio(self) -> float:
+        return self.dropped_chars / self.total_chars if self.total_chars else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "dropped_ratio": round(self.dropped_ratio, 4)}
+
+
+def _line_hash(line: str, normalize_digits: bool = False) -> int | None:
+    norm = _WS_RE.sub(" ", line.strip().lower())
+    if normalize_digits:
+        norm = _DIGIT_RE.sub("#", norm)
+    if not norm or len(norm) > _MAX_LINE_CHARS:
+        return None
+    return xxhash.xxh64_intdigest(norm.encode("utf-8"))
+
+
+def _page_of(el) -> int | None:
+    return getattr(getattr(el, "metadata", None), "page_number", None)
+
+
+def _edge_band(elements: List[Any]) -> Set[int]:
+    """Indizes der ersten/letzten BOILERPLATE_EDGE_ELEMENTS Elemente jeder Seite."""
+    by_page: Dict[int, List[int]] = {}
+    for i, el in enumerate(elements):
+        page = _page_of(el)
+        if page is not None:
+            by_page.setdefault(page, []).append(i)
+    n = settings.BOILERPLATE_EDGE_ELEMENTS
+    edge: Set[int] = set()
+    for idxs in by_page.values():
+        edge.update(idxs[:n])
+        edge.update(idxs[-n:])
+    return edge
+
+
+def _min_pages(n_pages: int) -> int:
+    return max(
+        settings.BOILERPLATE_MIN_PAGES,
+        int(n_pages * settings.BOILERPLATE_MIN_PAGE_RATIO + 0.5),
+    )
+
+
+def strip_boilerplate(elements: List[Any]) -> Tuple[List[Any], BoilerplateReport]:
+    """
+    Entfernt Zeilen, die auf vielen Seiten eines Dokuments wiederkehren.
+
+    Eine Zeile gilt als Boilerplate, wenn ihr normalisierter Hash auf
+    mindestens max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_PAGE_RATIO * Seiten)
+    verschiedenen Seiten vorkommt. Elemente, die danach leer sind, entfallen.
+    Ziffern werden nur im Kopf-/Fußzeilenband normalisiert (_edge_band).
+
+    Args:
+        elements: Unstructured-Elemente (ungechunkt, in Dokumentreihenfolge)
+
+    Returns:
+        (bereinigte Elemente, BoilerplateReport)
+    """
+    report = BoilerplateReport()
+    edge = _edge_band(elements)
+
+    # 1) Hash-Frequenzen: auf wie vielen Seiten kommt jede Zeile vor?
+    hashes_per_page: Dict[int, Set[int]] = {}
+    for i, el in enumerate(elements):
+        text = getattr(el, "text", "") or ""
+        report.total_chars += len(text)
+        page = _page_of(el)
+        if page is None or type(el).__name__ in _SKIP_ELEMENT_TYPES:
+            continue
+        page_hashes = hashes_per_page.setdefault(page, set())
+        for line in text.split("\n"):
+            h = _line_hash(line, normalize_digits=i in edge)
+            if h is not None:
+                page_hashes.add(h)
+
+    report.pages = len(hashes_per_page)
+    if report.pages < settings.BOILERPLATE_MIN_PAGES:
+        return elements, report
+
+    page_freq: Counter = Counter()
+    for page_hashes in hashes_per_page.values():
+        page_freq.update(page_hashes)
+
+    threshold = _min_pages(report.pages)
+    boilerplate = {h for h, n in page_freq.items() if n >= threshold}
+    report.repeated_patterns = len(boilerplate)
+    if not boilerplate:
+        return elements, report
+
+    # 2) Boilerplate-Zeilen entfernen
+    kept: List[Any] = []
+    for i, el in enumerate(elements):
+        text = getattr(el, "text", "") or ""
+        if type(el).__name__ in _SKIP_ELEMENT_TYPES or not text:
+            kept.append(el)
+            continue
+
+        lines = text.split("\n")
+        remaining = [
+            line for line in lines if _line_hash(line, normalize_digits=i in edge) not in boilerplate
+        ]
+        if len(remaining) == len(lines):
+            kept.append(el)
+            continue
+
+        report.dropped_lines += len(lines) - len(remaining)
+        new_text = "\n".join(remaining)
+
+        if new_text.strip():
+            report.dropped_chars += len(text) - len(new_text)
+            el.text = new_text
+            kept.append(el)
+        else:
+            report.dropped_chars += len(text)
+            report.removed_elements += 1
+
+    return kept, report
@@ -0,0 +1,255 @@
+"""
+Near-Duplicate-Erkennung für Chunks mit MinHash/LSH.
+
+BY_TITLE-Chunking mit OVERLAP und identische Richtlinientexte in mehreren
+PDFs erzeugen viele nahezu gleiche Chunks. Beim Indexieren bekommt jeder
+Chunk eine MinHash-Signatur (64 Permutationen über Wort-5-Gramme).
+
+Kompakter Signatur-Index im OpenSearch-Dokument jedes Chunks:
+- `minhash_bands`: 16 LSH-Band-Schlüssel (keyword) → Kandidatensuche per terms-Query
+- `minhash_sig`: Signatur als base64 (binary, nicht indexiert) → Jaccard-Schätzung
+- `duplicate_of`: chunk_id des kanonischen Chunks (nur bei Duplikaten)
+
+Kandidaten werden nur innerhalb desselben Index und mit gleichem
+process_name/tags gesucht, damit gefilterte Suchen keine Inhalte verlieren.
+Wird ein kanonischer Chunk gelöscht, rückt eines seiner Duplikate nach
+(`deletion.promote_orphaned_duplicates`).
+"""
+
+from __future__ import annotations
+import base64
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import xxhash
+
+from app.core.config import settings
+from app.core.clients import get_logger
+
+logger = get_logger(__name__)
+
+NUM_PERM = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# OpenSearch-Felder des Signatur-Index
+DEDUP_MAPPING_PROPERTIES = {
+    "minhash_bands": {"type": "keyword"},
+    "minhash_sig": {"type": "binary"},
+    "duplicate_of": {"type": "keyword"},
+}
+
+
+@dataclass
+class DuplicateMatch:
+    """Verweis eines Chunks auf seinen kanonischen Chunk."""
+
+    canonical_id: str
+    similarity: float
+    is_local: bool  # kanonischer Chunk stammt aus demselben Aufruf (nicht aus OpenSearch)
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash-Signatur (uint32[NUM_PERM]) über Wort-Shingles."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) <= SHINGLE_SIZE:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [
+            " ".join(tokens[i:i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        ]
+    hashes = np.fromiter(
+        (xxhash.xxh32_intdigest(s.encode("utf-8")) for s in set(shingles)),
+        dtype=np.uint64,
+    )
+    # (a*x + b) mod p für alle Permutationen auf einmal; x < 2^32, a < 2^31 → kein Überlauf
+    perms = (hashes[:, np.newaxis] * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+    return perms.min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[str]:
+    """LSH-Band-Schlüssel: Bandindex + xxh64 der Band-Zeilen."""
+    return [
+        f"{b:x}{xxhash.xxh64_intdigest(sig[b * ROWS_PER_BAND:(b + 1) * ROWS_PER_BAND].tobytes()):016x}"
+        for b in range(NUM_BANDS)
+    ]
+
+
+def encode_signature(sig: np.ndarray) -> str:
+    return base64.b64encode(sig.astype("<u4").tobytes()).decode("ascii")
+
+
+def decode_signature(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype="<u4").astype(np.uint32)
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def _same_scope(src: Dict[str, Any], process_name: Optional[str], tags: Optional[str]) -> bool:
+    meta = src.get("meta", {}) or {}
+    return (meta.get("process_name") or None) == (process_name or None) and (
+        meta.get("tags") or None
+    ) == (tags or None)
+
+
+def _scope_filter(field: str, value: Optional[str]) -> Dict[str, Any]:
+    """
+    Filter auf meta.<field> == value bzw. fehlendes Feld. BY_TITLE-Indizes
+    mappen meta dynamisch (text + .keyword), SEMANTIC-Indizes als keyword.
+    """
+    if not value:
+        return {"bool": {"must_not": [{"exists": {"field": f"meta.{field}"}}]}}
+    return {
+        "bool": {
+            "should": [
+                {"term": {f"meta.{field}": value}},
+                {"term": {f"meta.{field}.keyword": value}},
+            ],
+            "minimum_should_match": 1,
+        }
+    }
+
+
+def _fetch_remote_candidates(
+    os_client,
+    os_index: str,
+    keys: List[str],
+    chunk_ids: List[str],
+    process_name: Optional[str],
+    tags: Optional[str],
+) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+    """Eine terms-Query für alle Band-Schlüssel des Dokuments → {band_key: [(chunk_id, _source)]}."""
+    if not keys:
+        return {}
+    try:
+        resp = os_client.search(
+            index=os_index,
+            body={
+                "size": settings.DEDUP_MAX_CANDIDATES,
+                "_source": ["document_id", "minhash_bands", "minhash_sig", "meta"],
+                "query": {
+                    "bool": {
+                        # Scope in der Query, sonst verdrängen fremde Prozesse
+                        # passende Kandidaten aus den DEDUP_MAX_CANDIDATES
+                        "filter": [
+                            {"terms": {"minhash_bands": keys}},
+                            _scope_filter("process_name", process_name),
+                            _scope_filter("tags", tags),
+                        ],
+                        # Frühere Batches desselben Dokuments (NDJSON-Import mit
+                        # start_index > 0) sind Kandidaten, nur die eigenen IDs nicht
+                        "must_not": [
+                            {"exists": {"field": "duplicate_of"}},
+                            {"ids": {"values": chunk_ids}},
+                        ],
+                    }
+                },
+            },
+        )
+    except Exception as e:
+        logger.warning(f"Dedup-Kandidatensuche in {os_index} fehlgeschlagen: {e}")
+        return {}
+
+    by_key: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    wanted = set(keys)
+    for hit in resp["hits"]["hits"]:
+        src = hit.get("_source", {})
+        for key in src.get("minhash_bands", []) or []:
+            if key in wanted:
+                by_key.setdefault(key, []).append((hit["_id"], src))
+    return by_key
+
+
+def find_duplicates(
+    os_client,
+    os_index: str,
+    chunk_ids: List[str],
+    signatures: List[np.ndarray],
+    *,
+    process_name: Optional[str] = None,
+    tags: Optional[str] = None,
+) -> List[Optional[DuplicateMatch]]:
+    """
+    Sucht für jeden Chunk einen kanonischen Near-Duplicate-Partner.
+
+    Kandidaten kommen aus früheren Chunks desselben Aufrufs und aus bereits
+    indexierten, nicht-duplizierten Chunks – auch solchen desselben Dokuments
+    aus früheren Batches (eine Query pro Aufruf).
+    Ein Kandidat zählt, wenn die geschätzte Jaccard-Ähnlichkeit
+    >= DEDUP_THRESHOLD ist.
+
+    Returns:
+        Pro Chunk ein DuplicateMatch oder None (Chunk ist kanonisch)
+    """
+    threshold = settings.DEDUP_THRESHOLD
+    keys_per_chunk = [band_keys(sig) for sig in signatures]
+    remote = _fetch_remote_candidates(
+        os_client,
+        os_index,
+        sorted({k for keys in keys_per_chunk for k in keys}),
+        chunk_ids,
+        process_name,
+        tags,
+    )
+
+    local_buckets: Dict[str, List[int]] = {}
+    remote_sigs: Dict[str, np.ndarray] = {}
+    matches: List[Optional[DuplicateMatch]] = []
+
+    for i, (sig, keys) in enumerate(zip(signatures, keys_per_chunk)):
+        best: Optional[DuplicateMatch] = None
+
+        seen_local = {j for k in keys for j in local_buckets.get(k, [])}
+        for j in seen_local:
+            sim = estimate_jaccard(sig, signatures[j])
+            if sim >= threshold and (best is None or sim > best.similarity):
+                best = DuplicateMatch(chunk_ids[j], sim, is_local=True)
+
+        for k in keys:
+            for cid, src in remote.get(k, []):
+                # Exakter Vergleich zusätzlich zur Query (text-Mapping matcht unscharf)
+                if not _same_scope(src, process_name, tags) or not src.get("minhash_sig"):
+                    continue
+                if cid not in remote_sigs:
+                    remote_sigs[cid] = decode_signature(src["minhash_sig"])
+                sim = estimate_jaccard(sig, remote_sigs[cid])
+                if sim >= threshold and (best is None or sim > best.similarity):
+                    best = DuplicateMatch(cid, sim, is_local=False)
+
+        matches.append(best)
+        if best is None:
+            # Nur kanonische Chunks dienen als Partner für spätere Chunks
+            for k in keys:
+                local_buckets.setdefault(k, []).append(i)
+
+    return matches
+
+
+def duplicate_source_entry(
+    doc_id: str,
+    chunk_id: str,
+    meta: Dict[str, Any],
+    file_name: Optional[str],
+) -> Dict[str, Any]:
+    """Metadaten eines zusammengelegten Duplikats für `duplicate_sources` des kanonischen Chunks."""
+    entry = {"document_id": doc_id, "chunk_id": chunk_id}
+    if file_name:
+        entry["file_name"] = file_name
+    if meta.get("page_number") is not None:
+        entry["page_number"] = meta["page_number"]
+    if meta.get("section_title"):
+        entry["section_title"] = meta["section_title"]
+    return entry
@@ -0,0 +1,327 @@
+"""
+Asynchrone Lösch-Jobs für OpenSearch + Qdrant.
+
+Löschungen (alles, nach process_name, tag oder document_id) werden nur
+eingereicht und blockieren keinen Worker:
+
+- OpenSearch: `delete_by_query` mit `wait_for_completion=false` → Task-ID
+- Qdrant: Delete per Filter mit `wait=False` (kein Drop + Neuanlage der Collection)
+
+Vor dem Löschen eines Dokuments rücken Near-Duplicates anderer Dokumente,
+deren kanonischer Chunk mitgelöscht wird, nach (`promote_orphaned_duplicates`).
+
+Der Job (Ziele, Task-IDs, Selektor) liegt in Redis unter `delete:job:{id}`.
+`delete_job_status` fragt den Fortschritt ab: OpenSearch über die Tasks-API,
+Qdrant über die beim Einreichen vermerkte operation_id.
+"""
+
+from __future__ import annotations
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointIdsList,
+    UpdateStatus,
+)
+
+from app.core.clients import get_logger, get_opensearch, get_qdrant
+from app.services.index_aliases import qdrant_exists
+from app.services.pipeline import ChunkingStrategy, _get_index_names, _uuid_for
+from app.services.sharding import expand_shard_targets
+
+logger = get_logger(__name__)
+
+DELETE_JOB_KEY = "delete:job:{}"
+DELETE_JOB_TTL_SECONDS = 24 * 3600
+
+# Selektor-Feld → (OpenSearch-Feld, Qdrant-Payload-Key)
+SELECTOR_FIELDS = {
+    "process_name": ("meta.process_name", "process_name"),
+    "tag": ("meta.tags.keyword", "tags"),
+    "document_id": ("document_id", "document_id"),
+}
+
+
+def all_strategy_targets() -> List[Tuple[str, str]]:
+    """(os_index, qdrant_collection) aller Chunking-Strategien, ohne Duplikate."""
+    targets: List[Tuple[str, str]] = []
+    for strategy in ChunkingStrategy:
+        names = _get_index_names(strategy)
+        if names not in targets:
+            targets.append(names)
+    return targets
+
+
+def _os_query(field: Optional[str], value: Optional[str]) -> Dict[str, Any]:
+    if field is None:
+        return {"match_all": {}}
+    return {"terms": {SELECTOR_FIELDS[field][0]: [value]}}
+
+
+def _qdrant_filter(field: Optional[str], value: Optional[str]) -> Filter:
+    # Leerer Filter trifft alle Punkte
+    if field is None:
+        return Filter(must=[])
+    return Filter(
+        must=[FieldCondition(key=SELECTOR_FIELDS[field][1], match=MatchValue(value=value))]
+    )
+
+
+PROMOTE_PAGE_SIZE = 1000
+PROMOTE_SCROLL_TTL = "2m"
+
+
+def _scan_duplicates_of(os_client, os_index: str, doc_id: str) -> Dict[str, List[str]]:
+    """Scrollt alle Duplikate anderer Dokumente mit Partner in doc_id → {kanonisch: [chunk_id]}."""
+    resp = os_client.search(
+        index=os_index,
+        body={
+            "size": PROMOTE_PAGE_SIZE,
+            "_source": ["duplicate_of"],
+            "sort": ["_doc"],
+            "query": {
+                "bool": {
+                    "filter": [{"prefix": {"duplicate_of": f"{doc_id}:"}}],
+                    "must_not": [{"term": {"document_id": doc_id}}],
+                }
+            },
+        },
+        scroll=PROMOTE_SCROLL_TTL,
+    )
+    scroll_id = resp.get("_scroll_id")
+    by_canonical: Dict[str, List[str]] = {}
+    try:
+        while resp["hits"]["hits"]:
+            for hit in resp["hits"]["hits"]:
+                by_canonical.setdefault(hit["_source"]["duplicate_of"], []).append(hit["_id"])
+            resp = os_client.scroll(scroll_id=scroll_id, scroll=PROMOTE_SCROLL_TTL)
+            scroll_id = resp.get("_scroll_id", scroll_id)
+    finally:
+        try:
+            os_client.clear_scroll(scroll_id=scroll_id)
+        except Exception:
+            pass
+    return by_canonical
+
+
+def promote_orphaned_duplicates(os_client, qd, os_index: str, qdrant_col: str, doc_id: str) -> int:
+    """
+    Hebt `duplicate_of` bei Chunks anderer Dokumente auf, deren kanonischer
+    Chunk zu `doc_id` gehört – sonst blendet das Retrieval sie nach dem
+    Löschen weiter aus. Pro kanonischem Chunk wird das erste Duplikat
+    kanonisch, die übrigen verweisen auf dieses.
+
+    Nur Löschungen per document_id sind betroffen: Dedup-Partner haben
+    dieselben process_name/tags und werden bei diesen Selektoren mitgelöscht.
+
+    Returns:
+        Anzahl aktualisierter Chunks
+    """
+    by_canonical = _scan_duplicates_of(os_client, os_index, doc_id)
+    if not by_canonical:
+        return 0
+
+    qdrant_ok = qdrant_exists(qd, qdrant_col)
+    updated = 0
+    for dup_ids in by_canonical.values():
+        promoted, *rest = sorted(dup_ids)
+        os_client.update(
+            index=os_index,
+            id=promoted,
+            body={"script": {"source": "ctx._source.remove('duplicate_of')"}},
+        )
+        for cid in rest:
+            os_client.update(index=os_index, id=cid, body={"doc": {"duplicate_of": promoted}})
+        if qdrant_ok:
+            qd.delete_payload(
+                collection_name=qdrant_col,
+                keys=["duplicate_of"],
+                points=[_uuid_for(*_split_chunk_id(promoted))],
+            )
+            if rest:
+                qd.set_payload(
+                    collection_name=qdrant_col,
+                    payload={"duplicate_of": promoted},
+                    points=[_uuid_for(*_split_chunk_id(cid)) for cid in rest],
+                )
+        updated += len(dup_ids)
+
+    os_client.indices.refresh(index=os_index)
+    logger.info(f"{os_index}: {updated} Duplikate von {doc_id} nachgerückt ({len(by_canonical)} kanonisch)")
+    return updated
+
+
+def _split_chunk_id(chunk_id: str) -> Tuple[str, int]:
+    doc_id, idx = chunk_id.rsplit(":", 1)
+    return doc_id, int(idx)
+
+
+def submit_delete(
+    targets: List[Tuple[str, str]],
+    field: Optional[str] = None,
+    value: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Reicht Löschungen für alle Ziele ein, ohne auf deren Abschluss zu warten.
+
+    Args:
+        targets: Liste von (os_index, qdrant_collection)
+        field: Selektor aus SELECTOR_FIELDS (None = alles löschen)
+        value: Wert des Selektors
+
+    Returns:
+        Job-Dict (noch nicht persistiert)
+    """
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    query = _os_query(field, value)
+    flt = _qdrant_filter(field, value)
+    targets = expand_shard_targets(targets)
+
+    entries: List[Dict[str, Any]] = []
+    for os_index, qdrant_col in targets:
+        entry: Dict[str, Any] = {"os_index": os_index, "qdrant_collection": qdrant_col}
+        if field == "document_id":
+            # Ohne Nachrücken blieben die Duplikate dauerhaft ausgeblendet → dann nicht löschen
+            try:
+                if os_client.indices.exists(index=os_index):
+                    entry["promoted_duplicates"] = promote_orphaned_duplicates(
+                        os_client, qd, os_index, qdrant_col, value
+                    )
+            except Exception as e:
+                logger.warning(f"Nachrücken der Duplikate in {os_index} fehlgeschlagen: {e}")
+                entry["os_error"] = str(e)
+                entries.append(entry)
+                continue
+
+        try:
+            if os_client.indices.exists(index=os_index):
+                resp = os_client.delete_by_query(
+                    index=os_index,
+                    body={"query": query},
+                    wait_for_completion=False,
+                    conflicts="proceed",
+                    refresh=True,
+                )
+                entry["os_task"] = resp.get("task")
+        except Exception as e:
+            logger.warning(f"delete_by_query auf {os_index} fehlgeschlagen: {e}")
+            entry["os_error"] = str(e)
+
+        try:
+            if qdrant_exists(qd, qdrant_col):
+                res = qd.delete(collection_name=qdrant_col, points_selector=flt, wait=False)
+                entry["qdrant_operation_id"] = res.operation_id
+        except Exception as e:
+            logger.warning(f"Qdrant-Delete auf {qdrant_col} fehlgeschlagen: {e}")
+            entry["qdrant_error"] = str(e)
+
+        entries.append(entry)
+
+    return {
+        "task_id": str(uuid.uuid4()),
+        "selector": {"field": field, "value": value},
+        "targets": entries,
+        "created_at": time.time(),
+    }
+
+
+def delete_document_chunks(strategy: ChunkingStrategy, document_id: str) -> int:
+    """
+    Löscht die Chunks eines Dokuments in den Indizes einer Strategie und wartet
+    auf den Abschluss (z.B. vor einem erneuten Import unter derselben document_id).
+
+    Returns:
+        Anzahl gelöschter OpenSearch-Dokumente
+    """
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    query = _os_query("document_id", document_id)
+    flt = _qdrant_filter("document_id", document_id)
+    deleted = 0
+    for os_index, qdrant_col in expand_shard_targets([_get_index_names(strategy)]):
+        if os_client.indices.exists(index=os_index):
+            promote_orphaned_duplicates(os_client, qd, os_index, qdrant_col, document_id)
+            resp = os_client.delete_by_query(
+                index=os_index, body={"query": query}, conflicts="proceed", refresh=True
+            )
+            deleted += resp.get("deleted", 0)
+        if qdrant_exists(qd, qdrant_col):
+            qd.delete(collection_name=qdrant_col, points_selector=flt, wait=True)
+    return deleted
+
+
+def _os_task_status(os_client, task_id: str) -> Dict[str, Any]:
+    resp = os_client.tasks.get(task_id=task_id)
+    status = resp.get("task", {}).get("status", {})
+    result = resp.get("response", {})
+    out = {
+        "completed": bool(resp.get("completed")),
+        "total": status.get("total"),
+        "deleted": result.get("deleted", status.get("deleted")),
+    }
+    if result.get("failures") or resp.get("error"):
+        out["failures"] = result.get("failures") or [resp["error"]]
+    return out
+
+
+def _qdrant_operation_applied(qd, collection: str, operation_id: int) -> bool:
+    """
+    Ist die Qdrant-Operation `operation_id` angewendet?
+
+    Qdrant kann Operationen nicht per ID abfragen, wendet Updates einer
+    Collection aber der Reihe nach an: Eine leere Löschung mit wait=True
+    kehrt erst zurück, wenn alle vorherigen Operationen angewendet sind.
+    Später eingefügte Punkte, die auf den Selektor passen, zählen so nicht.
+    """
+    res = qd.delete(collection_name=collection, points_selector=PointIdsList(points=[]), wait=True)
+    return res.status == UpdateStatus.COMPLETED and (
+        res.operation_id is None or res.operation_id >= operation_id
+    )
+
+
+def delete_job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Aktualisiert den Job um den Fortschritt aller Ziele (blockierend)."""
+    os_client = get_opensearch()
+    qd = get_qdrant()
+
+    done = True
+    failed = False
+    for entry in job["targets"]:
+        if entry.get("os_task"):
+            try:
+                entry["opensearch"] = _os_task_status(os_client, entry["os_task"])
+                done &= entry["opensearch"]["completed"]
+                failed |= "failures" in entry["opensearch"]
+            except Exception as e:
+                # Status unbekannt → weiter als laufend melden
+                entry["opensearch"] = {"completed": None, "error": str(e)}
+                done = False
+        op_id = entry.get("qdrant_operation_id")
+        if op_id is not None and not entry.get("qdrant", {}).get("completed"):
+            try:
+                completed = _qdrant_operation_applied(qd, entry["qdrant_collection"], op_id)
+                entry["qdrant"] = {"completed": completed, "operation_id": op_id}
+                done &= completed
+            except Exception as e:
+                entry["qdrant"] = {"completed": None, "error": str(e)}
+                done = False
+        failed |= "os_error" in entry or "qdrant_error" in entry
+
+    job["status"] = "failed" if failed else ("done" if done else "running")
+    return job
+
+
+async def save_delete_job(r, job: Dict[str, Any]) -> None:
+    key = DELETE_JOB_KEY.format(job["task_id"])
+    await r.set(key, json.dumps(job), ex=DELETE_JOB_TTL_SECONDS)
+
+
+async def load_delete_job(r, task_id: str) -> Optional[Dict[str, Any]]:
+    raw = await r.get(DELETE_JOB_KEY.format(task_id))
+    return json.loads(raw) if raw else None
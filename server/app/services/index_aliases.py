@@ -0,0 +1,320 @@
+"""
+Versionierte Indizes hinter Aliasen (OpenSearch-Alias + Qdrant-Collection-Alias).
+
+Die von Retrieval und QA verwendeten Namen (z.B. `chunks_semantic_qwen3`)
+sind Aliase auf physische Indizes/Collections `<alias>__v<N>`. Rebuilds
+schreiben in eine neue Version abseits des Live-Betriebs. Danach wird
+aufgewärmt und der Alias atomar umgehängt; Rollback hängt ihn auf die
+vorherige Version zurück.
+
+Bestehende Installationen mit einem konkreten Index unter dem Alias-Namen
+("legacy") funktionieren unverändert weiter. Beim ersten Swap wird der
+Legacy-Index durch den Alias ersetzt (nur mit drop_legacy=True; in Qdrant
+mit kurzer Lücke, siehe swap_alias).
+"""
+
+from __future__ import annotations
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.core.clients import get_logger, get_opensearch, get_qdrant
+
+logger = get_logger(__name__)
+
+VERSION_SEP = "__v"
+WARMUP_QUERIES = 5
+QDRANT_GREEN_TIMEOUT = 300.0
+QDRANT_ALIAS_RETRIES = 5  # Anlegen des Alias nach Löschen der Legacy-Collection
+
+
+def versioned_name(alias: str, version: int) -> str:
+    return f"{alias}{VERSION_SEP}{version}"
+
+
+def _version_of(name: str, alias: str) -> Optional[int]:
+    m = re.fullmatch(re.escape(alias + VERSION_SEP) + r"(\d+)", name)
+    return int(m.group(1)) if m else None
+
+
+@dataclass
+class AliasState:
+    """Aktueller Zustand eines Alias-Paars (OpenSearch + Qdrant)."""
+
+    os_alias: str
+    qdrant_alias: str
+    os_target: Optional[str] = None
+    qdrant_target: Optional[str] = None
+    os_versions: List[int] = field(default_factory=list)
+    qdrant_versions: List[int] = field(default_factory=list)
+    os_legacy: bool = False  # konkreter Index unter dem Alias-Namen
+    qdrant_legacy: bool = False
+
+    @property
+    def current_version(self) -> Optional[int]:
+        if self.os_target is None:
+            return None
+        return _version_of(self.os_target, self.os_alias)
+
+
+# ============================================================
+# OpenSearch
+# ============================================================
+
+
+def os_alias_target(os_client, alias: str) -> Optional[str]:
+    if not os_client.indices.exists_alias(name=alias):
+        return None
+    targets = list(os_client.indices.get_alias(name=alias))
+    return targets[0] if len(targets) == 1 else None
+
+
+def os_versions(os_client, alias: str) -> List[int]:
+    indices = os_client.indices.get(
+        index=f"{alias}{VERSION_SEP}*", allow_no_indices=True, ignore_unavailable=True
+    )
+    return sorted(v for v in (_version_of(n, alias) for n in indices) if v is not None)
+
+
+def create_os_index(os_client, alias: str, body: Dict[str, Any]) -> str:
+    """Legt `<alias>__v1` an und zeigt den Alias darauf (neue Installation)."""
+    physical = versioned_name(alias, 1)
+    os_client.indices.create(index=physical, body=body)
+    os_client.indices.put_alias(index=physical, name=alias)
+    logger.info(f"OpenSearch: {physical} angelegt, Alias {alias} → {physical}")
+    return physical
+
+
+# ============================================================
+# Qdrant
+# ============================================================
+
+
+def qdrant_alias_target(qd, alias: str) -> Optional[str]:
+    for a in qd.get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
+
+
+def qdrant_exists(qd, name: str) -> bool:
+    """True, wenn `name` eine Collection oder ein Alias ist."""
+    if name in {c.name for c in qd.get_collections().collections}:
+        return True
+    return qdrant_alias_target(qd, name) is not None
+
+
+def qdrant_versions(qd, alias: str) -> List[int]:
+    names = [c.name for c in qd.get_collections().collections]
+    return sorted(v for v in (_version_of(n, alias) for n in names) if v is not None)
+
+
+def create_qdrant_collection(qd, alias: str, **kwargs: Any) -> str:
+    """Legt `<alias>__v1` an und zeigt den Alias darauf (neue Installation)."""
+    from qdrant_client.http.models import CreateAlias, CreateAliasOperation
+
+    physical = versioned_name(alias, 1)
+    qd.create_collection(physical, **kwargs)
+    qd.update_collection_aliases(
+        change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=physical, alias_name=alias))
+        ]
+    )
+    logger.info(f"Qdrant: {physical} angelegt, Alias {alias} → {physical}")
+    return physical
+
+
+# ============================================================
+# Zustand, Swap, Rollback
+# ============================================================
+
+
+def alias_state(os_alias: str, qdrant_alias: Optional[str] = None) -> AliasState:
+    qdrant_alias = qdrant_alias or os_alias
+    os_client = get_opensearch()
+    qd = get_qdrant()
+
+    state = AliasState(os_alias=os_alias, qdrant_alias=qdrant_alias)
+    state.os_target = os_alias_target(os_client, os_alias)
+    state.qdrant_target = qdrant_alias_target(qd, qdrant_alias)
+    state.os_versions = os_versions(os_client, os_alias)
+    state.qdrant_versions = qdrant_versions(qd, qdrant_alias)
+    state.os_legacy = state.os_target is None and bool(os_client.indices.exists(index=os_alias))
+    state.qdrant_legacy = qdrant_alias in {c.name for c in qd.get_collections().collections}
+    return state
+
+
+def next_version(os_alias: str, qdrant_alias: Optional[str] = None) -> int:
+    state = alias_state(os_alias, qdrant_alias)
+    return max(state.os_versions + state.qdrant_versions, default=0) + 1
+
+
+def swap_alias(
+    os_alias: str,
+    version: int,
+    qdrant_alias: Optional[str] = None,
+    drop_legacy: bool = False,
+) -> AliasState:
+    """
+    Hängt beide Aliase auf Version `version` um.
+
+    OpenSearch: ein update_aliases-Aufruf (remove + add) → atomar.
+    Qdrant: ein update_collection_aliases-Aufruf (delete + create) → atomar.
+    Qdrant wird zuerst umgehängt: scheitert es, zeigt OpenSearch noch auf
+    den alten Stand.
+
+    Ein Legacy-Index/-Collection unter dem Alias-Namen wird nur mit
+    drop_legacy=True entfernt. OpenSearch: atomar per remove_index. Qdrant
+    kann eine Collection nicht im selben Aufruf durch einen Alias ersetzen
+    (delete_collection gehört nicht zu den Alias-Operationen): zwischen
+    Löschen und Anlegen des Alias existiert der Name nicht. Die neue Version
+    ist vorher vollständig angelegt und geprüft, das Anlegen wird direkt
+    danach bis zu QDRANT_ALIAS_RETRIES-mal versucht; scheitert es, bricht
+    der Swap mit RuntimeError ab, ohne OpenSearch umzuhängen.
+    """
+    from qdrant_client.http.models import (
+        CreateAlias,
+        CreateAliasOperation,
+        DeleteAlias,
+        DeleteAliasOperation,
+    )
+
+    state = alias_state(os_alias, qdrant_alias)
+    qdrant_alias = state.qdrant_alias
+    os_physical = versioned_name(os_alias, version)
+    qd_physical = versioned_name(qdrant_alias, version)
+
+    if version not in state.os_versions or version not in state.qdrant_versions:
+        raise ValueError(f"Version {version} existiert nicht vollständig ({os_physical} / {qd_physical})")
+    if (state.os_legacy or state.qdrant_legacy) and not drop_legacy:
+        raise ValueError(
+            f"Unter {os_alias}/{qdrant_alias} existiert noch ein konkreter Index – "
+            f"Swap nur mit drop_legacy=True"
+        )
+
+    qd = get_qdrant()
+    ops: List[Any] = []
+    if state.qdrant_target:
+        ops.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=qdrant_alias)))
+    ops.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=qd_physical, alias_name=qdrant_alias))
+    )
+    if state.qdrant_legacy:
+        # Ziel muss vor dem Löschen erreichbar sein, sonst bliebe der Name leer
+        qd.get_collection(qd_physical)
+        logger.warning(
+            f"Qdrant: Collection {qdrant_alias} wird gelöscht und durch den Alias ersetzt – "
+            f"bis dahin ist {qdrant_alias} nicht erreichbar"
+        )
+        gap_start = time.perf_counter()
+        qd.delete_collection(qdrant_alias)
+        for attempt in range(1, QDRANT_ALIAS_RETRIES + 1):
+            try:
+                qd.update_collection_aliases(change_aliases_operations=ops)
+                break
+            except Exception as e:
+                if attempt == QDRANT_ALIAS_RETRIES:
+                    raise RuntimeError(
+                        f"Qdrant: Collection {qdrant_alias} gelöscht, Alias → {qd_physical} nicht angelegt "
+                        f"({e}); {qdrant_alias} ist nicht erreichbar, OpenSearch unverändert. Reparatur: "
+                        f"python -m app.eval.scripts.index_alias swap --alias {os_alias} "
+                        f"--qdrant-alias {qdrant_alias} --version {version} --drop-legacy"
+                    ) from e
+                logger.warning(f"Qdrant: Alias {qdrant_alias} nicht angelegt (Versuch {attempt}): {e}")
+                time.sleep(0.2 * attempt)
+        logger.warning(f"Qdrant: {qdrant_alias} war {(time.perf_counter() - gap_start) * 1000:.0f} ms nicht erreichbar")
+    else:
+        qd.update_collection_aliases(change_aliases_operations=ops)
+
+    os_client = get_opensearch()
+    actions: List[Dict[str, Any]] = []
+    if state.os_target:
+        actions.append({"remove": {"index": state.os_target, "alias": os_alias}})
+    if state.os_legacy:
+        actions.append({"remove_index": {"index": os_alias}})
+    actions.append({"add": {"index": os_physical, "alias": os_alias}})
+    os_client.indices.update_aliases(body={"actions": actions})
+
+    logger.info(
+        f"Alias-Swap: {os_alias} {state.os_target or '(legacy)'} → {os_physical}, "
+        f"{qdrant_alias} {state.qdrant_target or '(legacy)'} → {qd_physical}"
+    )
+    return alias_state(os_alias, qdrant_alias)
+
+
+def rollback_alias(os_alias: str, qdrant_alias: Optional[str] = None) -> AliasState:
+    """Hängt die Aliase auf die nächstältere, in beiden Backends vorhandene Version zurück."""
+    state = alias_state(os_alias, qdrant_alias)
+    current = state.current_version
+    if current is None:
+        raise ValueError(f"{os_alias} zeigt auf keine versionierte Version")
+    candidates = sorted(set(state.os_versions) & set(state.qdrant_versions))
+    older = [v for v in candidates if v < current]
+    if not older:
+        raise ValueError(f"Keine ältere Version von {os_alias} vorhanden (aktuell v{current})")
+    return swap_alias(os_alias, older[-1], state.qdrant_alias)
+
+
+def drop_old_versions(os_alias: str, qdrant_alias: Optional[str] = None, keep: int = 2) -> List[int]:
+    """Löscht alte Versionen; die aktuelle und die `keep` neuesten bleiben erhalten."""
+    state = alias_state(os_alias, qdrant_alias)
+    keep_set = set(sorted(set(state.os_versions) | set(state.qdrant_versions))[-keep:])
+    if state.current_version is not None:
+        keep_set.add(state.current_version)
+
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    dropped = []
+    for v in sorted(set(state.os_versions) | set(state.qdrant_versions)):
+        if v in keep_set:
+            continue
+        if v in state.os_versions:
+            os_client.indices.delete(index=versioned_name(os_alias, v))
+        if v in state.qdrant_versions:
+            qd.delete_collection(versioned_name(state.qdrant_alias, v))
+        dropped.append(v)
+    if dropped:
+        logger.info(f"Alte Versionen von {os_alias} gelöscht: {dropped}")
+    return dropped
+
+
+# ============================================================
+# Warm-up
+# ============================================================
+
+
+def warm_up(os_index: str, qdrant_collection: str, queries: int = WARMUP_QUERIES) -> None:
+    """
+    Wärmt eine neue Version vor dem Swap auf.
+
+    - OpenSearch: refresh + einige Suchen (Segment-/Filter-Caches)
+    - Qdrant: wartet auf Status green (Optimizer/HNSW fertig) und sucht mit
+      gespeicherten Vektoren
+    """
+    from qdrant_client.http.models import CollectionStatus
+
+    os_client = get_opensearch()
+    os_client.indices.refresh(index=os_index)
+    for _ in range(queries):
+        os_client.search(index=os_index, body={"query": {"match_all": {}}, "size": 10})
+
+    qd = get_qdrant()
+    deadline = time.monotonic() + QDRANT_GREEN_TIMEOUT
+    while qd.get_collection(qdrant_collection).status != CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            logger.warning(f"{qdrant_collection} nach {QDRANT_GREEN_TIMEOUT:.0f}s nicht green – fahre fort")
+            break
+        time.sleep(2.0)
+
+    points, _ = qd.scroll(collection_name=qdrant_collection, limit=queries, with_vectors=True)
+    for p in points:
+        vector = p.vector
+        if isinstance(vector, dict):
+            name, vector = next(iter(vector.items()))
+            if not isinstance(vector, list):
+                continue
+            qd.search(collection_name=qdrant_collection, query_vector=(name, vector), limit=10)
+        else:
+            qd.search(collection_name=qdrant_collection, query_vector=vector, limit=10)
+    logger.info(f"Warm-up abgeschlossen: {os_index} / {qdrant_collection}")
@@ -0,0 +1,167 @@
+"""
+Job-Status und Stage-Timings der Ingestion (Redis).
+
+Pro `document_id` existiert ein Hash `ingest:job:{document_id}`, den der
+Upload-Endpoint anlegt und `consume_uploads` fortschreibt:
+
+    queued → parsing → indexing → done | failed
+
+Abgeschlossene Jobs landen zusätzlich in einer gekappten Liste
+(`ingest:samples`), aus der Durchsatz und Stage-Latenz-Perzentile
+(parse, chunk, dedup, embed, index) berechnet werden.
+"""
+
+from __future__ import annotations
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+JOB_KEY = "ingest:job:{}"
+SAMPLES_KEY = "ingest:samples"
+JOB_TTL_SECONDS = 7 * 24 * 3600
+MAX_SAMPLES = 1000
+
+STAGES = ("parse", "chunk", "dedup", "embed", "index")
+_INT_FIELDS = {
+    "bytes", "chunks", "indexed_chunks", "chunk_chars", "boilerplate_chars_dropped",
+    # NDJSON-Import
+    "lines", "invalid", "documents", "batches",
+}
+PERCENTILES = (50, 95, 99)
+
+
+def _key(doc_id: str) -> str:
+    return JOB_KEY.format(doc_id)
+
+
+async def update_job(r, doc_id: str, **fields: Any) -> None:
+    """Setzt Felder des Job-Hashs (dicts/lists als JSON) und erneuert die TTL."""
+    mapping = {
+        k: json.dumps(v) if isinstance(v, (dict, list)) else str(v)
+        for k, v in fields.items()
+        if v is not None
+    }
+    if not mapping:
+        return
+    key = _key(doc_id)
+    await r.hset(key, mapping=mapping)
+    await r.expire(key, JOB_TTL_SECONDS)
+
+
+async def create_job(r, doc_id: str, **fields: Any) -> None:
+    await update_job(r, doc_id, status="queued", created_at=time.time(), **fields)
+
+
+async def finish_job(
+    r,
+    doc_id: str,
+    stats: Dict[str, Any],
+    *,
+    chunks: int,
+    chunk_chars: int,
+    file_bytes: int,
+) -> None:
+    """Markiert den Job als fertig und speichert ein Sample für die Aggregation."""
+    finished_at = time.time()
+    started_at = await r.hget(_key(doc_id), "started_at")
+    duration = finished_at - float(started_at) if started_at else None
+    timings = stats.get("timings", {})
+
+    await update_job(
+        r,
+        doc_id,
+        status="done",
+        finished_at=finished_at,
+        duration=round(duration, 3) if duration is not None else None,
+        chunks=chunks,
+        indexed_chunks=stats.get("indexed_chunks", chunks),
+        chunk_chars=chunk_chars,
+        timings=timings,
+        boilerplate_chars_dropped=stats.get("boilerplate", {}).get("dropped_chars", 0),
+    )
+
+    sample = {
+        "document_id": doc_id,
+        "finished_at": finished_at,
+        "duration": duration if duration is not None else sum(timings.values()),
+        "chunks": chunks,
+        "bytes": file_bytes,
+        "timings": timings,
+    }
+    await r.lpush(SAMPLES_KEY, json.dumps(sample))
+    await r.ltrim(SAMPLES_KEY, 0, MAX_SAMPLES - 1)
+
+
+async def fail_job(r, doc_id: str, error: str, stats: Optional[Dict[str, Any]] = None) -> None:
+    await update_job(
+        r,
+        doc_id,
+        status="failed",
+        finished_at=time.time(),
+        error=error,
+        timings=(stats or {}).get("timings"),
+    )
+
+
+async def get_job(r, doc_id: str) -> Optional[Dict[str, Any]]:
+    """Job-Hash als Dict (None, falls unbekannt oder abgelaufen)."""
+    raw = await r.hgetall(_key(doc_id))
+    if not raw:
+        return None
+
+    job: Dict[str, Any] = {"document_id": doc_id}
+    for k, v in raw.items():
+        if k == "timings":
+            job[k] = json.loads(v)
+        elif k in _INT_FIELDS:
+            job[k] = int(v)
+        elif k in ("created_at", "started_at", "finished_at", "duration"):
+            job[k] = float(v)
+        else:
+            job[k] = v
+    return job
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-Rank-Perzentil einer sortierten Liste."""
+    idx = max(0, min(len(sorted_values) - 1, int(-(-p * len(sorted_values) // 100)) - 1))
+    return sorted_values[idx]
+
+
+def _latency_summary(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    summary = {f"p{p}": round(_percentile(values, p), 3) for p in PERCENTILES}
+    summary["mean"] = round(sum(values) / len(values), 3)
+    summary["count"] = len(values)
+    return summary
+
+
+async def ingestion_summary(r) -> Dict[str, Any]:
+    """Durchsatz und Stage-Latenz-Perzentile über die letzten MAX_SAMPLES Jobs."""
+    samples = [json.loads(s) for s in await r.lrange(SAMPLES_KEY, 0, MAX_SAMPLES - 1)]
+    if not samples:
+        return {"documents": 0, "stages": {}, "throughput": {}}
+
+    stages: Dict[str, Dict[str, float]] = {}
+    for stage in STAGES:
+        values = [s["timings"][stage] for s in samples if stage in s.get("timings", {})]
+        if values:
+            stages[stage] = _latency_summary(values)
+
+    total_s = sum(s["duration"] for s in samples)
+    total_chunks = sum(s["chunks"] for s in samples)
+    total_bytes = sum(s["bytes"] for s in samples)
+    window_s = max(s["finished_at"] for s in samples) - min(s["finished_at"] for s in samples)
+
+    return {
+        "documents": len(samples),
+        "stages": stages,
+        "document_latency": _latency_summary([s["duration"] for s in samples]),
+        "throughput": {
+            # Verarbeitungszeit (ohne Wartezeit in der Queue)
+            "chunks_per_s": round(total_chunks / total_s, 2) if total_s else None,
+            "mb_per_s": round(total_bytes / total_s / 1e6, 3) if total_s else None,
+            # Abgeschlossene Dokumente pro Stunde im Beobachtungsfenster
+            "documents_per_hour": round(len(samples) / window_s * 3600, 2) if window_s else None,
+        },
+    }
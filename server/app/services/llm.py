@@ -2,33 +2,27 @@
 LLM-Service mit konfigurierbaren Generierungsparametern.
 
 Verwendet LLMConfig für konsistente Parameter über alle Use Cases.
+
+Jede Funktion gibt es synchron (Eval, Threads) und asynchron (`a`-Präfix,
+QA-Endpoints). Beide Varianten bauen Requests und werten Antworten über
+dieselben Helper aus und nutzen die gepoolten Clients aus
+app.core.llm_transport.
 """
 
-import requests
-from typing import Optional
+import json
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
 from app.core.config import settings
+from app.core.llm_transport import allm_client, llm_client, llm_timeout
 from app.core.llm_config import LLMConfig, LLMPresets
 from app.core.prompt_builder import extract_answer_from_cot
 
 
-def ollama_generate(
-    prompt: str,
-    config: Optional[LLMConfig] = None,
-) -> str:
-    """
-    Generiert Antwort via Ollama.
+# ============================================================
+# Request-/Response-Helper (sync + async)
+# ============================================================
 
-    Args:
-        prompt: Der Prompt
-        config: LLMConfig mit allen Parametern
-
-    Returns:
-        Generierte Antwort als String
-    """
-    # Default-Config falls nicht angegeben
-    if config is None:
-        config = LLMPresets.rag_qa(settings.OLLAMA_MODEL)
 
+def _ollama_payload(prompt: str, config: LLMConfig, stream: bool) -> dict:
     # Ollama-Request
     options = {
         "num_ctx": config.num_ctx,
@@ -43,19 +37,30 @@ def ollama_generate(
     if config.top_k is not None:
         options["top_k"] = config.top_k
 
-    resp = requests.post(
-        f"{settings.OLLAMA_BASE}/api/generate",
-        json={
-            "model": config.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": options,
-        },
-        timeout=120,
-    )
-    resp.raise_for_status()
-    response = resp.json().get("response", "")
+    return {
+        "model": config.model,
+        "prompt": prompt,
+        "stream": stream,
+        "options": options,
+    }
+
+
+def _vllm_payload(prompt: str, config: LLMConfig, stream: bool = False) -> dict:
+    # vLLM OpenAI-kompatibler Request
+    return {
+        "model": config.model,
+        "prompt": prompt,
+        "max_tokens": config.max_tokens,
+        "temperature": config.temperature,
+        "top_p": config.top_p if config.top_p is not None else 1.0,
+        "presence_penalty": config.presence_penalty,
+        "frequency_penalty": config.frequency_penalty,
+        "stop": None,
+        "stream": stream,
+    }
+
 
+def _clean_response(response: str) -> str:
     # CoT-Postprocessing: Entferne <think>-Tags
     if "<think>" in response:
         response = extract_answer_from_cot(response)
@@ -63,6 +68,192 @@ def ollama_generate(
     return response.strip()
 
 
+def _resolve_backend(config: Optional[LLMConfig], backend: Optional[str]) -> str:
+    # Backend-Bestimmung mit Fallback-Hierarchie
+    effective_backend = backend
+    if effective_backend is None and config is not None:
+        effective_backend = config.backend
+    if effective_backend is None:
+        effective_backend = settings.LLM_BACKEND
+    return effective_backend
+
+
+class ThinkFilter:
+    """
+    Entfernt <think>-Blöcke aus einem Token-Stream.
+
+    Tags können über Chunk-Grenzen verteilt ankommen ("<thi" + "nk>"),
+    daher wird ab einem "<" gepuffert, bis klar ist, ob ein Tag folgt.
+    """
+
+    def __init__(self):
+        # Buffer für think-tag Filtering
+        self.buffer = ""
+        self.in_think_block = False
+
+    def feed(self, text: str) -> List[str]:
+        """Nimmt einen Chunk auf und liefert die sicher ausgebbaren Textteile."""
+        out: List[str] = []
+        self.buffer += text
+
+        # Verarbeite Buffer
+        while True:
+            if not self.in_think_block:
+                # Suche nach öffnendem <think> Tag
+                if "<think>" in self.buffer:
+                    before, after = self.buffer.split("<think>", 1)
+                    if before:
+                        out.append(before)
+                    self.buffer = after
+                    self.in_think_block = True
+                else:
+                    # Kein Tag gefunden, aber behalte mögliche Teilstrings
+                    # z.B. "<thi" könnte der Anfang von "<think>" sein
+                    safe_output = ""
+                    if "<" in self.buffer:
+                        # Behalte alles ab dem letzten "<" im Buffer
+                        last_lt = self.buffer.rfind("<")
+                        safe_output = self.buffer[:last_lt]
+                        self.buffer = self.buffer[last_lt:]
+                    else:
+                        safe_output = self.buffer
+                        self.buffer = ""
+
+                    if safe_output:
+                        out.append(safe_output)
+                    break
+            else:
+                # In think-Block, suche nach schließendem </think>
+                if "</think>" in self.buffer:
+                    _, after = self.buffer.split("</think>", 1)
+                    self.buffer = after
+                    self.in_think_block = False
+                else:
+                    # Noch im think-Block, verwerfe Content und warte
+                    break
+        return out
+
+    def flush(self) -> List[str]:
+        """Am Ende: restlichen Buffer ausgeben (falls nicht in think-Block)."""
+        rest = self.buffer if not self.in_think_block else ""
+        self.buffer = ""
+        return [rest] if rest else []
+
+
+def _ollama_stream_chunk(line: str):
+    """Eine NDJSON-Zeile → (Text, done); None bei ungültiger Zeile."""
+    if not line:
+        return None
+    try:
+        chunk = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return chunk.get("response", ""), chunk.get("done", False)
+
+
+def _vllm_stream_chunk(line: str):
+    """
+    Eine SSE-Zeile der OpenAI-kompatiblen API → (Text, done); None bei
+    Leer-/Kommentarzeilen. Format: `data: {...}` bzw. `data: [DONE]`.
+    """
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return "", True
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+    choices = chunk.get("choices") or [{}]
+    return choices[0].get("text") or "", choices[0].get("finish_reason") is not None
+
+
+def _filter_stream_lines(lines: Iterable[str], parse) -> Iterator[str]:
+    """Stream-Zeilen eines Backends → Text-Chunks ohne <think>-Blöcke."""
+    think = ThinkFilter()
+    for line in lines:
+        parsed = parse(line)
+        if parsed is None:
+            continue
+        text, done = parsed
+        yield from think.feed(text)
+        if done:
+            break
+    yield from think.flush()
+
+
+async def _afilter_stream_lines(lines: AsyncIterator[str], parse) -> AsyncIterator[str]:
+    """Async-Variante von _filter_stream_lines."""
+    think = ThinkFilter()
+    async for line in lines:
+        parsed = parse(line)
+        if parsed is None:
+            continue
+        text, done = parsed
+        for part in think.feed(text):
+            yield part
+        if done:
+            break
+    for part in think.flush():
+        yield part
+
+
+# ============================================================
+# Ollama
+# ============================================================
+
+
+def ollama_generate(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+) -> str:
+    """
+    Generiert Antwort via Ollama.
+
+    Args:
+        prompt: Der Prompt
+        config: LLMConfig mit allen Parametern
+
+    Returns:
+        Generierte Antwort als String
+    """
+    # Default-Config falls nicht angegeben
+    if config is None:
+        config = LLMPresets.rag_qa(settings.OLLAMA_MODEL)
+
+    resp = llm_client("ollama").post(
+        "/api/generate",
+        json=_ollama_payload(prompt, config, stream=False),
+        timeout=llm_timeout(120),
+    )
+    resp.raise_for_status()
+    return _clean_response(resp.json().get("response", ""))
+
+
+async def aollama_generate(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+    hedge: bool = False,
+) -> str:
+    """
+    Async-Variante von ollama_generate.
+
+    `hedge=True` nur für kurze, idempotente Aufrufe (siehe llm_transport).
+    """
+    if config is None:
+        config = LLMPresets.rag_qa(settings.OLLAMA_MODEL)
+
+    resp = await allm_client("ollama").post(
+        "/api/generate",
+        json=_ollama_payload(prompt, config, stream=False),
+        timeout=llm_timeout(120),
+        hedge=hedge,
+    )
+    resp.raise_for_status()
+    return _clean_response(resp.json().get("response", ""))
+
+
 def ollama_generate_stream(
     prompt: str,
     config: Optional[LLMConfig] = None,
@@ -83,91 +274,38 @@ def ollama_generate_stream(
     if config is None:
         config = LLMPresets.rag_qa(settings.OLLAMA_MODEL)
 
-    # Ollama-Request
-    options = {
-        "num_ctx": config.num_ctx,
-        "temperature": config.temperature,
-        "num_predict": config.max_tokens,
-        "repeat_penalty": config.repeat_penalty,
-    }
+    with llm_client("ollama").stream(
+        "POST",
+        "/api/generate",
+        json=_ollama_payload(prompt, config, stream=True),
+        timeout=llm_timeout(180),
+    ) as resp:
+        resp.raise_for_status()
+        yield from _filter_stream_lines(resp.iter_lines(), _ollama_stream_chunk)
 
-    # Optionale Parameter
-    if config.top_p is not None:
-        options["top_p"] = config.top_p
-    if config.top_k is not None:
-        options["top_k"] = config.top_k
 
-    resp = requests.post(
-        f"{settings.OLLAMA_BASE}/api/generate",
-        json={
-            "model": config.model,
-            "prompt": prompt,
-            "stream": True,
-            "options": options,
-        },
-        timeout=180,
-        stream=True,
-    )
-    resp.raise_for_status()
-    
-    import json
-    
-    # Buffer für think-tag Filtering
-    buffer = ""
-    in_think_block = False
-    
-    for line in resp.iter_lines():
-        if line:
-            try:
-                chunk = json.loads(line)
-                if "response" in chunk:
-                    text = chunk["response"]
-                    buffer += text
-                    
-                    # Verarbeite Buffer
-                    while True:
-                        if not in_think_block:
-                            # Suche nach öffnendem <think> Tag
-                            if "<think>" in buffer:
-                                before, after = buffer.split("<think>", 1)
-                                if before:
-                                    yield before
-                                buffer = after
-                                in_think_block = True
-                            else:
-                                # Kein Tag gefunden, aber behalte mögliche Teilstrings
-                                # z.B. "<thi" könnte der Anfang von "<think>" sein
-                                safe_output = ""
-                                if "<" in buffer:
-                                    # Behalte alles ab dem letzten "<" im Buffer
-                                    last_lt = buffer.rfind("<")
-                                    safe_output = buffer[:last_lt]
-                                    buffer = buffer[last_lt:]
-                                else:
-                                    safe_output = buffer
-                                    buffer = ""
-                                
-                                if safe_output:
-                                    yield safe_output
-                                break
-                        else:
-                            # In think-Block, suche nach schließendem </think>
-                            if "</think>" in buffer:
-                                _, after = buffer.split("</think>", 1)
-                                buffer = after
-                                in_think_block = False
-                            else:
-                                # Noch im think-Block, verwerfe Content und warte
-                                break
-                
-                if chunk.get("done", False):
-                    # Am Ende: restlichen Buffer ausgeben (falls nicht in think-Block)
-                    if not in_think_block and buffer:
-                        yield buffer
-                    break
-            except json.JSONDecodeError:
-                continue
+async def aollama_generate_stream(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+) -> AsyncIterator[str]:
+    """Async-Variante von ollama_generate_stream (Text-Chunks ohne <think>-Blöcke)."""
+    if config is None:
+        config = LLMPresets.rag_qa(settings.OLLAMA_MODEL)
 
+    async with allm_client("ollama").stream(
+        "POST",
+        "/api/generate",
+        json=_ollama_payload(prompt, config, stream=True),
+        timeout=llm_timeout(180),
+    ) as resp:
+        resp.raise_for_status()
+        async for part in _afilter_stream_lines(resp.aiter_lines(), _ollama_stream_chunk):
+            yield part
+
+
+# ============================================================
+# vLLM
+# ============================================================
 
 
 def vllm_generate(
@@ -193,34 +331,82 @@ def vllm_generate(
     if config is None:
         config = LLMPresets.rag_qa(settings.VLLM_MODEL)
 
-    # vLLM OpenAI-kompatibler Request
-    payload = {
-        "model": config.model,
-        "prompt": prompt,
-        "max_tokens": config.max_tokens,
-        "temperature": config.temperature,
-        "top_p": config.top_p if config.top_p is not None else 1.0,
-        "presence_penalty": config.presence_penalty,
-        "frequency_penalty": config.frequency_penalty,
-        "stop": None,
-    }
+    resp = llm_client("vllm").post(
+        "/v1/completions",
+        json=_vllm_payload(prompt, config),
+        timeout=llm_timeout(180),  # vLLM kann bei großen Modellen länger brauchen
+    )
+    resp.raise_for_status()
+
+    result = resp.json()
+    return _clean_response(result.get("choices", [{}])[0].get("text", ""))
+
+
+async def avllm_generate(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+    hedge: bool = False,
+) -> str:
+    """Async-Variante von vllm_generate."""
+    if config is None:
+        config = LLMPresets.rag_qa(settings.VLLM_MODEL)
 
-    resp = requests.post(
-        f"{settings.VLLM_BASE}/v1/completions",
-        json=payload,
-        timeout=180,  # vLLM kann bei großen Modellen länger brauchen
-        headers={"Content-Type": "application/json"},
+    resp = await allm_client("vllm").post(
+        "/v1/completions",
+        json=_vllm_payload(prompt, config),
+        timeout=llm_timeout(180),
+        hedge=hedge,
     )
     resp.raise_for_status()
 
     result = resp.json()
-    response = result.get("choices", [{}])[0].get("text", "")
+    return _clean_response(result.get("choices", [{}])[0].get("text", ""))
 
-    # CoT-Postprocessing: Entferne <think>-Tags
-    if "<think>" in response:
-        response = extract_answer_from_cot(response)
 
-    return response.strip()
+def vllm_generate_stream(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+) -> Iterator[str]:
+    """
+    Generiert Antwort via vLLM mit Streaming (OpenAI-SSE, `stream: true`).
+
+    Filtert <think>-Blöcke wie ollama_generate_stream.
+    """
+    if config is None:
+        config = LLMPresets.rag_qa(settings.VLLM_MODEL)
+
+    with llm_client("vllm").stream(
+        "POST",
+        "/v1/completions",
+        json=_vllm_payload(prompt, config, stream=True),
+        timeout=llm_timeout(180),
+    ) as resp:
+        resp.raise_for_status()
+        yield from _filter_stream_lines(resp.iter_lines(), _vllm_stream_chunk)
+
+
+async def avllm_generate_stream(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+) -> AsyncIterator[str]:
+    """Async-Variante von vllm_generate_stream."""
+    if config is None:
+        config = LLMPresets.rag_qa(settings.VLLM_MODEL)
+
+    async with allm_client("vllm").stream(
+        "POST",
+        "/v1/completions",
+        json=_vllm_payload(prompt, config, stream=True),
+        timeout=llm_timeout(180),
+    ) as resp:
+        resp.raise_for_status()
+        async for part in _afilter_stream_lines(resp.aiter_lines(), _vllm_stream_chunk):
+            yield part
+
+
+# ============================================================
+# Backend-unabhängig
+# ============================================================
 
 
 def generate(
@@ -244,36 +430,75 @@ def generate(
     Returns:
         Generierte Antwort als String
     """
-    # Backend-Bestimmung mit Fallback-Hierarchie
-    effective_backend = backend
-    if effective_backend is None and config is not None:
-        effective_backend = config.backend
-    if effective_backend is None:
-        effective_backend = settings.LLM_BACKEND
-
-    if effective_backend == "vllm":
+    if _resolve_backend(config, backend) == "vllm":
         return vllm_generate(prompt, config)
     else:
         return ollama_generate(prompt, config)
 
 
-def hyde_rewrite(query: str, model: Optional[str] = None) -> str:
+async def agenerate(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+    backend: Optional[str] = None,
+    hedge: bool = False,
+) -> str:
+    """Async-Variante von generate (gleiche Backend-Auswahl, optional Hedging)."""
+    if _resolve_backend(config, backend) == "vllm":
+        return await avllm_generate(prompt, config, hedge=hedge)
+    return await aollama_generate(prompt, config, hedge=hedge)
+
+
+def generate_stream(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+    backend: Optional[str] = None,
+) -> Iterator[str]:
     """
-    HyDE: Hypothetical Document Embeddings.
+    Backend-unabhängiges Streaming (gleiche Backend-Auswahl wie generate).
 
-    Generiert ein hypothetisches Dokument für besseres Retrieval.
-    Verwendet höheres Temperature (0.3) für Variabilität.
+    Yields:
+        Text-Chunks ohne <think>-Blöcke
     """
-    config = LLMPresets.hyde(model=model or settings.OLLAMA_MODEL)
+    if _resolve_backend(config, backend) == "vllm":
+        return vllm_generate_stream(prompt, config)
+    return ollama_generate_stream(prompt, config)
+
 
-    prompt = f"""Schreibe einen kurzen Absatz (2-3 Sätze), der die folgende Frage beantwortet.
+def agenerate_stream(
+    prompt: str,
+    config: Optional[LLMConfig] = None,
+    backend: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Async-Variante von generate_stream (`async for token in agenerate_stream(...)`)."""
+    if _resolve_backend(config, backend) == "vllm":
+        return avllm_generate_stream(prompt, config)
+    return aollama_generate_stream(prompt, config)
+
+
+def _hyde_prompt(query: str) -> str:
+    return f"""Schreibe einen kurzen Absatz (2-3 Sätze), der die folgende Frage beantwortet.
 Der Text soll wie ein Ausschnitt aus einem Hochschul-Verwaltungsdokument klingen.
 
 Frage: {query}
 
 Hypothetisches Dokument:"""
 
-    return ollama_generate(prompt, config=config)
+
+def hyde_rewrite(query: str, model: Optional[str] = None) -> str:
+    """
+    HyDE: Hypothetical Document Embeddings.
+
+    Generiert ein hypothetisches Dokument für besseres Retrieval.
+    Verwendet höheres Temperature (0.3) für Variabilität.
+    """
+    config = LLMPresets.hyde(model=model or settings.OLLAMA_MODEL)
+    return ollama_generate(_hyde_prompt(query), config=config)
+
+
+async def ahyde_rewrite(query: str, model: Optional[str] = None) -> str:
+    """Async-Variante von hyde_rewrite."""
+    config = LLMPresets.hyde(model=model or settings.OLLAMA_MODEL)
+    return await aollama_generate(_hyde_prompt(query), config=config, hedge=True)
 
 
 def generate_for_evaluation(
@@ -0,0 +1,169 @@
+"""
+Seitenbereichs-parallele PDF-Partitionierung.
+
+Große PDFs werden in Seitenbereiche zerlegt, jeder Bereich wird in einem
+eigenen Worker-Prozess mit `partition_pdf` (hi_res) verarbeitet und die
+Elemente werden anschließend in Seitenreihenfolge wieder zusammengesetzt.
+
+Chunking passiert erst danach auf der vollständigen Elementliste, damit
+Abschnitte über Bereichsgrenzen hinweg genauso gechunkt werden wie bei
+einem einzelnen `partition_pdf`-Aufruf.
+"""
+
+from __future__ import annotations
+import os
+import tempfile
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, List, Optional, Tuple
+
+from pypdf import PdfReader, PdfWriter
+from unstructured.partition.pdf import partition_pdf
+
+from app.core.config import settings
+from app.core.clients import get_logger
+
+logger = get_logger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Jeder Worker lädt das hi_res-Layout-Modell selbst → Default begrenzen
+DEFAULT_MAX_WORKERS = 4
+
+
+def _num_workers() -> int:
+    workers = settings.PDF_PARTITION_WORKERS
+    return workers if workers > 0 else min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazy Loading des Worker-Pools (Thread-safe).
+
+    Der Pool bleibt über Dokumente hinweg bestehen, damit jeder Worker das
+    Layout-Modell nur einmal lädt. "spawn" statt "fork", weil der API-Prozess
+    bereits Threads (Event-Loop, Torch) besitzt.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=_num_workers(),
+                    mp_context=mp.get_context("spawn"),
+                )
+                logger.info(f"PDF-Partition-Pool gestartet ({_num_workers()} Worker)")
+    return _pool
+
+
+def _reset_pool() -> None:
+    """Verwirft einen defekten Pool (z.B. nach BrokenProcessPool)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _partition_kwargs(languages: List[str]) -> dict:
+    return {
+        "strategy": "hi_res",
+        "chunking_strategy": None,
+        "languages": languages,
+        "infer_table_structure": True,
+        "skip_infer_table_types": [],
+    }
+
+
+def _page_count(path: str) -> int:
+    try:
+        return len(PdfReader(path).pages)
+    except Exception as e:
+        logger.warning(f"Seitenzahl für {path} nicht ermittelbar: {e}")
+        return 0
+
+
+def _page_ranges(n_pages: int, pages_per_range: int) -> List[Tuple[int, int]]:
+    """Zerlegt [0, n_pages) in Bereiche [start, end) mit fester Seitenanzahl."""
+    step = max(1, pages_per_range)
+    return [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+
+
+def _partition_range(path: str, start: int, end: int, languages: List[str]) -> List[Any]:
+    """
+    Worker: Partitioniert die Seiten [start, end) einer PDF.
+
+    Die Seiten werden in eine temporäre PDF kopiert. `starting_page_number`
+    und `metadata_filename` sorgen dafür, dass page_number und filename der
+    Elemente denen der Original-PDF entsprechen.
+    """
+    reader = PdfReader(path)
+    writer = PdfWriter()
+    for i in range(start, end):
+        writer.add_page(reader.pages[i])
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            writer.write(tmp)
+        return partition_pdf(
+            filename=tmp_path,
+            metadata_filename=path,
+            starting_page_number=start + 1,
+            **_partition_kwargs(languages),
+        )
+    finally:
+        os.unlink(tmp_path)
+
+
+def partition_document(path: str) -> List[Any]:
+    """
+    PDF → Liste von Unstructured-Elementen (ohne Chunking).
+
+    Kleine Dokumente (< PDF_PARALLEL_MIN_PAGES) werden wie bisher mit einem
+    einzelnen `partition_pdf`-Aufruf verarbeitet. Große Dokumente werden in
+    Seitenbereiche zu je PDF_PAGES_PER_RANGE Seiten zerlegt und parallel
+    partitioniert. Nur wenn der Pool nicht startet oder ein Worker abstürzt
+    (BrokenProcessPool), wird auf den seriellen Pfad zurückgefallen; Fehler
+    beim Partitionieren selbst werden weitergereicht.
+    """
+    path = str(path)
+    languages = settings.OCR_LANGUAGES.split(",")
+
+    n_pages = _page_count(path)
+    if _num_workers() <= 1 or n_pages < settings.PDF_PARALLEL_MIN_PAGES:
+        return partition_pdf(filename=path, **_partition_kwargs(languages))
+
+    ranges = _page_ranges(n_pages, settings.PDF_PAGES_PER_RANGE)
+    logger.info(
+        f"Partitioniere {n_pages} Seiten in {len(ranges)} Bereichen parallel ({_num_workers()} Worker)"
+    )
+
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_partition_range, path, start, end, languages)
+            for start, end in ranges
+        ]
+    except (OSError, RuntimeError) as e:
+        # Pool-Start/Submit (BrokenProcessPool ist ein RuntimeError)
+        logger.warning(f"PDF-Partition-Pool nicht verfügbar, falle auf seriell zurück: {e}")
+        _reset_pool()
+        return partition_pdf(filename=path, **_partition_kwargs(languages))
+
+    try:
+        # Reihenfolge der Futures = Seitenreihenfolge
+        elements: List[Any] = []
+        for fut in futures:
+            elements.extend(fut.result())
+        return elements
+    except BrokenProcessPool as e:
+        logger.warning(f"PDF-Partition-Worker abgestürzt, falle auf seriell zurück: {e}")
+        _reset_pool()
+        return partition_pdf(filename=path, **_partition_kwargs(languages))
+    except BaseException:
+        for fut in futures:
+            fut.cancel()
+        raise
@@ -1,16 +1,44 @@
 from enum import Enum
-import os, uuid, asyncio, json, re
+from dataclasses import dataclass
+import os, uuid, asyncio, json, re, time
 from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
-import numpy as np
-
 from app.core.config import settings
 from app.core.clients import get_opensearch, get_qdrant, get_logger
 from sentence_transformers import SentenceTransformer
-import requests
-from unstructured.partition.pdf import partition_pdf
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from app.core.llm_transport import llm_client, llm_timeout
+from unstructured.chunking.title import chunk_by_title
+from app.services.partitioning import partition_document
+from app.services.boilerplate import strip_boilerplate
+from app.services.table_extraction import table_html_to_text
+from app.services.ingestion_jobs import update_job, finish_job, fail_job
+from app.services.index_aliases import (
+    create_os_index,
+    create_qdrant_collection,
+    qdrant_alias_target,
+    qdrant_exists,
+)
+from app.services.sharding import write_target
+from app.services.qdrant_schema import (
+    collection_create_kwargs,
+    ensure_payload_indexes,
+    migrate_collection,
+    point_vector,
+)
+from app.services.dedup import (
+    DEDUP_MAPPING_PROPERTIES,
+    band_keys,
+    duplicate_source_entry,
+    encode_signature,
+    find_duplicates,
+    minhash_signature,
+)
+from app.services.semantic_chunking import (
+    SEMANTIC_BREAKPOINT_PERCENTILE,
+    langchain_semantic_chunk,
+    semantic_chunk_texts,
+)
 
 logger = get_logger(__name__)
 
@@ -30,9 +58,6 @@ ROLE_HINTS = [
     "SENAT",
 ]
 
-SEMANTIC_BREAKPOINT_PERCENTILE = 95.0
-SEMANTIC_MIN_CHUNK_CHARS = 100
-
 
 def _get_index_names(strategy: ChunkingStrategy) -> Tuple[str, str]:
     """
@@ -112,173 +137,11 @@ def extract_payload(el) -> dict:
     return payload
 
 
-def _is_form_table(html: str) -> bool:
-    """
-    Erkennt ob eine HTML-Tabelle ein Formular ist (statt einer Datentabelle).
-    
-    Formulare werden erkannt anhand von:
-    - Hoher Anteil leerer Zellen (> 40%)
-    - Checkbox-Symbole (☐ □ ○ ☑ ☒)
-    - Label-Pattern in erster Spalte (Text endet mit : oder *)
-    """
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, "html.parser")
-    
-    cells = soup.find_all(["td", "th"])
-    if not cells:
-        return False
-    
-    total = len(cells)
-    empty = sum(1 for c in cells if not c.get_text(strip=True))
-    
-    # Heuristik 1: > 40% leere Zellen → wahrscheinlich Formular
-    if total > 0 and empty / total > 0.4:
-        return True
-    
-    # Heuristik 2: Checkbox-Symbole vorhanden
-    text = soup.get_text()
-    checkbox_symbols = ["☐", "□", "○", "☑", "☒", "◯", "◻"]
-    if any(sym in text for sym in checkbox_symbols):
-        return True
-    
-    # Heuristik 3: Label-Pattern (erste Spalte endet mit : oder *)
-    rows = soup.find_all("tr")
-    if rows:
-        first_col_cells = [row.find(["td", "th"]) for row in rows]
-        first_col_cells = [c for c in first_col_cells if c]
-        if first_col_cells:
-            labels = sum(
-                1 for c in first_col_cells 
-                if c.get_text(strip=True).rstrip().endswith((":", "*"))
-            )
-            if labels / len(first_col_cells) > 0.5:
-                return True
-    
-    return False
-
-
-def _table_html_to_text(html: str) -> str:
-    """
-    Konvertiert HTML-Tabelle in lesbaren Markdown-Text.
-    
-    - Überspringt Formulare (erkannt durch _is_form_table)
-    - Filtert leere Zeilen heraus
-    - Fügt Markdown-Header-Separator hinzu
-    - Gibt leeren String zurück wenn Tabelle nur leere Zellen hat
-    """
-    # Formulare überspringen
-    if _is_form_table(html):
-        return ""
-    
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    rows = []
-    
-    for tr in soup.find_all("tr"):
-        cells = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
-        # Nur Zeilen mit mindestens einer nicht-leeren Zelle
-        if any(cell.strip() for cell in cells):
-            rows.append(" | ".join(cells))
-    
-    # Keine verwertbaren Daten
-    if not rows:
-        return ""
-    
-    # Markdown-Tabelle mit Header-Separator
-    if len(rows) >= 1:
-        # Anzahl Spalten aus erster Zeile
-        num_cols = len(rows[0].split(" | "))
-        separator = " | ".join(["---"] * num_cols)
-        # Header + Separator + Rest
-        result = [rows[0], separator] + rows[1:] if len(rows) > 1 else [rows[0]]
-        return "\n".join(result)
-    
-    return "\n".join(rows)
-
-
 # ============================================================
 # SEMANTIC CHUNKING (bge-m3 via Ollama)
 # ============================================================
 
 
-def _embed_for_chunking(texts: List[str]) -> np.ndarray:
-    """
-    Erstellt Embeddings für Semantic Chunking via bge-m3.
-    bge-m3 ist optimiert für Satz-Ähnlichkeiten (im Gegensatz zu Query-Doc).
-    """
-    if not texts:
-        return np.array([])
-
-    try:
-        resp = requests.post(
-            f"{settings.OLLAMA_BASE}/api/embed",
-            json={"model": "bge-m3:latest", "input": texts},
-            timeout=120,
-        )
-        resp.raise_for_status()
-        logger.info(f"bge-m3 Embeddings response: {resp}")
-        return np.array(resp.json()["embeddings"])
-    except Exception as e:
-        logger.error(f"bge-m3 Embedding-Fehler: {e}")
-        raise
-
-
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    """Berechnet Kosinus-Ähnlichkeit zwischen zwei Vektoren."""
-    norm_a = np.linalg.norm(a)
-    norm_b = np.linalg.norm(b)
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return float(np.dot(a, b) / (norm_a * norm_b))
-
-
-def _merge_metadata(metas: List[dict]) -> dict:
-    """Merged Metadaten mehrerer Elemente zu einem Chunk."""
-    if not metas:
-        return {}
-    if len(metas) == 1:
-        return metas[0]
-
-    merged = {}
-
-    # page_number: Bereich (erste bis letzte Seite)
-    pages = [m.get("page_number") for m in metas if m.get("page_number") is not None]
-    if pages:
-        if len(set(pages)) == 1:
-            merged["page_number"] = pages[0]
-        else:
-            merged["page_number"] = f"{min(pages)}-{max(pages)}"
-
-    # section_title: Erste gefundene
-    for m in metas:
-        if m.get("section_title"):
-            merged["section_title"] = m["section_title"]
-            break
-
-    # element_type: "merged" wenn verschiedene Typen
-    types = [m.get("element_type") for m in metas if m.get("element_type")]
-    if types:
-        merged["element_type"] = "merged" if len(set(types)) > 1 else types[0]
-
-    # roles: Vereinigung aller gefundenen Rollen
-    all_roles = []
-    for m in metas:
-        roles = m.get("roles", [])
-        if isinstance(roles, list):
-            all_roles.extend(roles)
-    if all_roles:
-        merged["roles"] = list(set(all_roles))
-
-    # table_html: Erste gefundene Tabelle
-    for m in metas:
-        if m.get("table_html"):
-            merged["table_html"] = m["table_html"]
-            break
-
-    return merged
-
-
 def _semantic_chunk(
     elements: List[Any],
     max_chunk_chars: int = 2400,
@@ -288,11 +151,13 @@ def _semantic_chunk(
 
     Algorithmus:
     1. Extrahiere Text und Metadata aus jedem Element
-    2. Berechne Embeddings für alle Elemente (bge-m3)
+    2. Berechne Embeddings für alle Elemente (bge-m3, gebatcht)
     3. Berechne paarweise Ähnlichkeiten zwischen aufeinanderfolgenden Elementen
     4. Finde Breakpoints bei großen Ähnlichkeits-Sprüngen (95. Percentile)
     5. Erstelle Chunks, respektiere max_chunk_chars
 
+    Schritte 2-5 übernimmt app.services.semantic_chunking.
+
     Args:
         elements: Liste von Unstructured-Elementen
         max_chunk_chars: Maximale Chunk-Länge
@@ -317,7 +182,7 @@ def _semantic_chunk(
         if element_type == "Table":
             html = getattr(getattr(el, "metadata", None), "text_as_html", None)
             if html:
-                table_text = _table_html_to_text(html)
+                table_text = table_html_to_text(html)
                 if table_text:  # Nur nicht-leere Tabellen verwenden
                     txt = table_text
                 else:
@@ -326,231 +191,33 @@ def _semantic_chunk(
         texts_raw.append(txt)
         metas_raw.append(extract_payload(el))
 
-    if len(texts_raw) == 0:
-        return []
-
-    if len(texts_raw) == 1:
-        return [(texts_raw[0], metas_raw[0])]
-
-    # 2. Embeddings berechnen (bge-m3)
-    logger.info(
-        f"Semantic Chunking: Berechne Embeddings für {len(texts_raw)} Elemente..."
-    )
-    embeddings = _embed_for_chunking(texts_raw)
-
-    # 3. Paarweise Ähnlichkeiten berechnen
-    similarities: List[float] = []
-    for i in range(len(embeddings) - 1):
-        sim = _cosine_similarity(embeddings[i], embeddings[i + 1])
-        similarities.append(sim)
-
-    logger.info(
-        f"Similarities: min={min(similarities):.3f}, max={max(similarities):.3f}, "
-        f"mean={np.mean(similarities):.3f}"
-    )
-
-    # 4. Breakpoints berechnen (Percentile-Methode)
-    breakpoints = _compute_breakpoints_percentile(similarities)
-    logger.info(
-        f"Gefundene Breakpoints: {len(breakpoints)} bei Percentile {SEMANTIC_BREAKPOINT_PERCENTILE}%"
-    )
-
-    # 5. Chunks erstellen mit Längen-Limit
-    chunks = _create_chunks_from_breakpoints(
-        texts_raw, metas_raw, breakpoints, max_chunk_chars
-    )
-
-    logger.info(f"Semantic Chunking: {len(texts_raw)} Elemente → {len(chunks)} Chunks")
-    return chunks
-
+    return semantic_chunk_texts(texts_raw, metas_raw, max_chunk_chars=max_chunk_chars)
 
-def _langchain_semantic_chunk(
-    full_text: str,
-    max_chunk_chars: int = 2400,
-    breakpoint_threshold_type: str = "percentile",
-    breakpoint_threshold_amount: float = 90.0,
-) -> List[Tuple[str, dict]]:
-    """
-    LangChain SemanticChunker: Sentence-level semantic chunking.
-    
-    Verwendet langchain_experimental.text_splitter.SemanticChunker
-    mit einem Ollama-basierten Embedding-Modell.
-    
-    Args:
-        full_text: Gesamter Dokumenttext
-        max_chunk_chars: Maximale Chunk-Länge (wird nachträglich angewendet)
-        breakpoint_threshold_type: "percentile", "standard_deviation", oder "interquartile"
-        breakpoint_threshold_amount: Threshold-Wert (z.B. 90 für 90. Percentile)
-    
-    Returns:
-        Liste von (text, metadata) Tupeln
-    """
-    from langchain_experimental.text_splitter import SemanticChunker
-    from langchain_ollama import OllamaEmbeddings
-    
-    if not full_text.strip():
-        return []
-    
-    logger.info(
-        f"LangChain Semantic Chunking: threshold={breakpoint_threshold_type}/{breakpoint_threshold_amount}"
-    )
-    
-    # Ollama Embeddings für SemanticChunker
-    embeddings = OllamaEmbeddings(
-        model=settings.OLLAMA_EMBED_MODEL,
-        base_url=settings.OLLAMA_BASE,
-    )
-    
-    # SemanticChunker initialisieren
-    text_splitter = SemanticChunker(
-        embeddings=embeddings,
-        breakpoint_threshold_type=breakpoint_threshold_type,
-        breakpoint_threshold_amount=breakpoint_threshold_amount,
-    )
-    
-    # Text in Chunks splitten
-    docs = text_splitter.create_documents([full_text])
-    
-    # Chunks extrahieren und ggf. aufteilen wenn zu lang
-    chunks: List[Tuple[str, dict]] = []
-    for doc in docs:
-        chunk_text = doc.page_content.strip()
-        
-        if len(chunk_text) < SEMANTIC_MIN_CHUNK_CHARS:
-            continue
-            
-        if len(chunk_text) > max_chunk_chars:
-            # Aufteilen bei max_chunk_chars
-            for i in range(0, len(chunk_text), max_chunk_chars):
-                sub_chunk = chunk_text[i:i + max_chunk_chars].strip()
-                if len(sub_chunk) >= SEMANTIC_MIN_CHUNK_CHARS:
-                    chunks.append((sub_chunk, {"chunking_strategy": "langchain_semantic"}))
-        else:
-            chunks.append((chunk_text, {"chunking_strategy": "langchain_semantic"}))
-    
-    logger.info(f"LangChain Semantic Chunking: {len(docs)} raw chunks → {len(chunks)} final chunks")
-    return chunks
-
-
-def _compute_breakpoints_percentile(similarities: List[float]) -> List[int]:
-    """
-    Greg Kamradt Methode: Breakpoints bei großen Ähnlichkeits-Sprüngen.
-
-    Berechnet die Differenzen zwischen aufeinanderfolgenden Ähnlichkeiten
-    und setzt Breakpoints dort, wo die Differenz über dem X. Percentile liegt.
-
-    Returns:
-        Liste von Indizes, an denen ein neuer Chunk beginnt (1-basiert)
-    """
-    if len(similarities) < 2:
-        return []
-
-    # Differenzen berechnen: Wie stark ändert sich die Ähnlichkeit?
-    # Positiv = Ähnlichkeit sinkt (potenzieller Themenbruch)
-    diffs: List[float] = []
-    for i in range(len(similarities) - 1):
-        diff = similarities[i] - similarities[i + 1]
-        diffs.append(diff)
-
-    # Threshold = 95. Percentile der Differenzen
-    # Nur die obersten 5% der Sprünge werden Breakpoints
-    threshold = float(np.percentile(diffs, SEMANTIC_BREAKPOINT_PERCENTILE))
-
-    # Breakpoints = Stellen wo Differenz > Threshold
-    # Index i in diffs bedeutet: Sprung zwischen Element i+1 und i+2
-    # Also Breakpoint bei Element i+2
-    breakpoints = [i + 2 for i, d in enumerate(diffs) if d > threshold]
-
-    return breakpoints
-
-
-def _create_chunks_from_breakpoints(
-    texts: List[str],
-    metas: List[dict],
-    breakpoints: List[int],
-    max_chunk_chars: int,
-) -> List[Tuple[str, dict]]:
-    """
-    Erstellt Chunks basierend auf Breakpoints, respektiert max_chunk_chars.
-
-    Wenn ein Chunk zu groß wird, wird er an der nächsten Element-Grenze geteilt.
-    """
-    chunks: List[Tuple[str, dict]] = []
-
-    # Breakpoints um Start (0) und Ende (len) erweitern
-    all_breaks = [0] + breakpoints + [len(texts)]
-
-    for i in range(len(all_breaks) - 1):
-        start = all_breaks[i]
-        end = all_breaks[i + 1]
-
-        segment_texts = texts[start:end]
-        segment_metas = metas[start:end]
-
-        # Prüfen ob Segment zu groß ist
-        total_len = sum(len(t) for t in segment_texts)
-
-        if total_len <= max_chunk_chars:
-            # Segment passt → ein Chunk
-            chunk_text = "\n\n".join(segment_texts)
-            if len(chunk_text) >= SEMANTIC_MIN_CHUNK_CHARS:
-                chunk_meta = _merge_metadata(segment_metas)
-                chunks.append((chunk_text, chunk_meta))
-        else:
-            # Segment zu groß → aufteilen
-            sub_chunks = _split_segment(segment_texts, segment_metas, max_chunk_chars)
-            chunks.extend(sub_chunks)
-
-    return chunks
 
+# ============================================================
+# PARSE PDF (MIT STRATEGIE-AUSWAHL)
+# ============================================================
 
-def _split_segment(
-    texts: List[str],
-    metas: List[dict],
-    max_chunk_chars: int,
-) -> List[Tuple[str, dict]]:
-    """Teilt ein zu großes Segment in kleinere Chunks."""
-    chunks: List[Tuple[str, dict]] = []
-    current_texts: List[str] = []
-    current_metas: List[dict] = []
-    current_len = 0
-
-    for txt, meta in zip(texts, metas):
-        txt_len = len(txt)
-
-        # Prüfen ob Element noch in aktuellen Chunk passt
-        # +2 für "\n\n" Separator
-        separator_len = 2 if current_texts else 0
-
-        if current_len + separator_len + txt_len > max_chunk_chars and current_texts:
-            # Aktuellen Chunk abschließen
-            chunk_text = "\n\n".join(current_texts)
-            if len(chunk_text) >= SEMANTIC_MIN_CHUNK_CHARS:
-                chunk_meta = _merge_metadata(current_metas)
-                chunks.append((chunk_text, chunk_meta))
-
-            # Neuen Chunk starten
-            current_texts = []
-            current_metas = []
-            current_len = 0
-
-        current_texts.append(txt)
-        current_metas.append(meta)
-        current_len += (separator_len + txt_len) if current_len > 0 else txt_len
-
-    # Letzten Chunk hinzufügen
-    if current_texts:
-        chunk_text = "\n\n".join(current_texts)
-        if len(chunk_text) >= SEMANTIC_MIN_CHUNK_CHARS:
-            chunk_meta = _merge_metadata(current_metas)
-            chunks.append((chunk_text, chunk_meta))
 
-    return chunks
+def _record_timing(stats: Optional[Dict[str, Any]], stage: str, seconds: float) -> None:
+    if stats is not None:
+        stats.setdefault("timings", {})[stage] = round(seconds, 3)
 
 
-# ============================================================
-# PARSE PDF (MIT STRATEGIE-AUSWAHL)
-# ============================================================
+def _load_elements(path: str, stats: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """Partitioniert die PDF und entfernt wiederkehrende Kopf-/Fußzeilen."""
+    t0 = time.perf_counter()
+    elements = partition_document(path)
+    if settings.BOILERPLATE_STRIPPING:
+        elements, report = strip_boilerplate(elements)
+        logger.info(
+            f"Boilerplate: {report.dropped_chars}/{report.total_chars} Zeichen entfernt "
+            f"({report.dropped_ratio:.1%}, {report.repeated_patterns} Muster, {report.pages} Seiten)"
+        )
+        if stats is not None:
+            stats["boilerplate"] = report.as_dict()
+    _record_timing(stats, "parse", time.perf_counter() - t0)
+    return elements
 
 
 def parse_pdf(
@@ -558,6 +225,7 @@ def parse_pdf(
     strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE,
     max_characters: Optional[int] = None,
     overlap: Optional[int] = None,
+    stats: Optional[Dict[str, Any]] = None,
 ) -> List[Tuple[str, dict]]:
     """
     PDF → [(text, payload)] mit konfigurierbarer Chunking-Strategie.
@@ -567,10 +235,27 @@ def parse_pdf(
         strategy: BY_TITLE (default, 1800 chars) oder SEMANTIC (bge-m3)
         max_characters: Maximale Chunk-Länge (default: settings.MAX_CHARACTERS)
         overlap: Überlappung (nur bei BY_TITLE)
+        stats: Optionales Dict, das mit Ingestion-Statistiken befüllt wird
+            (stats["boilerplate"], stats["timings"]["parse"|"chunk"])
 
     Returns:
         Liste von (text, metadata) Tupeln
     """
+    t0 = time.perf_counter()
+    chunks = _parse_pdf(path, strategy, max_characters, overlap, stats)
+    if stats is not None:
+        parse_s = stats.get("timings", {}).get("parse", 0.0)
+        _record_timing(stats, "chunk", time.perf_counter() - t0 - parse_s)
+    return chunks
+
+
+def _parse_pdf(
+    path: str,
+    strategy: ChunkingStrategy,
+    max_characters: Optional[int],
+    overlap: Optional[int],
+    stats: Optional[Dict[str, Any]],
+) -> List[Tuple[str, dict]]:
     max_chars = max_characters or settings.MAX_CHARACTERS
     max_semantic_chars = settings.MAX_SEMANTIC_CHARACTERS
     ovl = overlap or settings.OVERLAP
@@ -583,14 +268,7 @@ def parse_pdf(
             f"📄 Parsing mit SEMANTIC Chunking (bge-m3, percentile={SEMANTIC_BREAKPOINT_PERCENTILE}%, max={max_semantic_chars})"
         )
 
-        elements = partition_pdf(
-            filename=str(path),
-            strategy="hi_res",
-            chunking_strategy=None,
-            languages=settings.OCR_LANGUAGES.split(","),
-            infer_table_structure=True,
-            skip_infer_table_types=[],
-        )
+        elements = _load_elements(str(path), stats)
 
         return _semantic_chunk(elements, max_chunk_chars=max_semantic_chars)
 
@@ -603,14 +281,7 @@ def parse_pdf(
         )
 
         # Erst Text extrahieren ohne Chunking
-        elements = partition_pdf(
-            filename=str(path),
-            strategy="hi_res",
-            chunking_strategy=None,
-            languages=settings.OCR_LANGUAGES.split(","),
-            infer_table_structure=True,
-            skip_infer_table_types=[],
-        )
+        elements = _load_elements(str(path), stats)
 
         # Gesamten Text zusammenbauen
         full_text_parts = []
@@ -620,13 +291,13 @@ def parse_pdf(
             if element_type == "Table":
                 html = getattr(getattr(el, "metadata", None), "text_as_html", None)
                 if html:
-                    txt = _table_html_to_text(html) or txt
+                    txt = table_html_to_text(html) or txt
             if txt.strip():
                 full_text_parts.append(txt)
         
         full_text = "\n\n".join(full_text_parts)
         
-        return _langchain_semantic_chunk(full_text, max_chunk_chars=max_semantic_chars)
+        return langchain_semantic_chunk(full_text, max_chunk_chars=max_semantic_chars)
 
     else:
         # ============================================================
@@ -636,16 +307,14 @@ def parse_pdf(
             f"📄 Parsing mit BY_TITLE Chunking (max={max_chars}, overlap={ovl})"
         )
 
-        elements = partition_pdf(
-            filename=str(path),
-            strategy="hi_res",
-            chunking_strategy="by_title",
+        # Partitionierung (ggf. parallel über Seitenbereiche) und Chunking
+        # getrennt, damit by_title auf der vollständigen Elementliste läuft –
+        # identisch zu partition_pdf(chunking_strategy="by_title").
+        elements = chunk_by_title(
+            _load_elements(str(path), stats),
             max_characters=max_chars,
             new_after_n_chars=settings.NEW_AFTER_N_CHARS,
             overlap=ovl,
-            languages=settings.OCR_LANGUAGES.split(","),
-            infer_table_structure=True,
-            skip_infer_table_types=[],
         )
 
         chunks: List[Tuple[str, dict]] = []
@@ -656,7 +325,7 @@ def parse_pdf(
             if element_type == "Table":
                 html = getattr(getattr(el, "metadata", None), "text_as_html", None)
                 if html:
-                    table_text = _table_html_to_text(html)
+                    table_text = table_html_to_text(html)
                     if table_text:  # Nur nicht-leere Tabellen verwenden
                         txt = table_text
                     else:
@@ -673,6 +342,7 @@ def parse_pdf(
 
 # --- Embeddings backend ---
 import threading
+from concurrent.futures import ThreadPoolExecutor
 _embedding_lock = threading.Lock()  # Serialize GPU inference for thread-safety
 
 _model = (
@@ -687,14 +357,81 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
         # Serialize GPU inference to prevent CUDA race conditions
         with _embedding_lock:
             return _model.encode(texts, normalize_embeddings=True).tolist()
-    resp = requests.post(
-        f"{settings.OLLAMA_BASE}/api/embed",
+    resp = llm_client("ollama").post(
+        "/api/embed",
         json={"model": settings.OLLAMA_EMBED_MODEL, "input": texts},
+        timeout=llm_timeout(settings.EMBED_TIMEOUT),
     )
     resp.raise_for_status()
     return resp.json()["embeddings"]
 
 
+def _embedding_batches(texts: List[str]) -> List[Tuple[int, int]]:
+    """Zerlegt texts in Bereiche [start, end), begrenzt durch Anzahl und Gesamtzeichen."""
+    max_count = max(1, settings.EMBED_BATCH_SIZE)
+    max_chars = max(1, settings.EMBED_BATCH_MAX_CHARS)
+
+    ranges: List[Tuple[int, int]] = []
+    start, chars = 0, 0
+    for i, t in enumerate(texts):
+        if i > start and (i - start >= max_count or chars + len(t) > max_chars):
+            ranges.append((start, i))
+            start, chars = i, 0
+        chars += len(t)
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def _embed_batch_with_retry(texts: List[str]) -> List[List[float]]:
+    """embed_texts mit Retry und exponentiellem Backoff pro Batch."""
+    for attempt in range(settings.EMBED_MAX_RETRIES + 1):
+        try:
+            return embed_texts(texts)
+        except Exception as e:
+            if attempt >= settings.EMBED_MAX_RETRIES:
+                raise
+            delay = settings.EMBED_RETRY_BACKOFF * (2 ** attempt)
+            logger.warning(
+                f"Embedding-Batch ({len(texts)} Texte) fehlgeschlagen, Retry {attempt + 1} in {delay:.1f}s: {e}"
+            )
+            time.sleep(delay)
+    return []
+
+
+def embed_texts_bulk(texts: List[str], label: str = "") -> List[List[float]]:
+    """
+    Embedding großer Textmengen für die Ingestion.
+
+    - Batches begrenzt durch EMBED_BATCH_SIZE und EMBED_BATCH_MAX_CHARS
+    - Bis zu EMBED_CONCURRENCY Batches parallel (nur Ollama; HF ist per Lock serialisiert)
+    - Retry mit Backoff pro Batch, ein Fehler startet nicht das ganze Dokument neu
+    - Ergebnis in Originalreihenfolge, Durchsatz (Chunks/s) wird geloggt
+    """
+    if not texts:
+        return []
+
+    ranges = _embedding_batches(texts)
+    workers = 1 if settings.EMBEDDING_BACKEND == "hf" else settings.EMBED_CONCURRENCY
+    workers = max(1, min(workers, len(ranges)))
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        parts = [_embed_batch_with_retry(texts[a:b]) for a, b in ranges]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            # map() liefert in Eingabereihenfolge
+            parts = list(ex.map(lambda r: _embed_batch_with_retry(texts[r[0]:r[1]]), ranges))
+    vectors = [v for part in parts for v in part]
+    elapsed = time.perf_counter() - t0
+
+    logger.info(
+        f"Embedding {label}: {len(texts)} Chunks in {len(ranges)} Batches "
+        f"({workers} parallel), {elapsed:.2f}s ({len(texts) / max(elapsed, 1e-9):.1f} Chunks/s)"
+    )
+    return vectors
+
+
 # --- Indexing (OpenSearch + Qdrant) ---
 def ensure_indices(strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE):
     os_index, qdrant_col = _get_index_names(strategy)
@@ -702,9 +439,10 @@ def ensure_indices(strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE):
     os_client = get_opensearch()
     if not os_client.indices.exists(index=os_index):
         if strategy == ChunkingStrategy.SEMANTIC or strategy == ChunkingStrategy.SENTENCE_SEMANTIC:
-            os_client.indices.create(
-                index=os_index,
-                body={
+            create_os_index(
+                os_client,
+                os_index,
+                {
                     "mappings": {
                         "properties": {
                             "document_id": {"type": "keyword"},
@@ -722,36 +460,47 @@ def ensure_indices(strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE):
                                     "table_html": {"type": "text", "index": False},
                                 },
                             },
+                            **DEDUP_MAPPING_PROPERTIES,
                         }
                     }
                 },
             )
         else:
             # BY_TITLE: Flexibles Mapping (wie bisher)
-            os_client.indices.create(
-                index=os_index,
-                body={
+            create_os_index(
+                os_client,
+                os_index,
+                {
                     "mappings": {
                         "properties": {
                             "document_id": {"type": "keyword"},
                             "text": {"type": "text"},
                             "meta": {"type": "object", "enabled": True},
+                            **DEDUP_MAPPING_PROPERTIES,
                         }
                     }
                 },
             )
+    else:
+        # Bestehende Indizes um die Felder des Signatur-Index ergänzen
+        try:
+            os_client.indices.put_mapping(
+                index=os_index, body={"properties": DEDUP_MAPPING_PROPERTIES}
+            )
+        except Exception as e:
+            logger.warning(f"Dedup-Mapping für {os_index} nicht ergänzt: {e}")
 
-    # Qdrant-Collection anlegen
-    from qdrant_client.http.models import VectorParams, Distance
-
+    # Qdrant-Collection anlegen bzw. an die Settings angleichen
     qd = get_qdrant()
-    cols = [c.name for c in qd.get_collections().collections]
-    if qdrant_col not in cols:
+    if not qdrant_exists(qd, qdrant_col):
         dim = len(embed_texts(["probe"])[0])
-        qd.create_collection(
-            qdrant_col,
-            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
-        )
+        physical = create_qdrant_collection(qd, qdrant_col, **collection_create_kwargs(dim))
+        ensure_payload_indexes(qd, physical)
+    else:
+        try:
+            migrate_collection(qd, qdrant_alias_target(qd, qdrant_col) or qdrant_col)
+        except Exception as e:
+            logger.warning(f"Qdrant-Migration für {qdrant_col} fehlgeschlagen: {e}")
 
 
 def _uuid_for(doc_id: str, i: int) -> str:
@@ -760,165 +509,227 @@ def _uuid_for(doc_id: str, i: int) -> str:
     return str(uuid5(NAMESPACE_URL, f"{doc_id}:{i}"))
 
 
-def index_chunks(
+def _dedup_chunks(
+    os_index: str,
     doc_id: str,
     chunks: List[Tuple[str, dict]],
     *,
-    process_name: str | None = None,
-    tags: str | None = None,
-    file_name: str | None = None,
-    strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE,
-):
-    os_index, qdrant_col = _get_index_names(strategy)
+    process_name: str | None,
+    tags: str | None,
+    file_name: str | None,
+    start_index: int = 0,
+) -> Tuple[List[Dict[str, Any]], set]:
+    """
+    MinHash/LSH-Deduplizierung eines Dokuments vor dem Indexieren.
 
-    os_client = get_opensearch()
-    qd = get_qdrant()
+    DEDUP_MODE:
+    - "mark": Duplikate werden mit `duplicate_of` indexiert (Retrieval filtert sie)
+    - "collapse": Duplikate innerhalb dieses Batches werden nicht indexiert; ihre
+      Herkunft wird in `meta.duplicate_sources` des kanonischen Chunks übernommen.
+      Duplikate bereits gespeicherter Chunks (andere Dokumente oder frühere
+      Batches desselben Dokuments) werden wie bei "mark" indexiert, damit sie
+      nachrücken können, wenn das andere Dokument gelöscht wird.
 
-    texts = [t for t, _ in chunks]
-    vectors = embed_texts(texts)
+    Returns:
+        (zusätzliche Top-Level-Felder pro Chunk, Indizes der zu überspringenden Chunks)
+    """
+    chunk_ids = [f"{doc_id}:{start_index + i}" for i in range(len(chunks))]
+    signatures = [minhash_signature(t) for t, _ in chunks]
+    matches = find_duplicates(
+        get_opensearch(),
+        os_index,
+        chunk_ids,
+        signatures,
+        process_name=process_name,
+        tags=tags,
+    )
 
-    for i, (t, meta) in enumerate(chunks):
+    extra: List[Dict[str, Any]] = [
+        {"minhash_bands": band_keys(sig), "minhash_sig": encode_signature(sig)}
+        for sig in signatures
+    ]
+    skip: set = set()
+    collapse = settings.DEDUP_MODE == "collapse"
 
-        # erweiterte Meta/Payload
-        os_meta = {
-            **meta,
-            **({"process_name": process_name} if process_name else {}),
-            **({"tags": tags} if tags else {}),
-            **({"file_name": file_name} if file_name else {}),
-        }
+    for i, match in enumerate(matches):
+        if match is None:
+            continue
+        # Nur Partner aus diesem Batch lassen sich einklappen; gespeicherte
+        # Treffer (auch frühere Batches desselben Dokuments) werden markiert
+        if not (collapse and match.is_local):
+            extra[i]["duplicate_of"] = match.canonical_id
+            continue
 
-        # --- OpenSearch ---
-        os_client.index(
-            index=os_index,
-            id=f"{doc_id}:{i}",
-            body={"document_id": doc_id, "text": t, "meta": os_meta},
+        skip.add(i)
+        entry = duplicate_source_entry(doc_id, chunk_ids[i], chunks[i][1], file_name)
+        canonical_meta = chunks[int(match.canonical_id.rsplit(":", 1)[1]) - start_index][1]
+        canonical_meta.setdefault("duplicate_sources", []).append(entry)
+
+    n_dups = sum(1 for m in matches if m is not None)
+    if n_dups:
+        logger.info(
+            f"Dedup ({settings.DEDUP_MODE}): {n_dups}/{len(chunks)} Near-Duplicates in {doc_id}"
         )
+    return extra, skip
 
-    # --- Qdrant ---
-    from qdrant_client.http.models import PointStruct
 
-    points = []
-    for i, ((t, meta), v) in enumerate(zip(chunks, vectors)):
+@dataclass
+class ChunkGroup:
+    """Chunks eines Dokuments für index_chunk_groups (chunk_id = doc_id:start_index+i)."""
 
-        payload = {
-            "document_id": doc_id,
-            "text": t,
-            "chunk_id": f"{doc_id}:{i}",
-            "process_name": process_name,
-            "tags": tags,
-            "file_name": file_name,
-            **meta,
-        }
-        points.append(PointStruct(id=_uuid_for(doc_id, i), vector=v, payload=payload))
-    qd.upsert(collection_name=qdrant_col, points=points)
+    doc_id: str
+    chunks: List[Tuple[str, dict]]
+    process_name: str | None = None
+    tags: str | None = None
+    file_name: str | None = None
+    start_index: int = 0
 
 
-def delete_all_chunks_opensearch() -> int:
-    """
-    Löscht ALLE Dokument-Chunks aus dem OpenSearch-Index.
-    """
-    os_client = get_opensearch()
-    resp = os_client.delete_by_query(
-        index=settings.OS_INDEX,
-        body={"query": {"match_all": {}}},
-    )
-    return int(resp.get("deleted", 0))
+QDRANT_UPSERT_BATCH = 256
 
 
-def delete_chunks_by_process_opensearch(process_name: str, os_index: str | None = None) -> int:
-    """
-    Löscht alle Chunks mit meta.process_name == process_name aus OpenSearch.
-    
-    Args:
-        process_name: Der Prozessname nach dem gefiltert wird
-        os_index: Optional - OpenSearch Index (default: settings.OS_INDEX)
+def index_chunk_groups(
+    groups: List[ChunkGroup],
+    strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE,
+    stats: Optional[Dict[str, Any]] = None,
+) -> int:
     """
-    os_client = get_opensearch()
-    index = os_index or settings.OS_INDEX
-    resp = os_client.delete_by_query(
-        index=index,
-        body={"query": {"terms": {"meta.process_name": [process_name]}}},
-    )
-    return int(resp.get("deleted", 0))
+    Indexiert die Chunks mehrerer Dokumente einer Strategie gemeinsam.
 
+    Dedup läuft pro Dokument; Embedding erfolgt in einem embed_texts_bulk-Aufruf
+    über alle Dokumente, OpenSearch per Bulk-API und Qdrant in Upsert-Batches.
 
-def delete_all_chunks_qdrant() -> None:
+    Returns:
+        Anzahl indexierter Chunks
     """
-    Löscht ALLE Punkte aus der Qdrant-Collection.
+    os_index, qdrant_col = _get_index_names(strategy)
 
-    Implementiert als: Collection droppen und via ensure_indices() neu anlegen.
-    """
-    qd = get_qdrant()
-    try:
-        qd.delete_collection(settings.QDRANT_COLLECTION)
-    except Exception:
-        pass
-    ensure_indices()
+    if settings.PROCESS_SHARDING:
+        # Pro Prozess in den eigenen Shard (ohne process_name: Basis-Index)
+        by_target: Dict[Tuple[str, str], List[ChunkGroup]] = {}
+        for g in groups:
+            by_target.setdefault(write_target(os_index, qdrant_col, g.process_name), []).append(g)
+        return sum(
+            _index_chunk_groups_into(t_os, t_qd, t_groups, stats)
+            for (t_os, t_qd), t_groups in by_target.items()
+        )
+    return _index_chunk_groups_into(os_index, qdrant_col, groups, stats)
 
 
-def delete_chunks_by_process_qdrant(process_name: str, qdrant_collection: str | None = None) -> None:
-    """
-    Löscht alle Punkte aus Qdrant, deren payload.process_name == process_name ist.
-    
-    Args:
-        process_name: Der Prozessname nach dem gefiltert wird
-        qdrant_collection: Optional - Qdrant Collection (default: settings.QDRANT_COLLECTION)
-    """
+def _index_chunk_groups_into(
+    os_index: str,
+    qdrant_col: str,
+    groups: List[ChunkGroup],
+    stats: Optional[Dict[str, Any]] = None,
+) -> int:
+    from opensearchpy.helpers import bulk
+    from qdrant_client.http.models import PointStruct
+
+    os_client = get_opensearch()
     qd = get_qdrant()
-    collection = qdrant_collection or settings.QDRANT_COLLECTION
-    return qd.delete(
-        collection_name=collection,
-        points_selector=Filter(
-            must=[
-                FieldCondition(
-                    key="process_name",
-                    match=MatchValue(value=process_name),
-                )
-            ]
-        ),
-    )
 
+    # --- Near-Duplicates (MinHash/LSH) ---
+    t0 = time.perf_counter()
+    items: List[Tuple[ChunkGroup, int, Dict[str, Any]]] = []
+    for g in groups:
+        extra: List[Dict[str, Any]] = [{} for _ in g.chunks]
+        skip: set = set()
+        if settings.DEDUP_MODE in ("mark", "collapse"):
+            extra, skip = _dedup_chunks(
+                os_index,
+                g.doc_id,
+                g.chunks,
+                process_name=g.process_name,
+                tags=g.tags,
+                file_name=g.file_name,
+                start_index=g.start_index,
+            )
+        # Chunk-Indizes bleiben stabil (chunk_id = doc_id:i), übersprungene fehlen
+        items.extend((g, i, extra[i]) for i in range(len(g.chunks)) if i not in skip)
+    _record_timing(stats, "dedup", time.perf_counter() - t0)
+    if stats is not None:
+        stats["indexed_chunks"] = len(items)
+    if not items:
+        return 0
+
+    t0 = time.perf_counter()
+    texts = [g.chunks[i][0] for g, i, _ in items]
+    label = groups[0].doc_id if len(groups) == 1 else f"{len(groups)} Dokumente"
+    vectors = embed_texts_bulk(texts, label=label)
+    _record_timing(stats, "embed", time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    actions = []
+    points = []
+    for (g, i, extra), v in zip(items, vectors):
+        t, meta = g.chunks[i]
+        idx = g.start_index + i
+        chunk_id = f"{g.doc_id}:{idx}"
 
-def delete_chunks_by_tag_opensearch(tag: str, os_index: str | None = None) -> int:
-    """
-    Löscht alle Chunks mit meta.tags == tag aus OpenSearch.
-    
-    Args:
-        tag: Der Tag nach dem gefiltert wird
-        os_index: Optional - OpenSearch Index (default: settings.OS_INDEX)
-    """
-    os_client = get_opensearch()
-    index = os_index or settings.OS_INDEX
-    resp = os_client.delete_by_query(
-        index=index,
-        body={"query": {"terms": {"meta.tags.keyword": [tag]}}},
-    )
-    return int(resp.get("deleted", 0))
+        # --- OpenSearch ---
+        # erweiterte Meta/Payload
+        os_meta = {
+            **meta,
+            **({"process_name": g.process_name} if g.process_name else {}),
+            **({"tags": g.tags} if g.tags else {}),
+            **({"file_name": g.file_name} if g.file_name else {}),
+        }
+        actions.append(
+            {
+                "_index": os_index,
+                "_id": chunk_id,
+                "_source": {"document_id": g.doc_id, "text": t, "meta": os_meta, **extra},
+            }
+        )
+
+        # --- Qdrant ---
+        payload = {
+            "document_id": g.doc_id,
+            "text": t,
+            "chunk_id": chunk_id,
+            "process_name": g.process_name,
+            "tags": g.tags,
+            "file_name": g.file_name,
+            **meta,
+            **({"duplicate_of": extra["duplicate_of"]} if "duplicate_of" in extra else {}),
+        }
+        points.append(PointStruct(id=_uuid_for(g.doc_id, idx), vector=point_vector(v, t), payload=payload))
 
+    bulk(os_client, actions)
+    for k in range(0, len(points), QDRANT_UPSERT_BATCH):
+        qd.upsert(collection_name=qdrant_col, points=points[k:k + QDRANT_UPSERT_BATCH])
+    _record_timing(stats, "index", time.perf_counter() - t0)
+    return len(items)
 
-def delete_chunks_by_tag_qdrant(tag: str, qdrant_collection: str | None = None) -> None:
-    """
-    Löscht alle Punkte aus Qdrant, deren payload.tags == tag ist.
-    
-    Args:
-        tag: Der Tag nach dem gefiltert wird
-        qdrant_collection: Optional - Qdrant Collection (default: settings.QDRANT_COLLECTION)
-    """
-    qd = get_qdrant()
-    collection = qdrant_collection or settings.QDRANT_COLLECTION
-    return qd.delete(
-        collection_name=collection,
-        points_selector=Filter(
-            must=[
-                FieldCondition(
-                    key="tags",
-                    match=MatchValue(value=tag),
-                )
-            ]
-        ),
+
+def index_chunks(
+    doc_id: str,
+    chunks: List[Tuple[str, dict]],
+    *,
+    process_name: str | None = None,
+    tags: str | None = None,
+    file_name: str | None = None,
+    strategy: ChunkingStrategy = ChunkingStrategy.BY_TITLE,
+    stats: Optional[Dict[str, Any]] = None,
+    start_index: int = 0,
+):
+    return index_chunk_groups(
+        [ChunkGroup(doc_id, chunks, process_name, tags, file_name, start_index)],
+        strategy=strategy,
+        stats=stats,
     )
 
 
+_ensured_strategies: set = set()
+
+
+def ensure_indices_once(strategy: ChunkingStrategy) -> None:
+    """ensure_indices nur beim ersten Aufruf pro Prozess und Strategie."""
+    if strategy not in _ensured_strategies:
+        ensure_indices(strategy)
+        _ensured_strategies.add(strategy)
+
+
 # --- Background consumer (Redis Streams) ---
 async def consume_uploads(r):
     """Liest aus Stream 'doc.uploaded' und führt parse+index aus."""
@@ -955,21 +766,47 @@ async def consume_uploads(r):
                 except ValueError:
                     strategy = ChunkingStrategy.BY_TITLE
 
+                stats: Dict[str, Any] = {}
                 try:
                     if not p.exists():
                         raise FileNotFoundError(f"Upload file missing: {p}")
-                    parsed = parse_pdf(
-                        str(p), strategy=strategy
+                    file_bytes = p.stat().st_size
+                    await update_job(
+                        r, doc_id, status="parsing", started_at=time.time(), bytes=file_bytes
+                    )
+                    # Blockierende Verarbeitung im Thread, damit Status-Endpoints erreichbar bleiben
+                    parsed = await asyncio.to_thread(
+                        parse_pdf, str(p), strategy=strategy, stats=stats
                     )  # -> List[(text, payload)]  payload enthält page_number/section_title/roles
+                    chunk_chars = sum(len(t) for t, _ in parsed)
+                    await update_job(
+                        r,
+                        doc_id,
+                        status="indexing",
+                        chunks=len(parsed),
+                        chunk_chars=chunk_chars,
+                        timings=stats.get("timings", {}),
+                    )
                     if parsed:
-                        index_chunks(
+                        await asyncio.to_thread(
+                            index_chunks,
                             doc_id,
                             parsed,
                             process_name=process_name,
                             tags=tags,
                             file_name=file_name,
                             strategy=strategy,
+                            stats=stats,
                         )
+                    await finish_job(
+                        r,
+                        doc_id,
+                        stats,
+                        chunks=len(parsed),
+                        chunk_chars=chunk_chars,
+                        file_bytes=file_bytes,
+                    )
+                    logger.info(f"Ingestion {doc_id}: {len(parsed)} Chunks, {stats.get('timings')}")
                     await r.xadd(
                         "doc.indexed",
                         {
@@ -978,10 +815,14 @@ async def consume_uploads(r):
                             "tags": tags,
                             "process_name": process_name,
                             "chunking_strategy": strategy.value,
+                            "boilerplate_chars_dropped": str(
+                                stats.get("boilerplate", {}).get("dropped_chars", 0)
+                            ),
                         },
                     )
                     await r.xack(stream, group, msg_id)
                 except Exception as e:
+                    await fail_job(r, doc_id, str(e), stats)
                     await r.xadd("doc.failed", {"document_id": doc_id, "error": str(e)})
                     await r.xack(stream, group, msg_id)
         await asyncio.sleep(0.1)
@@ -0,0 +1,301 @@
+"""
+Qdrant-Collection-Konfiguration: Payload-Indizes, HNSW, Quantisierung, On-Disk.
+
+`ensure_indices` legt neue Collections mit `collection_create_kwargs` an und
+gleicht bestehende per `migrate_collection` an (fehlende Payload-Indizes,
+abweichende HNSW-/Quantisierungs-/On-Disk-Einstellungen, Sparse-Vektor).
+`search_params` liefert die passenden Suchparameter (ef, Rescoring bei int8).
+
+Matryoshka (EMBED_TRUNCATE_DIM > 0): der unbenannte Vektor enthält das auf
+die ersten N Dimensionen gekürzte und renormalisierte Embedding (HNSW, RAM),
+FULL_VECTOR_NAME das volle Embedding (On-Disk, ohne HNSW). Gesucht wird auf
+dem gekürzten Vektor, die besten Kandidaten werden mit dem vollen Vektor neu
+bewertet (`dense_query`). `point_vector` baut das passende Vektor-Dict.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from qdrant_client.http.models import (
+    CollectionParamsDiff,
+    Distance,
+    HnswConfigDiff,
+    Modifier,
+    PayloadSchemaType,
+    Prefetch,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SparseVectorParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+
+from app.core.config import settings
+from app.core.clients import get_logger
+from app.services.sparse import SPARSE_VECTOR_NAME, sparse_doc_vector
+
+logger = get_logger(__name__)
+
+# Unbenannter Default-Vektor (bei Matryoshka: gekürzt) und voller Vektor
+DENSE_VECTOR_NAME = ""
+FULL_VECTOR_NAME = "full"
+
+# Payload-Felder, nach denen gefiltert wird (hybrid_search, Dedup, Löschen, Reindex)
+PAYLOAD_INDEX_FIELDS: Dict[str, PayloadSchemaType] = {
+    "process_name": PayloadSchemaType.KEYWORD,
+    "tags": PayloadSchemaType.KEYWORD,
+    "chunk_id": PayloadSchemaType.KEYWORD,
+    "document_id": PayloadSchemaType.KEYWORD,
+    "duplicate_of": PayloadSchemaType.KEYWORD,
+}
+
+
+def _quantization_enabled() -> bool:
+    return settings.QDRANT_QUANTIZATION == "int8"
+
+
+def hnsw_config() -> HnswConfigDiff:
+    return HnswConfigDiff(
+        m=settings.QDRANT_HNSW_M,
+        ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+        on_disk=settings.QDRANT_VECTORS_ON_DISK,
+    )
+
+
+def quantization_config() -> Optional[ScalarQuantization]:
+    if not _quantization_enabled():
+        return None
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8,
+            quantile=settings.QDRANT_QUANTIZATION_QUANTILE,
+            # Quantisierte Vektoren im RAM, Originale ggf. auf Disk (für Rescoring)
+            always_ram=True,
+        )
+    )
+
+
+def sparse_vectors_config() -> Optional[Dict[str, SparseVectorParams]]:
+    if not settings.QDRANT_SPARSE_VECTORS:
+        return None
+    # IDF rechnet Qdrant aus den Dokumenthäufigkeiten der Collection
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def truncate_dim(dim: int) -> Optional[int]:
+    """Gekürzte Dimension für ein Modell mit `dim` Dimensionen (None = keine Kürzung)."""
+    t = settings.EMBED_TRUNCATE_DIM
+    return t if 0 < t < dim else None
+
+
+def truncate_vector(vector: List[float], dim: int) -> List[float]:
+    """Erste `dim` Komponenten, auf Länge 1 renormalisiert (Matryoshka)."""
+    head = np.asarray(vector[:dim], dtype=np.float32)
+    norm = float(np.linalg.norm(head))
+    return (head / norm if norm > 0 else head).tolist()
+
+
+def vectors_config(dim: int, distance: Distance = Distance.COSINE) -> Union[VectorParams, Dict[str, VectorParams]]:
+    short = truncate_dim(dim)
+    if short is None:
+        return VectorParams(size=dim, distance=distance, on_disk=settings.QDRANT_VECTORS_ON_DISK)
+    return {
+        DENSE_VECTOR_NAME: VectorParams(size=short, distance=distance, on_disk=settings.QDRANT_VECTORS_ON_DISK),
+        # Nur für das Rescoring: auf Disk, kein HNSW-Graph
+        FULL_VECTOR_NAME: VectorParams(
+            size=dim, distance=distance, on_disk=True, hnsw_config=HnswConfigDiff(m=0)
+        ),
+    }
+
+
+def collection_create_kwargs(dim: int, distance: Distance = Distance.COSINE) -> Dict[str, Any]:
+    """Argumente für qd.create_collection gemäß Settings (`dim` = volle Modelldimension)."""
+    return {
+        "vectors_config": vectors_config(dim, distance),
+        "sparse_vectors_config": sparse_vectors_config(),
+        "hnsw_config": hnsw_config(),
+        "quantization_config": quantization_config(),
+        "on_disk_payload": settings.QDRANT_PAYLOAD_ON_DISK,
+    }
+
+
+def search_params() -> SearchParams:
+    """Suchparameter: hnsw_ef und bei int8-Quantisierung Rescoring mit Oversampling."""
+    quantization = None
+    if _quantization_enabled():
+        quantization = QuantizationSearchParams(
+            rescore=True, oversampling=settings.QDRANT_RESCORE_OVERSAMPLING
+        )
+    return SearchParams(hnsw_ef=settings.QDRANT_HNSW_EF, quantization=quantization)
+
+
+# Alias kann per Swap auf eine andere Version zeigen → kurze TTL statt Dauer-Cache
+_LAYOUT_CACHE_TTL = 60.0
+_layout_cache: Dict[str, Tuple[float, Dict[str, int]]] = {}
+_layout_lock = threading.Lock()
+
+
+def vector_layout(qd, collection: str) -> Dict[str, int]:
+    """{Vektorname: Dimension} einer Collection (oder hinter einem Alias); Sparse-Vektoren mit 0."""
+    from app.services.index_aliases import qdrant_alias_target
+
+    now = time.monotonic()
+    with _layout_lock:
+        hit = _layout_cache.get(collection)
+        if hit and now - hit[0] < _LAYOUT_CACHE_TTL:
+            return hit[1]
+    physical = qdrant_alias_target(qd, collection) or collection
+    params = qd.get_collection(physical).config.params
+    dense = params.vectors if isinstance(params.vectors, dict) else {DENSE_VECTOR_NAME: params.vectors}
+    layout = {name: v.size for name, v in dense.items()}
+    layout.update({name: 0 for name in params.sparse_vectors or {}})
+    with _layout_lock:
+        _layout_cache[collection] = (now, layout)
+    return layout
+
+
+def has_sparse_vectors(qd, collection: str) -> bool:
+    return SPARSE_VECTOR_NAME in vector_layout(qd, collection)
+
+
+def has_full_vectors(qd, collection: str) -> bool:
+    """Matryoshka-Layout (gekürzter HNSW-Vektor + voller Vektor fürs Rescoring)."""
+    return FULL_VECTOR_NAME in vector_layout(qd, collection)
+
+
+def full_vector_params(qd, collection: str) -> VectorParams:
+    """Parameter des vollen Dense-Vektors (Dimension = Modelldimension)."""
+    vectors = qd.get_collection(collection).config.params.vectors
+    if isinstance(vectors, dict):
+        return vectors.get(FULL_VECTOR_NAME) or vectors.get(DENSE_VECTOR_NAME) or next(iter(vectors.values()))
+    return vectors
+
+
+def point_vector(dense: List[float], text: str) -> Union[List[float], Dict[str, Any]]:
+    """Vektor für PointStruct gemäß Settings: Dense, ggf. gekürzt + voll, ggf. + Sparse."""
+    short = truncate_dim(len(dense))
+    if short is None and not settings.QDRANT_SPARSE_VECTORS:
+        return dense
+    vector: Dict[str, Any] = {DENSE_VECTOR_NAME: dense}
+    if short is not None:
+        vector = {DENSE_VECTOR_NAME: truncate_vector(dense, short), FULL_VECTOR_NAME: dense}
+    if settings.QDRANT_SPARSE_VECTORS:
+        vector[SPARSE_VECTOR_NAME] = sparse_doc_vector(text)
+    return vector
+
+
+def _matryoshka_candidates(qd, collection: str, vector: List[float], limit: int, query_filter) -> Prefetch:
+    """HNSW-Kandidaten auf dem gekürzten Vektor (limit * MATRYOSHKA_RESCORE_FACTOR)."""
+    return Prefetch(
+        query=truncate_vector(vector, vector_layout(qd, collection)[DENSE_VECTOR_NAME]),
+        filter=query_filter,
+        limit=max(limit, int(limit * settings.MATRYOSHKA_RESCORE_FACTOR)),
+        params=search_params(),
+    )
+
+
+def dense_query_kwargs(
+    qd, collection: str, vector: List[float], limit: int, query_filter=None
+) -> Dict[str, Any]:
+    """query_points-Argumente für die Dense-Suche im Matryoshka-Layout (Rescoring mit vollem Vektor)."""
+    return {
+        "prefetch": [_matryoshka_candidates(qd, collection, vector, limit, query_filter)],
+        "query": vector,
+        "using": FULL_VECTOR_NAME,
+        "limit": limit,
+    }
+
+
+def dense_prefetch(qd, collection: str, vector: List[float], limit: int, query_filter=None) -> Prefetch:
+    """Dense-Trefferliste als Prefetch (für Fusion); bei Matryoshka inkl. Rescoring."""
+    if not has_full_vectors(qd, collection):
+        return Prefetch(query=vector, filter=query_filter, limit=limit, params=search_params())
+    return Prefetch(**dense_query_kwargs(qd, collection, vector, limit, query_filter))
+
+
+def ensure_payload_indexes(qd, collection: str, existing: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Legt fehlende Payload-Indizes an. Returns: neu angelegte Felder."""
+    if existing is None:
+        existing = qd.get_collection(collection).payload_schema or {}
+    created = []
+    for field_name, schema in PAYLOAD_INDEX_FIELDS.items():
+        if field_name in existing:
+            continue
+        qd.create_payload_index(
+            collection_name=collection, field_name=field_name, field_schema=schema, wait=True
+        )
+        created.append(field_name)
+    return created
+
+
+def migrate_collection(qd, collection: str) -> Dict[str, Any]:
+    """
+    Gleicht eine bestehende Collection an die Settings an.
+
+    - fehlende Payload-Indizes anlegen
+    - HNSW m/ef_construct, Quantisierung und On-Disk-Platzierung per
+      update_collection nachziehen (Qdrant baut Segmente im Hintergrund um)
+
+    Returns:
+        Dict der vorgenommenen Änderungen (leer = nichts zu tun)
+    """
+    info = qd.get_collection(collection)
+    changes: Dict[str, Any] = {}
+
+    created = ensure_payload_indexes(qd, collection, info.payload_schema or {})
+    if created:
+        changes["payload_indexes"] = created
+
+    update: Dict[str, Any] = {}
+    hnsw = info.config.hnsw_config
+    if (hnsw.m, hnsw.ef_construct, bool(hnsw.on_disk)) != (
+        settings.QDRANT_HNSW_M,
+        settings.QDRANT_HNSW_EF_CONSTRUCT,
+        settings.QDRANT_VECTORS_ON_DISK,
+    ):
+        update["hnsw_config"] = hnsw_config()
+
+    has_quantization = info.config.quantization_config is not None
+    if has_quantization != _quantization_enabled():
+        # Entfernen über Disabled, Hinzufügen über die int8-Konfiguration
+        if _quantization_enabled():
+            update["quantization_config"] = quantization_config()
+        else:
+            from qdrant_client.http.models import Disabled
+
+            update["quantization_config"] = Disabled.DISABLED
+
+    params = info.config.params
+    vectors = params.vectors
+    if isinstance(vectors, VectorParams) and truncate_dim(vectors.size) is not None:
+        # Benannte Vektoren lassen sich nicht nachträglich anlegen
+        logger.warning(
+            f"{collection}: EMBED_TRUNCATE_DIM={settings.EMBED_TRUNCATE_DIM} gesetzt, Collection hat volle "
+            f"Dimension {vectors.size} – neue Version per reindex --alias bauen"
+        )
+    if isinstance(vectors, VectorParams) and bool(vectors.on_disk) != settings.QDRANT_VECTORS_ON_DISK:
+        update["vectors_config"] = {"": VectorParamsDiff(on_disk=settings.QDRANT_VECTORS_ON_DISK)}
+    if settings.QDRANT_SPARSE_VECTORS and SPARSE_VECTOR_NAME not in (params.sparse_vectors or {}):
+        # Sparse-Vektoren lassen sich nicht nachträglich anlegen, bestehende
+        # Punkte hätten ohnehin keinen → Hybrid-Suche bliebe ohne Lexik
+        logger.warning(
+            f"{collection}: QDRANT_SPARSE_VECTORS gesetzt, Collection hat keinen Sparse-Vektor "
+            f"'{SPARSE_VECTOR_NAME}' – neue Version per reindex --alias bauen"
+        )
+    if bool(params.on_disk_payload) != settings.QDRANT_PAYLOAD_ON_DISK:
+        update["collection_params"] = CollectionParamsDiff(on_disk_payload=settings.QDRANT_PAYLOAD_ON_DISK)
+
+    if update:
+        qd.update_collection(collection_name=collection, **update)
+        changes.update({k: True for k in update})
+
+    if changes:
+        logger.info(f"Qdrant-Migration {collection}: {changes}")
+    return changes
@@ -13,7 +13,7 @@ from typing import List, Optional
 import logging
 
 from app.core.models.askModel import ChatMessage
-from app.services.llm import generate
+from app.services.llm import agenerate, generate
 from app.core.llm_config import LLMPresets
 
 logger = logging.getLogger(__name__)
@@ -89,36 +89,62 @@ def reformulate_query(
         return query
     
     try:
-        # Format history (last N*2 messages = N turns)
-        recent_history = chat_history[-(max_history_turns * 2):]
-        history_str = "\n".join(
-            f"{'Nutzer' if m.role == 'user' else 'Assistent'}: {m.content[:150]}"
-            for m in recent_history
-        )
-        
         # Generate reformulated query
-        prompt = REFORMULATION_PROMPT.format(history=history_str, query=query)
+        prompt = _reformulation_prompt(query, chat_history, max_history_turns)
         reformulated = generate(prompt, LLMPresets.fast_classification())
-        reformulated = reformulated.strip()
-        
-        # Clean up common issues
-        reformulated = reformulated.strip('"').strip("'")
-        if reformulated.lower().startswith("eigenständige frage:"):
-            reformulated = reformulated[20:].strip()
-        
-        # Validate result - reject if same as input or too short
-        if reformulated and len(reformulated) > 3 and reformulated.lower() != query.lower():
-            logger.info(f"Query reformulated: '{query}' -> '{reformulated}'")
-            return reformulated
-        else:
-            logger.warning(f"Reformulation unchanged or invalid, using original")
-            return query
+        return _accept_reformulation(query, reformulated)
             
     except Exception as e:
         logger.error(f"Query reformulation failed: {e}")
         return query
 
 
+async def areformulate_query(
+    query: str,
+    chat_history: Optional[List[ChatMessage]],
+    max_history_turns: int = 2,
+) -> str:
+    """Async-Variante von reformulate_query."""
+    if not chat_history:
+        logger.debug("No history, skipping reformulation")
+        return query
+    
+    try:
+        prompt = _reformulation_prompt(query, chat_history, max_history_turns)
+        reformulated = await agenerate(prompt, LLMPresets.fast_classification(), hedge=True)
+        return _accept_reformulation(query, reformulated)
+    except Exception as e:
+        logger.error(f"Query reformulation failed: {e}")
+        return query
+
+
+def _reformulation_prompt(query: str, chat_history: List[ChatMessage], max_history_turns: int) -> str:
+    # Format history (last N*2 messages = N turns)
+    recent_history = chat_history[-(max_history_turns * 2):]
+    history_str = "\n".join(
+        f"{'Nutzer' if m.role == 'user' else 'Assistent'}: {m.content[:150]}"
+        for m in recent_history
+    )
+    return REFORMULATION_PROMPT.format(history=history_str, query=query)
+
+
+def _accept_reformulation(query: str, reformulated: str) -> str:
+    reformulated = reformulated.strip()
+    
+    # Clean up common issues
+    reformulated = reformulated.strip('"').strip("'")
+    if reformulated.lower().startswith("eigenständige frage:"):
+        reformulated = reformulated[20:].strip()
+    
+    # Validate result - reject if same as input or too short
+    if reformulated and len(reformulated) > 3 and reformulated.lower() != query.lower():
+        logger.info(f"Query reformulated: '{query}' -> '{reformulated}'")
+        return reformulated
+    else:
+        logger.warning(f"Reformulation unchanged or invalid, using original")
+        return query
+
+
 def should_reformulate(query: str, chat_history: Optional[List[ChatMessage]]) -> bool:
     """
     Heuristik: Soll die Query reformuliert werden?
@@ -2,7 +2,18 @@ from typing import List, Dict, Any, Optional, Set
 
 from app.core.config import settings
 from app.core.clients import get_logger, get_opensearch, get_qdrant
+from app.core.executors import run_cpu, run_io
+from app.core.llm_transport import allm_client, llm_client, llm_timeout
 from app.services.pipeline import embed_texts
+from app.services.qdrant_schema import (
+    dense_prefetch,
+    dense_query_kwargs,
+    has_full_vectors,
+    has_sparse_vectors,
+    search_params,
+)
+from app.services.sharding import search_targets
+from app.services.sparse import SPARSE_VECTOR_NAME, sparse_query_vector
 
 logger = get_logger(__name__)
 
@@ -39,17 +50,89 @@ def embed_texts_dynamic(
         with _embed_dynamic_lock:
             return _model.encode(texts, normalize_embeddings=True).tolist()
     else:
-        import requests
-
-        resp = requests.post(
-            f"{settings.OLLAMA_BASE}/api/embed",
+        resp = llm_client("ollama").post(
+            "/api/embed",
             json={"model": model, "input": texts},
-            timeout=120,
+            timeout=llm_timeout(120),
         )
         resp.raise_for_status()
         return resp.json()["embeddings"]
 
 
+async def aembed_texts_dynamic(
+    texts: List[str],
+    backend: str = "hf",
+    model: str = "sentence-transformers/all-minilm-l6-v2",
+) -> List[List[float]]:
+    """Async-Variante von embed_texts_dynamic (HF-Modell läuft im CPU-Pool)."""
+    if backend == "hf":
+        return await run_cpu(embed_texts_dynamic, texts, backend=backend, model=model)
+    # Query-Embedding ist idempotent und kurz → Hedging erlaubt
+    resp = await allm_client("ollama").post(
+        "/api/embed",
+        json={"model": model, "input": texts},
+        timeout=llm_timeout(120),
+        hedge=True,
+    )
+    resp.raise_for_status()
+    return resp.json()["embeddings"]
+
+
+def _qdrant_filter(
+    process_name: Optional[str], tags: Optional[List[str]], skip_duplicates: bool
+):
+    from qdrant_client.http.models import (
+        Filter,
+        FieldCondition,
+        MatchValue,
+        MatchAny,
+        IsEmptyCondition,
+        PayloadField,
+    )
+
+    must_conditions = []
+
+    if process_name:
+        must_conditions.append(
+            FieldCondition(key="process_name", match=MatchValue(value=process_name))
+        )
+    if tags:
+        if isinstance(tags, str):
+            tags_list = [tags]
+        else:
+            tags_list = list(tags)
+
+        must_conditions.append(
+            FieldCondition(
+                key="tags",
+                match=MatchAny(any=tags_list),
+            )
+        )
+
+    if skip_duplicates:
+        # Nur Punkte ohne duplicate_of (fehlt bei kanonischen Chunks)
+        must_conditions.append(IsEmptyCondition(is_empty=PayloadField(key="duplicate_of")))
+
+    return Filter(must=must_conditions) if must_conditions else None
+
+
+def _doc_from_payload(cid: str, payload: Dict[str, Any], score: float, source_label: str) -> Dict[str, Any]:
+    """Ergebnis-Dict aus dem Qdrant-Payload (gleiche Felder wie aus OpenSearch)."""
+    return {
+        "chunk_id": cid,
+        "text": payload.get("text", ""),
+        "document_id": payload.get("document_id"),
+        "file_name": payload.get("file_name"),
+        "process_name": payload.get("process_name"),
+        "tags": payload.get("tags"),
+        "page_number": payload.get("page_number"),
+        "section_title": payload.get("section_title"),
+        "title": payload.get("title") or payload.get("section_title"),
+        "rrf_score": score,
+        "source": source_label,
+    }
+
+
 def hybrid_search(
     q: str,
     k: int,
@@ -65,6 +148,7 @@ def hybrid_search(
     qdrant_collection: Optional[str] = None,
     embedding_backend: str = "hf",
     embedding_model: str = "sentence-transformers/all-minilm-l6-v2",
+    skip_duplicates: bool = True,
 ) -> List[Dict[str, Any]]:
     """
     Hybrid Search mit dynamischer Embedding-Konfiguration.
@@ -81,10 +165,53 @@ def hybrid_search(
         qdrant_collection: Qdrant Collection (default aus settings)
         embedding_backend: "ollama" oder "hf"
         embedding_model: Modellname für Embeddings
+        skip_duplicates: Als Near-Duplicate markierte Chunks (duplicate_of) ausblenden
 
     Returns:
         Liste von Chunks mit Scores
     """
+    candidates = search_candidates(
+        q,
+        k,
+        retrieval_mode=retrieval_mode,
+        process_name=process_name,
+        tags=tags,
+        use_rerank=use_rerank,
+        rerank_top_n=rerank_top_n,
+        os_index=os_index,
+        qdrant_collection=qdrant_collection,
+        embedding_backend=embedding_backend,
+        embedding_model=embedding_model,
+        skip_duplicates=skip_duplicates,
+    )
+    return rank_results(q, candidates, k, use_rerank)
+
+
+def search_candidates(
+    q: str,
+    k: int,
+    *,
+    # Retrieval-Modus für H1 Hypothesentest
+    retrieval_mode: str = "hybrid",  # "hybrid" | "vector_only" | "bm25_only"
+    # optionale Filter
+    process_name: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    use_rerank: bool = False,
+    rerank_top_n: int = 50,
+    os_index: Optional[str] = None,
+    qdrant_collection: Optional[str] = None,
+    embedding_backend: str = "hf",
+    embedding_model: str = "sentence-transformers/all-minilm-l6-v2",
+    skip_duplicates: bool = True,
+    query_vector: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Schritte 1-4 von hybrid_search: Suche, Fusion, Quellen nachladen.
+
+    Liefert die Kandidaten ohne Reranking (rerank_top_n bei use_rerank,
+    sonst k). Mit `query_vector` entfällt das Query-Embedding (bereits
+    asynchron berechnet).
+    """
     logger.info(f"Retrieval mode: {retrieval_mode}")
 
     os_client = get_opensearch()
@@ -94,14 +221,29 @@ def hybrid_search(
     os_idx = os_index or settings.OS_INDEX
     qd_col = qdrant_collection or settings.QDRANT_COLLECTION
 
-    
+    # Bei Prozess-Sharding: nur der Shard des Prozesses bzw. Fan-out über alle
+    targets = search_targets(os_idx, qd_col, process_name)
+    os_targets = [t[0] for t in targets]
+    qd_targets = [t[1] for t in targets]
+
     fetch_k = rerank_top_n if use_rerank else k * 5
 
+    # Hybrid komplett in Qdrant (Sparse + Dense, RRF im Server): ohne
+    # OpenSearch-Suche und mget, Texte/Metadaten kommen aus dem Payload
+    server_fused = (
+        retrieval_mode == "hybrid"
+        and settings.HYBRID_ENGINE == "qdrant"
+        and all(has_sparse_vectors(qd, c) for c in qd_targets)
+    )
+    payloads: Dict[str, Dict[str, Any]] = {}
+
     os_rrf: Dict[str, float] = {}
     qd_rrf: Dict[str, float] = {}
+    # chunk_id → Index, in dem der Chunk liegt (für mget über mehrere Shards)
+    cid_index: Dict[str, str] = {}
 
     # ---------- 1) OpenSearch: Volltext + Filter (BM25) ----------
-    if retrieval_mode in ("hybrid", "bm25_only"):
+    if retrieval_mode in ("hybrid", "bm25_only") and not server_fused:
         should = [
             {
                 "multi_match": {
@@ -128,62 +270,96 @@ def hybrid_search(
         bool_query: Dict[str, Any] = {"must": should}
         if os_filters:
             bool_query["filter"] = os_filters
+        if skip_duplicates:
+            bool_query["must_not"] = [{"exists": {"field": "duplicate_of"}}]
 
         os_resp = os_client.search(
-            index=os_idx,
+            index=",".join(os_targets),
             body={
                 "size": fetch_k,
                 "query": {"bool": bool_query},
             },
+            ignore_unavailable=True,
         )
 
         os_hits = os_resp["hits"]["hits"]
         os_rrf = {h["_id"]: rrf(i) for i, h in enumerate(os_hits, start=1)}
+        for h in os_hits:
+            cid_index.setdefault(h["_id"], h["_index"])
         logger.debug(f"BM25 returned {len(os_hits)} hits")
 
     # ---------- 2) Qdrant: Vektor + Payload-Filter ----------
     if retrieval_mode in ("hybrid", "vector_only"):
-        from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny
-
-        must_conditions = []
+        qfilter = _qdrant_filter(process_name, tags, skip_duplicates)
 
-        if process_name:
-            must_conditions.append(
-                FieldCondition(key="process_name", match=MatchValue(value=process_name))
+        
+        vec = query_vector or embed_texts_dynamic([q], backend=embedding_backend, model=embedding_model)[0]
+
+        def _search_collection(col: str):
+            if server_fused:
+                from qdrant_client.http.models import Fusion, FusionQuery, Prefetch
+
+                return qd.query_points(
+                    collection_name=col,
+                    prefetch=[
+                        dense_prefetch(qd, col, vec, fetch_k, qfilter),
+                        Prefetch(
+                            query=sparse_query_vector(q),
+                            using=SPARSE_VECTOR_NAME,
+                            filter=qfilter,
+                            limit=fetch_k,
+                        ),
+                    ],
+                    query=FusionQuery(fusion=Fusion.RRF),
+                    limit=fetch_k,
+                    with_payload=True,
+                ).points
+            if has_full_vectors(qd, col):
+                # Matryoshka: HNSW auf gekürztem Vektor, Rescoring mit vollem
+                return qd.query_points(
+                    collection_name=col,
+                    with_payload=True,
+                    **dense_query_kwargs(qd, col, vec, fetch_k, qfilter),
+                ).points
+            return qd.search(
+                collection_name=col,
+                query_vector=vec,
+                limit=fetch_k,
+                query_filter=qfilter,
+                search_params=search_params(),
+                with_payload=True,
             )
-        if tags:
-            if isinstance(tags, str):
-                tags_list = [tags]
-            else:
-                tags_list = list(tags)
 
-            must_conditions.append(
-                FieldCondition(
-                    key="tags",
-                    match=MatchAny(any=tags_list),
-                )
-            )
+        if len(qd_targets) == 1:
+            per_target = [_search_collection(qd_targets[0])]
+        else:
+            # Fan-out: Collections parallel durchsuchen, nach Score mischen
+            from concurrent.futures import ThreadPoolExecutor
 
-        qfilter = Filter(must=must_conditions) if must_conditions else None
+            workers = min(len(qd_targets), settings.SHARD_FANOUT_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                per_target = list(pool.map(_search_collection, qd_targets))
 
-        
-        vec = embed_texts_dynamic([q], backend=embedding_backend, model=embedding_model)[0]
-
-        qd_hits = qd.search(
-            collection_name=qd_col,
-            query_vector=vec,
-            limit=fetch_k,
-            query_filter=qfilter,
-            with_payload=True,
-        )
+        tagged = [(p, os_targets[t]) for t, hits in enumerate(per_target) for p in hits]
+        tagged.sort(key=lambda x: x[0].score, reverse=True)
+        qd_hits = [p for p, _ in tagged[:fetch_k]]
 
-        for i, p in enumerate(qd_hits, start=1):
+        for i, (p, idx) in enumerate(tagged[:fetch_k], start=1):
             cid = (p.payload or {}).get("chunk_id") or str(p.id)
-            qd_rrf[cid] = rrf(i)
+            if server_fused:
+                # Fusions-Score aus Qdrant beibehalten
+                qd_rrf.setdefault(cid, p.score)
+                payloads.setdefault(cid, p.payload or {})
+            else:
+                qd_rrf[cid] = rrf(i)
+            cid_index.setdefault(cid, idx)
         logger.debug(f"Vector returned {len(qd_hits)} hits")
 
     # ---------- 3) Fusion oder Single-Source ----------
-    if retrieval_mode == "hybrid":
+    if server_fused:
+        fused = qd_rrf
+        source_label = "rrf"
+    elif retrieval_mode == "hybrid":
         # RRF Fusion von beiden Quellen
         fused = os_rrf.copy()
         for cid, s in qd_rrf.items():
@@ -206,8 +382,12 @@ def hybrid_search(
 
     # ---------- 4) Quellen nachladen ----------
     results: List[Dict[str, Any]] = []
-    if top_ids:
-        mget = os_client.mget(index=os_idx, body={"ids": top_ids})
+    if top_ids and server_fused:
+        results = [_doc_from_payload(cid, payloads[cid], fused[cid], source_label) for cid in top_ids]
+    elif top_ids:
+        mget = os_client.mget(
+            body={"docs": [{"_index": cid_index.get(cid, os_idx), "_id": cid} for cid in top_ids]}
+        )
         id_to_doc = {}
         for d in mget["docs"]:
             if d.get("found"):
@@ -231,7 +411,13 @@ def hybrid_search(
             if cid in id_to_doc:
                 results.append(id_to_doc[cid])
 
-    # ---------- 5) Optionales Reranking ----------
+    return results
+
+
+def rank_results(
+    q: str, results: List[Dict[str, Any]], k: int, use_rerank: bool
+) -> List[Dict[str, Any]]:
+    """Schritt 5 von hybrid_search: optionales Reranking, Top-k, Rank-Feld."""
     if use_rerank and results:
         from app.services.reranking import rerank, unload_reranker
 
@@ -250,3 +436,39 @@ def hybrid_search(
         doc["rank"] = i + 1
 
     return results
+
+
+async def ahybrid_search(
+    q: str,
+    k: int,
+    *,
+    use_rerank: bool = False,
+    embedding_backend: str = "hf",
+    embedding_model: str = "sentence-transformers/all-minilm-l6-v2",
+    retrieval_mode: str = "hybrid",
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Async-Variante von hybrid_search (gleiche Parameter).
+
+    Query-Embedding über den async HTTP-Client, Suche + Nachladen im
+    I/O-Pool (synchrone OpenSearch-/Qdrant-Clients), Reranking im CPU-Pool.
+    """
+    vec = None
+    if retrieval_mode in ("hybrid", "vector_only"):
+        vec = (await aembed_texts_dynamic([q], backend=embedding_backend, model=embedding_model))[0]
+
+    candidates = await run_io(
+        search_candidates,
+        q,
+        k,
+        retrieval_mode=retrieval_mode,
+        use_rerank=use_rerank,
+        embedding_backend=embedding_backend,
+        embedding_model=embedding_model,
+        query_vector=vec,
+        **kwargs,
+    )
+    if use_rerank and candidates:
+        return await run_cpu(rank_results, q, candidates, k, use_rerank)
+    return rank_results(q, candidates, k, use_rerank)
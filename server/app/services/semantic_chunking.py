@@ -0,0 +1,411 @@
+"""
+Semantic Chunking Engine (bge-m3 via Ollama).
+
+- Embeddings in begrenzten Batches mit begrenzter Parallelität
+- Nachbar-Ähnlichkeiten und Breakpoints vektorisiert mit NumPy
+- Fensterweise Verarbeitung sehr großer Dokumente: pro Fenster werden nur
+  die Embeddings des Fensters gehalten, global bleibt nur das
+  Ähnlichkeits-Array (n-1 Floats). Das Ergebnis ist identisch zur
+  Berechnung über das Gesamtdokument, da die Percentile-Schwelle erst auf
+  allen Ähnlichkeiten bestimmt wird.
+- Wiederverwendung der LangChain-Embedder/Chunker über Dokumente hinweg
+"""
+
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.clients import get_logger
+from app.core.llm_transport import llm_client, llm_timeout
+
+logger = get_logger(__name__)
+
+SEMANTIC_BREAKPOINT_PERCENTILE = 95.0
+SEMANTIC_MIN_CHUNK_CHARS = 100
+SEMANTIC_EMBED_MODEL = "bge-m3:latest"
+
+
+# ============================================================
+# EMBEDDINGS (gebatcht, begrenzt parallel)
+# ============================================================
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    resp = llm_client("ollama").post(
+        "/api/embed",
+        json={"model": SEMANTIC_EMBED_MODEL, "input": texts},
+        timeout=llm_timeout(120),
+    )
+    resp.raise_for_status()
+    return np.asarray(resp.json()["embeddings"], dtype=np.float64)
+
+
+def embed_for_chunking(texts: List[str]) -> np.ndarray:
+    """
+    Erstellt Embeddings für Semantic Chunking via bge-m3.
+    bge-m3 ist optimiert für Satz-Ähnlichkeiten (im Gegensatz zu Query-Doc).
+
+    Texte werden in Batches zu SEMANTIC_EMBED_BATCH_SIZE aufgeteilt, die mit
+    höchstens SEMANTIC_EMBED_CONCURRENCY parallelen Requests gesendet und
+    in Originalreihenfolge wieder zusammengesetzt werden.
+
+    Returns:
+        Matrix der Form (len(texts), dim)
+    """
+    if not texts:
+        return np.array([])
+
+    batch_size = max(1, settings.SEMANTIC_EMBED_BATCH_SIZE)
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    try:
+        if len(batches) == 1:
+            return _embed_batch(batches[0])
+        workers = max(1, min(settings.SEMANTIC_EMBED_CONCURRENCY, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            # map() liefert in Eingabereihenfolge
+            return np.vstack(list(ex.map(_embed_batch, batches)))
+    except Exception as e:
+        logger.error(f"bge-m3 Embedding-Fehler: {e}")
+        raise
+
+
+# ============================================================
+# ÄHNLICHKEITEN & BREAKPOINTS (vektorisiert)
+# ============================================================
+
+
+def neighbour_similarities(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Kosinus-Ähnlichkeit zwischen aufeinanderfolgenden Zeilen.
+
+    Zeilen mit Norm 0 ergeben Ähnlichkeit 0.0.
+
+    Returns:
+        Array der Länge len(embeddings) - 1
+    """
+    if len(embeddings) < 2:
+        return np.array([], dtype=np.float64)
+
+    a, b = embeddings[:-1], embeddings[1:]
+    dots = np.einsum("ij,ij->i", a, b)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    sims = np.zeros_like(dots)
+    np.divide(dots, norms, out=sims, where=norms != 0)
+    return sims
+
+
+def stream_similarities(texts: List[str], window_size: Optional[int] = None) -> np.ndarray:
+    """
+    Berechnet Nachbar-Ähnlichkeiten fensterweise.
+
+    Pro Fenster werden die Embeddings berechnet und zusammen mit dem letzten
+    Vektor des vorherigen Fensters verglichen; danach werden sie verworfen.
+    """
+    window = max(2, window_size or settings.SEMANTIC_WINDOW_SIZE)
+    parts: List[np.ndarray] = []
+    prev_last: Optional[np.ndarray] = None
+
+    for start in range(0, len(texts), window):
+        emb = embed_for_chunking(texts[start:start + window])
+        if prev_last is not None:
+            emb = np.vstack([prev_last[np.newaxis, :], emb])
+        parts.append(neighbour_similarities(emb))
+        prev_last = emb[-1]
+
+    if not parts:
+        return np.array([], dtype=np.float64)
+    return np.concatenate(parts)
+
+
+def compute_breakpoints_percentile(similarities: np.ndarray) -> List[int]:
+    """
+    Greg Kamradt Methode: Breakpoints bei großen Ähnlichkeits-Sprüngen.
+
+    Berechnet die Differenzen zwischen aufeinanderfolgenden Ähnlichkeiten
+    und setzt Breakpoints dort, wo die Differenz über dem X. Percentile liegt.
+
+    Returns:
+        Liste von Indizes, an denen ein neuer Chunk beginnt (1-basiert)
+    """
+    sims = np.asarray(similarities, dtype=np.float64)
+    if len(sims) < 2:
+        return []
+
+    # Positiv = Ähnlichkeit sinkt (potenzieller Themenbruch)
+    diffs = sims[:-1] - sims[1:]
+    threshold = float(np.percentile(diffs, SEMANTIC_BREAKPOINT_PERCENTILE))
+
+    # Index i in diffs bedeutet: Sprung zwischen Element i+1 und i+2
+    return (np.flatnonzero(diffs > threshold) + 2).tolist()
+
+
+# ============================================================
+# CHUNK-AUFBAU
+# ============================================================
+
+
+def merge_metadata(metas: List[dict]) -> dict:
+    """Merged Metadaten mehrerer Elemente zu einem Chunk."""
+    if not metas:
+        return {}
+    if len(metas) == 1:
+        return metas[0]
+
+    merged = {}
+
+    # page_number: Bereich (erste bis letzte Seite)
+    pages = [m.get("page_number") for m in metas if m.get("page_number") is not None]
+    if pages:
+        if len(set(pages)) == 1:
+            merged["page_number"] = pages[0]
+        else:
+            merged["page_number"] = f"{min(pages)}-{max(pages)}"
+
+    # section_title: Erste gefundene
+    for m in metas:
+        if m.get("section_title"):
+            merged["section_title"] = m["section_title"]
+            break
+
+    # element_type: "merged" wenn verschiedene Typen
+    types = [m.get("element_type") for m in metas if m.get("element_type")]
+    if types:
+        merged["element_type"] = "merged" if len(set(types)) > 1 else types[0]
+
+    # roles: Vereinigung aller gefundenen Rollen
+    all_roles = []
+    for m in metas:
+        roles = m.get("roles", [])
+        if isinstance(roles, list):
+            all_roles.extend(roles)
+    if all_roles:
+        merged["roles"] = list(set(all_roles))
+
+    # table_html: Erste gefundene Tabelle
+    for m in metas:
+        if m.get("table_html"):
+            merged["table_html"] = m["table_html"]
+            break
+
+    return merged
+
+
+def create_chunks_from_breakpoints(
+    texts: List[str],
+    metas: List[dict],
+    breakpoints: List[int],
+    max_chunk_chars: int,
+) -> List[Tuple[str, dict]]:
+    """
+    Erstellt Chunks basierend auf Breakpoints, respektiert max_chunk_chars.
+
+    Wenn ein Chunk zu groß wird, wird er an der nächsten Element-Grenze geteilt.
+    """
+    chunks: List[Tuple[str, dict]] = []
+
+    # Breakpoints um Start (0) und Ende (len) erweitern
+    all_breaks = [0] + breakpoints + [len(texts)]
+
+    for i in range(len(all_breaks) - 1):
+        start = all_breaks[i]
+        end = all_breaks[i + 1]
+
+        segment_texts = texts[start:end]
+        segment_metas = metas[start:end]
+
+        # Prüfen ob Segment zu groß ist
+        total_len = sum(len(t) for t in segment_texts)
+
+        if total_len <= max_chunk_chars:
+            # Segment passt → ein Chunk
+            chunk_text = "\n\n".join(segment_texts)
+            if len(chunk_text) >= SEMANTIC_MIN_CHUNK_CHARS:
+                chunk_meta = merge_metadata(segment_metas)
+                chunks.append((chunk_text, chunk_meta))
+        else:
+            # Segment zu groß → aufteilen
+            sub_chunks = _split_segment(segment_texts, segment_metas, max_chunk_chars)
+            chunks.extend(sub_chunks)
+
+    return chunks
+
+
+def _split_segment(
+    texts: List[str],
+    metas: List[dict],
+    max_chunk_chars: int,
+) -> List[Tuple[str, dict]]:
+    """Teilt ein zu großes Segment in kleinere Chunks."""
+    chunks: List[Tuple[str, dict]] = []
+    current_texts: List[str] = []
+    current_metas: List[dict] = []
+    current_len = 0
+
+    for txt, meta in zip(texts, metas):
+        txt_len = len(txt)
+
+        # Prüfen ob Element noch in aktuellen Chunk passt
+        # +2 für "\n\n" Separator
+        separator_len = 2 if current_texts else 0
+
+        if current_len + separator_len + txt_len > max_chunk_chars and current_texts:
+            # Aktuellen Chunk abschließen
+            chunk_text = "\n\n".join(current_texts)
+            if len(chunk_text) >= SEMANTIC_MIN_CHUNK_CHARS:
+                chunk_meta = merge_metadata(current_metas)
+                chunks.append((chunk_text, chunk_meta))
+
+            # Neuen Chunk starten
+            current_texts = []
+            current_metas = []
+            current_len = 0
+
+        current_texts.append(txt)
+        current_metas.append(meta)
+        current_len += (separator_len + txt_len) if current_len > 0 else txt_len
+
+    # Letzten Chunk hinzufügen
+    if current_texts:
+        chunk_text = "\n\n".join(current_texts)
+        if len(chunk_text) >= SEMANTIC_MIN_CHUNK_CHARS:
+            chunk_meta = merge_metadata(current_metas)
+            chunks.append((chunk_text, chunk_meta))
+
+    return chunks
+
+
+def semantic_chunk_texts(
+    texts: List[str],
+    metas: List[dict],
+    max_chunk_chars: int = 2400,
+) -> List[Tuple[str, dict]]:
+    """
+    Semantic Chunking mit Percentile-Methode (Greg Kamradt) auf bereits
+    extrahierten Element-Texten.
+
+    Args:
+        texts: Element-Texte in Dokumentreihenfolge
+        metas: Zugehörige Metadaten
+        max_chunk_chars: Maximale Chunk-Länge
+
+    Returns:
+        Liste von (text, metadata) Tupeln
+    """
+    if not texts:
+        return []
+
+    if len(texts) == 1:
+        return [(texts[0], metas[0])]
+
+    logger.info(f"Semantic Chunking: Berechne Embeddings für {len(texts)} Elemente...")
+    similarities = stream_similarities(texts)
+
+    logger.info(
+        f"Similarities: min={similarities.min():.3f}, max={similarities.max():.3f}, "
+        f"mean={similarities.mean():.3f}"
+    )
+
+    breakpoints = compute_breakpoints_percentile(similarities)
+    logger.info(
+        f"Gefundene Breakpoints: {len(breakpoints)} bei Percentile {SEMANTIC_BREAKPOINT_PERCENTILE}%"
+    )
+
+    chunks = create_chunks_from_breakpoints(texts, metas, breakpoints, max_chunk_chars)
+
+    logger.info(f"Semantic Chunking: {len(texts)} Elemente → {len(chunks)} Chunks")
+    return chunks
+
+
+# ============================================================
+# SENTENCE-LEVEL (LangChain SemanticChunker)
+# ============================================================
+
+_lc_splitters: Dict[Tuple[str, str, str, float], object] = {}
+_lc_lock = threading.Lock()
+
+
+def _get_langchain_splitter(breakpoint_threshold_type: str, breakpoint_threshold_amount: float):
+    """Lazy Loading von OllamaEmbeddings + SemanticChunker (Thread-safe, pro Konfiguration)."""
+    key = (
+        settings.OLLAMA_BASE,
+        settings.OLLAMA_EMBED_MODEL,
+        breakpoint_threshold_type,
+        float(breakpoint_threshold_amount),
+    )
+    splitter = _lc_splitters.get(key)
+    if splitter is None:
+        with _lc_lock:
+            splitter = _lc_splitters.get(key)
+            if splitter is None:
+                from langchain_experimental.text_splitter import SemanticChunker
+                from langchain_ollama import OllamaEmbeddings
+
+                embeddings = OllamaEmbeddings(
+                    model=settings.OLLAMA_EMBED_MODEL,
+                    base_url=settings.OLLAMA_BASE,
+                )
+                splitter = SemanticChunker(
+                    embeddings=embeddings,
+                    breakpoint_threshold_type=breakpoint_threshold_type,
+                    breakpoint_threshold_amount=breakpoint_threshold_amount,
+                )
+                _lc_splitters[key] = splitter
+    return splitter
+
+
+def langchain_semantic_chunk(
+    full_text: str,
+    max_chunk_chars: int = 2400,
+    breakpoint_threshold_type: str = "percentile",
+    breakpoint_threshold_amount: float = 90.0,
+) -> List[Tuple[str, dict]]:
+    """
+    LangChain SemanticChunker: Sentence-level semantic chunking.
+
+    Verwendet langchain_experimental.text_splitter.SemanticChunker
+    mit einem Ollama-basierten Embedding-Modell. Embedder und Chunker
+    werden pro Konfiguration nur einmal erzeugt.
+
+    Args:
+        full_text: Gesamter Dokumenttext
+        max_chunk_chars: Maximale Chunk-Länge (wird nachträglich angewendet)
+        breakpoint_threshold_type: "percentile", "standard_deviation", oder "interquartile"
+        breakpoint_threshold_amount: Threshold-Wert (z.B. 90 für 90. Percentile)
+
+    Returns:
+        Liste von (text, metadata) Tupeln
+    """
+    if not full_text.strip():
+        return []
+
+    logger.info(
+        f"LangChain Semantic Chunking: threshold={breakpoint_threshold_type}/{breakpoint_threshold_amount}"
+    )
+
+    text_splitter = _get_langchain_splitter(breakpoint_threshold_type, breakpoint_threshold_amount)
+    docs = text_splitter.create_documents([full_text])
+
+    # Chunks extrahieren und ggf. aufteilen wenn zu lang
+    chunks: List[Tuple[str, dict]] = []
+    for doc in docs:
+        chunk_text = doc.page_content.strip()
+
+        if len(chunk_text) < SEMANTIC_MIN_CHUNK_CHARS:
+            continue
+
+        if len(chunk_text) > max_chunk_chars:
+            # Aufteilen bei max_chunk_chars
+            for i in range(0, len(chunk_text), max_chunk_chars):
+                sub_chunk = chunk_text[i:i + max_chunk_chars].strip()
+                if len(sub_chunk) >= SEMANTIC_MIN_CHUNK_CHARS:
+                    chunks.append((sub_chunk, {"chunking_strategy": "langchain_semantic"}))
+        else:
+            chunks.append((chunk_text, {"chunking_strategy": "langchain_semantic"}))
+
+    logger.info(f"LangChain Semantic Chunking: {len(docs)} raw chunks → {len(chunks)} final chunks")
+    return chunks
@@ -0,0 +1,264 @@
+"""
+Prozess-Sharding: eigener OpenSearch-Index + Qdrant-Collection pro process_name.
+
+Optionales Layout (PROCESS_SHARDING=True). Neben dem Basis-Index einer
+Strategie (z.B. `chunks_semantic_qwen3`) bekommt jeder Prozess einen Shard
+`<basis>__p_<slug>`. Die Zuordnung Prozess → Shard steht in einer
+Routing-Tabelle (OpenSearch-Index SHARD_ROUTING_INDEX) und wird pro
+Prozess TTL-gecacht.
+
+- Schreiben: Chunks mit process_name gehen in den Shard des Prozesses
+  (wird bei Bedarf angelegt), Chunks ohne process_name in den Basis-Index.
+- Suchen mit process_name: nur der Shard (plus Basis-Index, solange der
+  Prozess dort noch Altbestand hat, siehe `exclusive`).
+- Suchen ohne process_name: Fan-out über Basis-Index + alle Shards.
+
+Altbestand im Basis-Index verschiebt app.eval.scripts.reshard in die Shards
+und setzt danach `exclusive`.
+"""
+
+from __future__ import annotations
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+import xxhash
+from opensearchpy.exceptions import RequestError
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from app.core.config import settings
+from app.core.clients import get_logger, get_opensearch, get_qdrant
+
+logger = get_logger(__name__)
+
+SHARD_SEP = "__p_"
+
+_ROUTING_MAPPING = {
+    "mappings": {
+        "properties": {
+            "base_os_index": {"type": "keyword"},
+            "base_qdrant_collection": {"type": "keyword"},
+            "process_name": {"type": "keyword"},
+            "os_index": {"type": "keyword"},
+            "qdrant_collection": {"type": "keyword"},
+            "exclusive": {"type": "boolean"},
+            "created_at": {"type": "double"},
+        }
+    }
+}
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass
+class ShardRoute:
+    """Eintrag der Routing-Tabelle."""
+
+    base_os_index: str
+    base_qdrant_collection: str
+    process_name: str
+    os_index: str
+    qdrant_collection: str
+    exclusive: bool = False  # Basis-Index enthält keine Chunks dieses Prozesses mehr
+    created_at: float = 0.0
+
+
+def shard_slug(process_name: str) -> str:
+    """Index-tauglicher Name: lesbarer Slug + Hash (Slugs allein können kollidieren)."""
+    slug = _SLUG_RE.sub("_", process_name.lower()).strip("_")[:40] or "p"
+    return f"{slug}_{xxhash.xxh32_hexdigest(process_name.encode('utf-8'))}"
+
+
+def process_query(process_name: str) -> Dict[str, object]:
+    """OpenSearch-Query auf meta.process_name (keyword-Mapping oder dynamisches .keyword)."""
+    return {
+        "bool": {
+            "should": [
+                {"term": {"meta.process_name": process_name}},
+                {"term": {"meta.process_name.keyword": process_name}},
+            ],
+            "minimum_should_match": 1,
+        }
+    }
+
+
+def _route_id(base_os_index: str, process_name: str) -> str:
+    return f"{base_os_index}:{shard_slug(process_name)}"
+
+
+# ============================================================
+# Routing-Tabelle (TTL-Cache pro Basis-Index)
+# ============================================================
+
+_cache: Dict[str, Tuple[float, Dict[str, ShardRoute]]] = {}
+_cache_lock = threading.Lock()
+_create_lock = threading.Lock()  # nur prozesslokal, siehe _already_exists
+
+
+def _already_exists(e: Exception) -> bool:
+    """Hat ein anderer Worker Index/Collection zeitgleich angelegt?"""
+    if isinstance(e, RequestError):
+        return e.error == "resource_already_exists_exception"
+    if isinstance(e, UnexpectedResponse):
+        return e.status_code == 409 or "already exists" in str(e)
+    return False
+
+
+def _load_routes(base_os_index: str) -> Dict[str, ShardRoute]:
+    os_client = get_opensearch()
+    if not os_client.indices.exists(index=settings.SHARD_ROUTING_INDEX):
+        return {}
+    resp = os_client.search(
+        index=settings.SHARD_ROUTING_INDEX,
+        body={"size": 10000, "query": {"term": {"base_os_index": base_os_index}}},
+    )
+    routes = [ShardRoute(**h["_source"]) for h in resp["hits"]["hits"]]
+    return {r.process_name: r for r in routes}
+
+
+def routes_for(base_os_index: str, refresh: bool = False) -> Dict[str, ShardRoute]:
+    """Routing-Tabelle eines Basis-Index {process_name: ShardRoute}."""
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(base_os_index)
+        if hit and not refresh and now - hit[0] < settings.SHARD_ROUTING_TTL:
+            return hit[1]
+    routes = _load_routes(base_os_index)
+    with _cache_lock:
+        _cache[base_os_index] = (now, routes)
+    return routes
+
+
+def invalidate_routes(base_os_index: Optional[str] = None) -> None:
+    with _cache_lock:
+        if base_os_index is None:
+            _cache.clear()
+        else:
+            _cache.pop(base_os_index, None)
+
+
+def save_route(route: ShardRoute) -> None:
+    os_client = get_opensearch()
+    if not os_client.indices.exists(index=settings.SHARD_ROUTING_INDEX):
+        try:
+            os_client.indices.create(index=settings.SHARD_ROUTING_INDEX, body=_ROUTING_MAPPING)
+        except Exception as e:
+            if not _already_exists(e):
+                raise
+    os_client.index(
+        index=settings.SHARD_ROUTING_INDEX,
+        id=_route_id(route.base_os_index, route.process_name),
+        body=asdict(route),
+        refresh="wait_for",
+    )
+    invalidate_routes(route.base_os_index)
+
+
+# ============================================================
+# Schreiben
+# ============================================================
+
+
+def _create_shard(base_os_index: str, base_qdrant_collection: str, process_name: str) -> ShardRoute:
+    """
+    Legt Shard-Index/-Collection mit Mapping bzw. Konfiguration des Basis-Index an.
+
+    Mehrere Worker-Prozesse können denselben Shard gleichzeitig anlegen;
+    "existiert bereits" gilt deshalb als Erfolg. Die Route hat eine feste ID,
+    doppeltes Speichern überschreibt nur.
+    """
+    from app.services.index_aliases import qdrant_alias_target
+    from app.services.qdrant_schema import (
+        collection_create_kwargs,
+        ensure_payload_indexes,
+        full_vector_params,
+    )
+
+    os_client = get_opensearch()
+    qd = get_qdrant()
+    slug = shard_slug(process_name)
+    os_index = f"{base_os_index}{SHARD_SEP}{slug}"
+    qdrant_col = f"{base_qdrant_collection}{SHARD_SEP}{slug}"
+
+    if not os_client.indices.exists(index=os_index):
+        mapping = next(iter(os_client.indices.get_mapping(index=base_os_index).values()))["mappings"]
+        try:
+            os_client.indices.create(index=os_index, body={"mappings": mapping})
+        except Exception as e:
+            if not _already_exists(e):
+                raise
+
+    if qdrant_col not in {c.name for c in qd.get_collections().collections}:
+        base_physical = qdrant_alias_target(qd, base_qdrant_collection) or base_qdrant_collection
+        vectors = full_vector_params(qd, base_physical)
+        try:
+            qd.create_collection(qdrant_col, **collection_create_kwargs(vectors.size, vectors.distance))
+        except Exception as e:
+            if not _already_exists(e):
+                raise
+        ensure_payload_indexes(qd, qdrant_col)
+
+    route = ShardRoute(
+        base_os_index=base_os_index,
+        base_qdrant_collection=base_qdrant_collection,
+        process_name=process_name,
+        os_index=os_index,
+        qdrant_collection=qdrant_col,
+        # Neuer Prozess ohne Altbestand im Basis-Index → direkt exklusiv
+        exclusive=os_client.count(index=base_os_index, body={"query": process_query(process_name)})["count"] == 0,
+        created_at=time.time(),
+    )
+    save_route(route)
+    logger.info(f"Shard angelegt: {process_name} → {os_index} / {qdrant_col} (exclusive={route.exclusive})")
+    return route
+
+
+def write_target(
+    base_os_index: str, base_qdrant_collection: str, process_name: Optional[str]
+) -> Tuple[str, str]:
+    """Ziel (os_index, qdrant_collection) für Chunks eines Prozesses; legt Shards bei Bedarf an."""
+    if not settings.PROCESS_SHARDING or not process_name:
+        return base_os_index, base_qdrant_collection
+    route = routes_for(base_os_index).get(process_name)
+    if route is None:
+        with _create_lock:
+            route = routes_for(base_os_index, refresh=True).get(process_name) or _create_shard(
+                base_os_index, base_qdrant_collection, process_name
+            )
+    return route.os_index, route.qdrant_collection
+
+
+# ============================================================
+# Suchen / Löschen
+# ============================================================
+
+
+def search_targets(
+    base_os_index: str, base_qdrant_collection: str, process_name: Optional[str]
+) -> List[Tuple[str, str]]:
+    """Zu durchsuchende (os_index, qdrant_collection) für eine Query."""
+    base = (base_os_index, base_qdrant_collection)
+    if not settings.PROCESS_SHARDING:
+        return [base]
+    routes = routes_for(base_os_index)
+    if process_name:
+        route = routes.get(process_name)
+        if route is None:
+            return [base]
+        shard = (route.os_index, route.qdrant_collection)
+        return [shard] if route.exclusive else [shard, base]
+    return [base] + [(r.os_index, r.qdrant_collection) for r in routes.values()]
+
+
+def expand_shard_targets(targets: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Ergänzt Basis-Ziele um alle zugehörigen Shards (z.B. für Löschungen)."""
+    if not settings.PROCESS_SHARDING:
+        return targets
+    expanded = list(targets)
+    for os_index, _ in targets:
+        for r in routes_for(os_index, refresh=True).values():
+            if (r.os_index, r.qdrant_collection) not in expanded:
+                expanded.append((r.os_index, r.qdrant_collection))
+    return expanded
@@ -0,0 +1,65 @@
+"""
+Sparse-Vektoren (BM25-artig) für Hybrid-Retrieval direkt in Qdrant.
+
+Bei QDRANT_SPARSE_VECTORS=True bekommt jeder Punkt neben dem (unbenannten)
+Dense-Vektor einen Sparse-Vektor SPARSE_VECTOR_NAME:
+
+- Indizes: xxh32-Hash des Tokens (kein Vokabular nötig, neue Wörter ohne
+  Reindex; Kollisionen werden aufsummiert)
+- Gewichte: BM25-TF-Sättigung mit Längennormalisierung (k1, b, avgdl aus
+  den Settings)
+- IDF rechnet Qdrant selbst (Modifier.IDF), daher gehen Query-Tokens nur
+  mit Gewicht 1 ein.
+
+`retrieval.hybrid_search` fusioniert Dense- und Sparse-Treffer dann mit
+einem einzigen `query_points`-Aufruf (Prefetch + RRF im Server).
+"""
+
+from __future__ import annotations
+import re
+from collections import Counter
+from typing import Dict, List
+
+import xxhash
+from qdrant_client.http.models import SparseVector
+
+from app.core.config import settings
+
+SPARSE_VECTOR_NAME = "bm25"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Kleinbuchstaben-Tokens (Wortzeichen), einbuchstabige Tokens entfallen."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1]
+
+
+def _token_id(token: str) -> int:
+    return xxhash.xxh32_intdigest(token.encode("utf-8"))
+
+
+def _to_sparse(weights: Dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def sparse_doc_vector(text: str) -> SparseVector:
+    """BM25-TF-Gewichte eines Chunks (ohne IDF)."""
+    tokens = tokenize(text)
+    if not tokens:
+        return SparseVector(indices=[], values=[])
+    k1 = settings.SPARSE_BM25_K1
+    b = settings.SPARSE_BM25_B
+    norm = k1 * (1 - b + b * len(tokens) / settings.SPARSE_AVG_DOC_LEN)
+
+    weights: Dict[int, float] = {}
+    for token, tf in Counter(tokens).items():
+        tid = _token_id(token)
+        weights[tid] = weights.get(tid, 0.0) + tf * (k1 + 1) / (tf + norm)
+    return _to_sparse(weights)
+
+
+def sparse_query_vector(text: str) -> SparseVector:
+    """Query-Tokens mit Gewicht 1 (IDF kommt aus Qdrant)."""
+    return _to_sparse({_token_id(t): 1.0 for t in set(tokenize(text))})
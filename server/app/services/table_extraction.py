@@ -0,0 +1,125 @@
+"""
+Tabellen-Extraktion aus Unstructured `text_as_html`.
+
+Jede Tabelle wird genau einmal mit lxml geparst. In einem Durchlauf über die
+Zellen werden die Formular-Heuristiken (Anteil leerer Zellen,
+Checkbox-Symbole, Label-Spalte) und das Markdown-Rendering berechnet.
+
+Die Ausgabe entspricht der bisherigen BeautifulSoup-Implementierung
+(Benchmark/Vergleich: app.eval.scripts.bench_tables).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List
+
+from lxml import etree
+from lxml import html as lxml_html
+
+CHECKBOX_SYMBOLS = ("☐", "□", "○", "☑", "☒", "◯", "◻")
+FORM_EMPTY_CELL_RATIO = 0.4
+FORM_LABEL_RATIO = 0.5
+
+_CELL_TAGS = ("td", "th")
+
+
+@dataclass
+class TableAnalysis:
+    """Ergebnis eines Parse-Durchlaufs über eine HTML-Tabelle."""
+
+    total_cells: int = 0
+    empty_cells: int = 0
+    has_checkbox: bool = False
+    label_ratio: float = 0.0
+    markdown: str = ""
+
+    @property
+    def is_form(self) -> bool:
+        """
+        Erkennt ob die Tabelle ein Formular ist (statt einer Datentabelle).
+
+        - Hoher Anteil leerer Zellen (> 40%)
+        - Checkbox-Symbole (☐ □ ○ ☑ ☒)
+        - Label-Pattern in erster Spalte (Text endet mit : oder *)
+        """
+        if not self.total_cells:
+            return False
+        if self.empty_cells / self.total_cells > FORM_EMPTY_CELL_RATIO:
+            return True
+        if self.has_checkbox:
+            return True
+        return self.label_ratio > FORM_LABEL_RATIO
+
+
+def _cell_text(cell) -> str:
+    # Wie BeautifulSoup get_text(strip=True): Textknoten einzeln strippen, leere verwerfen
+    return "".join(s.strip() for s in cell.itertext() if s.strip())
+
+
+def analyze_table(html: str) -> TableAnalysis:
+    """Parst eine HTML-Tabelle einmal und berechnet Heuristiken + Markdown."""
+    try:
+        root = lxml_html.fragment_fromstring(html, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return TableAnalysis()
+
+    # Zelltexte einmalig berechnen (auch verschachtelte Zellen)
+    cell_texts: Dict[object, str] = {}
+    empty = 0
+    for cell in root.iter(*_CELL_TAGS):
+        txt = _cell_text(cell)
+        cell_texts[cell] = txt
+        if not txt:
+            empty += 1
+
+    analysis = TableAnalysis(total_cells=len(cell_texts), empty_cells=empty)
+    if not cell_texts:
+        return analysis
+
+    full_text = "".join(root.itertext())
+    analysis.has_checkbox = any(sym in full_text for sym in CHECKBOX_SYMBOLS)
+
+    rows: List[str] = []
+    first_cells = 0
+    labels = 0
+    for tr in root.iter("tr"):
+        texts = [cell_texts[c] for c in tr.iter(*_CELL_TAGS)]
+        if texts:
+            first_cells += 1
+            if texts[0].endswith((":", "*")):
+                labels += 1
+        # Nur Zeilen mit mindestens einer nicht-leeren Zelle
+        if any(texts):
+            rows.append(" | ".join(texts))
+
+    if first_cells:
+        analysis.label_ratio = labels / first_cells
+
+    if rows:
+        # Markdown-Tabelle mit Header-Separator (Spaltenzahl aus erster Zeile)
+        num_cols = len(rows[0].split(" | "))
+        separator = " | ".join(["---"] * num_cols)
+        result = [rows[0], separator] + rows[1:] if len(rows) > 1 else [rows[0]]
+        analysis.markdown = "\n".join(result)
+
+    return analysis
+
+
+def is_form_table(html: str) -> bool:
+    """Erkennt ob eine HTML-Tabelle ein Formular ist (statt einer Datentabelle)."""
+    return analyze_table(html).is_form
+
+
+def table_html_to_text(html: str) -> str:
+    """
+    Konvertiert HTML-Tabelle in lesbaren Markdown-Text.
+
+    - Überspringt Formulare (leerer String)
+    - Filtert leere Zeilen heraus
+    - Fügt Markdown-Header-Separator hinzu
+    - Gibt leeren String zurück wenn Tabelle nur leere Zellen hat
+    """
+    analysis = analyze_table(html)
+    if analysis.is_form:
+        return ""
+    return analysis.markdown